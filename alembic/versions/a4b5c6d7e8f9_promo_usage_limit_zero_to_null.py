@@ -0,0 +1,29 @@
+"""promo codes with usage_limit 0 become unlimited (NULL)
+
+Revision ID: a4b5c6d7e8f9
+Revises: f3a4b5c6d7e8
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a4b5c6d7e8f9"
+down_revision: Union[str, None] = "f3a4b5c6d7e8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+promocode = sa.table("promocode", sa.column("usage_limit", sa.Integer))
+
+
+def upgrade() -> None:
+    # Validation used to read 0 as "no limit"; the API now only accepts None for that
+    op.execute(promocode.update().where(promocode.c.usage_limit == 0).values(usage_limit=None))
+
+
+def downgrade() -> None:
+    # Not reversible: these rows cannot be told apart from codes created without a limit
+    pass
@@ -0,0 +1,49 @@
+"""unique (wishlist_id, product_variant_id) on wishlistitem, dropping duplicate rows first
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a8b9c0d1e2f3"
+down_revision: Union[str, None] = "f7a8b9c0d1e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+wishlistitem = sa.table(
+    "wishlistitem",
+    sa.column("id", sa.Integer),
+    sa.column("wishlist_id", sa.Integer),
+    sa.column("product_variant_id", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    # Keep the oldest row of each duplicate group; per group in Python for MySQL (see e6f7a8b9c0d1)
+    bind = op.get_bind()
+    duplicates = bind.execute(
+        sa.select(wishlistitem.c.wishlist_id, wishlistitem.c.product_variant_id, sa.func.min(wishlistitem.c.id))
+        .group_by(wishlistitem.c.wishlist_id, wishlistitem.c.product_variant_id)
+        .having(sa.func.count() > 1)
+    ).all()
+    for wishlist_id, variant_id, keep_id in duplicates:
+        bind.execute(
+            wishlistitem.delete().where(
+                wishlistitem.c.wishlist_id == wishlist_id,
+                wishlistitem.c.product_variant_id == variant_id,
+                wishlistitem.c.id != keep_id,
+            )
+        )
+    op.create_unique_constraint(
+        "uq_wishlistitem_wishlist_variant", "wishlistitem", ["wishlist_id", "product_variant_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_wishlistitem_wishlist_variant", "wishlistitem", type_="unique")
@@ -0,0 +1,31 @@
+"""add promocode.once_per_user and index promocodeusage (promo_code_id, user_id)
+
+Revision ID: b9c0d1e2f3a4
+Revises: a8b9c0d1e2f3
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b9c0d1e2f3a4"
+down_revision: Union[str, None] = "a8b9c0d1e2f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "promocode", sa.Column("once_per_user", sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+    op.create_index(
+        "ix_promocodeusage_promo_code_user", "promocodeusage", ["promo_code_id", "user_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_promocodeusage_promo_code_user", table_name="promocodeusage")
+    op.drop_column("promocode", "once_per_user")
@@ -0,0 +1,101 @@
+"""add daily_sales_rollup and stats_counter for the admin dashboard, backfilled; index order.created_at
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-10-19
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c0d1e2f3a4b5"
+down_revision: Union[str, None] = "b9c0d1e2f3a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REVENUE_STATUSES = ("paid", "shipped", "delivered", "completed")
+
+order = sa.table(
+    "order",
+    sa.column("id", sa.Integer),
+    sa.column("status", sa.String),
+    sa.column("total_amount", sa.Numeric(10, 2)),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+)
+user = sa.table("user", sa.column("id", sa.Integer))
+
+
+def _base_columns():
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    ]
+
+
+def upgrade() -> None:
+    rollup = op.create_table(
+        "daily_sales_rollup",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("order_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("revenue", sa.Numeric(14, 2), server_default="0", nullable=False),
+        *_base_columns(),
+    )
+    op.create_index(op.f("ix_daily_sales_rollup_id"), "daily_sales_rollup", ["id"], unique=False)
+    op.create_index(op.f("ix_daily_sales_rollup_day"), "daily_sales_rollup", ["day"], unique=True)
+    counter = op.create_table(
+        "stats_counter",
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("value", sa.Numeric(16, 2), server_default="0", nullable=False),
+        *_base_columns(),
+    )
+    op.create_index(op.f("ix_stats_counter_id"), "stats_counter", ["id"], unique=False)
+    op.create_index(op.f("ix_stats_counter_name"), "stats_counter", ["name"], unique=True)
+    op.create_index("ix_order_created_at", "order", ["created_at"], unique=False)
+
+    # Backfill from the full history; afterwards the app keeps both current
+    bind = op.get_bind()
+    counted = sa.case((order.c.status.in_(REVENUE_STATUSES), order.c.total_amount), else_=0)
+    # UTC day, as the app records it (DATE() of a PostgreSQL timestamptz uses the session TimeZone)
+    if bind.dialect.name == "postgresql":
+        order_day = sa.func.date(sa.func.timezone("UTC", order.c.created_at))
+    else:
+        order_day = sa.func.date(order.c.created_at)
+    days = bind.execute(
+        sa.select(order_day, sa.func.count(order.c.id), sa.func.coalesce(sa.func.sum(counted), 0)).group_by(order_day)
+    ).all()
+    if days:
+        op.bulk_insert(
+            rollup,
+            [
+                {"day": date.fromisoformat(str(day)), "order_count": count, "revenue": revenue}
+                for day, count, revenue in days
+            ],
+        )
+    users = bind.execute(sa.select(sa.func.count(user.c.id))).scalar_one()
+    orders, revenue = bind.execute(
+        sa.select(sa.func.count(order.c.id), sa.func.coalesce(sa.func.sum(counted), 0))
+    ).one()
+    op.bulk_insert(
+        counter,
+        [
+            {"name": "users", "value": users},
+            {"name": "orders", "value": orders},
+            {"name": "revenue", "value": revenue},
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_created_at", table_name="order")
+    op.drop_index(op.f("ix_stats_counter_name"), table_name="stats_counter")
+    op.drop_index(op.f("ix_stats_counter_id"), table_name="stats_counter")
+    op.drop_table("stats_counter")
+    op.drop_index(op.f("ix_daily_sales_rollup_day"), table_name="daily_sales_rollup")
+    op.drop_index(op.f("ix_daily_sales_rollup_id"), table_name="daily_sales_rollup")
+    op.drop_table("daily_sales_rollup")
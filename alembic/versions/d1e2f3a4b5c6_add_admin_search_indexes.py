@@ -0,0 +1,60 @@
+"""trigram (PostgreSQL) / n-gram FULLTEXT (MySQL) indexes for admin substring search
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "d1e2f3a4b5c6"
+down_revision: Union[str, None] = "c0d1e2f3a4b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Column sets searched together by app.crud.search.contains(); MySQL's MATCH needs one
+# FULLTEXT index per set, PostgreSQL's ILIKE one trigram index per column.
+SEARCHED = {
+    "order": ["order_number"],
+    "user": ["email", "full_name"],
+    "review": ["comment"],
+    "product": ["name"],
+    "promocode": ["code", "description"],
+}
+
+
+def _trigram_indexes():
+    for table, columns in SEARCHED.items():
+        for column in columns:
+            yield f"ix_{table}_{column}_trgm", table, column
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, table, column in _trigram_indexes():
+            op.create_index(name, table, [column], postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+    elif dialect == "mysql":
+        # The stopword setting is fixed into an index when it is built. With the default list
+        # (which has "a" and "i") the ngram parser drops every token containing one, so phrase
+        # searches such as "gmail" or "maria" would miss rows.
+        op.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+        for table, columns in SEARCHED.items():
+            op.create_index(
+                f"ix_{table}_fulltext", table, columns, mysql_prefix="FULLTEXT", mysql_with_parser="ngram"
+            )
+        op.execute("SET SESSION innodb_ft_enable_stopword = ON")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for name, table, _ in _trigram_indexes():
+            op.drop_index(name, table_name=table)
+    elif dialect == "mysql":
+        for table in SEARCHED:
+            op.drop_index(f"ix_{table}_fulltext", table_name=table)
@@ -0,0 +1,25 @@
+"""add productimage.derivatives for resized WebP/JPEG renditions
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d5e6f7a8b9c0"
+down_revision: Union[str, None] = "c4d5e6f7a8b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("productimage", sa.Column("derivatives", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("productimage", "derivatives")
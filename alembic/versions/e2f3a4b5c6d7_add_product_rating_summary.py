@@ -0,0 +1,73 @@
+"""product rating summary (average, count, per-star histogram), backfilled from approved reviews
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e2f3a4b5c6d7"
+down_revision: Union[str, None] = "d1e2f3a4b5c6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STARS = range(1, 6)
+
+product = sa.table(
+    "product",
+    sa.column("id", sa.Integer),
+    sa.column("rating_avg", sa.DECIMAL(3, 2)),
+    sa.column("rating_count", sa.Integer),
+    *(sa.column(f"ratings_{star}", sa.Integer) for star in STARS),
+)
+review = sa.table(
+    "review",
+    sa.column("id", sa.Integer),
+    sa.column("product_id", sa.Integer),
+    sa.column("rating", sa.Integer),
+    sa.column("is_approved", sa.Boolean),
+)
+
+
+def upgrade() -> None:
+    op.add_column("product", sa.Column("rating_avg", sa.DECIMAL(3, 2), nullable=False, server_default="0"))
+    op.add_column("product", sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"))
+    for star in STARS:
+        op.add_column("product", sa.Column(f"ratings_{star}", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index("ix_product_rating", "product", ["rating_avg", "rating_count"], unique=False)
+
+    # Histogram per product from its approved reviews, then the count and average from the histogram
+    # (separate statements: MySQL evaluates SET left to right with the already-updated values)
+    op.execute(
+        product.update().values(**{
+            f"ratings_{star}": sa.select(sa.func.count(review.c.id))
+            .where(
+                review.c.product_id == product.c.id,
+                review.c.is_approved.is_(sa.true()),
+                review.c.rating == star,
+            )
+            .scalar_subquery()
+            for star in STARS
+        })
+    )
+    count = sum(product.c[f"ratings_{star}"] for star in STARS)
+    total = sum(product.c[f"ratings_{star}"] * star for star in STARS)
+    op.execute(
+        product.update().values(
+            rating_count=count,
+            rating_avg=sa.case((count > 0, sa.func.round(total * sa.literal_column("1.0") / count, 2)), else_=0),
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_rating", table_name="product")
+    for star in STARS:
+        op.drop_column("product", f"ratings_{star}")
+    op.drop_column("product", "rating_count")
+    op.drop_column("product", "rating_avg")
@@ -0,0 +1,55 @@
+"""unique (cart_id, product_variant_id) on cartitem, merging duplicate lines first
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e6f7a8b9c0d1"
+down_revision: Union[str, None] = "d5e6f7a8b9c0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+cartitem = sa.table(
+    "cartitem",
+    sa.column("id", sa.Integer),
+    sa.column("cart_id", sa.Integer),
+    sa.column("product_variant_id", sa.Integer),
+    sa.column("quantity", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    # Duplicate lines come from concurrent add-to-cart requests: keep the oldest with the summed
+    # quantity. Done per group in Python because MySQL cannot update a table it selects from.
+    bind = op.get_bind()
+    duplicates = bind.execute(
+        sa.select(
+            cartitem.c.cart_id,
+            cartitem.c.product_variant_id,
+            sa.func.min(cartitem.c.id),
+            sa.func.sum(cartitem.c.quantity),
+        )
+        .group_by(cartitem.c.cart_id, cartitem.c.product_variant_id)
+        .having(sa.func.count() > 1)
+    ).all()
+    for cart_id, variant_id, keep_id, quantity in duplicates:
+        bind.execute(cartitem.update().where(cartitem.c.id == keep_id).values(quantity=quantity))
+        bind.execute(
+            cartitem.delete().where(
+                cartitem.c.cart_id == cart_id,
+                cartitem.c.product_variant_id == variant_id,
+                cartitem.c.id != keep_id,
+            )
+        )
+    op.create_unique_constraint("uq_cartitem_cart_variant", "cartitem", ["cart_id", "product_variant_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_cartitem_cart_variant", "cartitem", type_="unique")
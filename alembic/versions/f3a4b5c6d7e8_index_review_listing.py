@@ -0,0 +1,33 @@
+"""composite indexes for the paginated product review listing
+
+Revision ID: f3a4b5c6d7e8
+Revises: e2f3a4b5c6d7
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "f3a4b5c6d7e8"
+down_revision: Union[str, None] = "e2f3a4b5c6d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_review_product_approved_created", "review", ["product_id", "is_approved", "created_at"], unique=False
+    )
+    op.create_index(
+        "ix_review_product_approved_rating",
+        "review",
+        ["product_id", "is_approved", "rating", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_review_product_approved_rating", table_name="review")
+    op.drop_index("ix_review_product_approved_created", table_name="review")
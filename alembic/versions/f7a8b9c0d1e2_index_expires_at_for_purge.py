@@ -0,0 +1,27 @@
+"""index verification_otp.expires_at and blacklisted_token.expires_at for the hourly purge
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f7a8b9c0d1e2"
+down_revision: Union[str, None] = "e6f7a8b9c0d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f("ix_verification_otp_expires_at"), "verification_otp", ["expires_at"], unique=False)
+    op.create_index(op.f("ix_blacklisted_token_expires_at"), "blacklisted_token", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_blacklisted_token_expires_at"), table_name="blacklisted_token")
+    op.drop_index(op.f("ix_verification_otp_expires_at"), table_name="verification_otp")
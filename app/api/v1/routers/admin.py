@@ -1,13 +1,15 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from app.api.v1.dependencies.auth import get_current_active_user
+from app.core import live_stats
 from app.core.database import get_db
-from app.core.security import get_password_hash
+from app.crud.search import as_id, contains
+from app.core.security import hash_password
 from app.models.user import User
-from app.models.order import Order
 from app.models.review import Review
 from app.models.user_group import UserGroup
 from app.models.permission import Permission
@@ -21,6 +23,8 @@ from app.schemas.user_group import (
 )
 from app.schemas.review import ReviewOut
 from app.models.product import Product
+from app.services.review_service import review_service
+from app.services.stats_service import stats_service, utc_day
 
 router = APIRouter()
 
@@ -37,28 +41,33 @@ async def get_admin_stats(
 ):
     """
     Get global statistics (Users, Orders, Revenue).
+    Revenue is the sum of paid/shipped/delivered/completed orders. Read from running counters
+    (Redis, else app.services.stats_service), not aggregated over the tables.
     """
-    # Count Users
-    user_count_res = await db.execute(select(func.count(User.id)))
-    user_count = user_count_res.scalar()
+    totals = await live_stats.totals(lambda: stats_service.totals(db))
+    return {
+        "total_users": totals["users"],
+        "total_orders": totals["orders"],
+        "total_revenue": totals["revenue"]
+    }
 
-    # Count Orders
-    order_count_res = await db.execute(select(func.count(Order.id)))
-    order_count = order_count_res.scalar()
 
-    # Total Revenue (Sum of paid/completed/delivered orders)
-    revenue_res = await db.execute(
-        select(func.coalesce(func.sum(Order.total_amount), 0)).filter(
-            Order.status.in_(["paid", "completed", "delivered", "shipped"])
-        )
+@router.get("/stats/stream")
+async def stream_admin_stats(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Server-Sent Events for the dashboard, instead of polling /stats: a "totals" event, then a
+    "delta" event (users, orders, revenue, day) per order or user change. See app.core.live_stats.
+    """
+    totals = await live_stats.totals(lambda: stats_service.totals(db))
+    return StreamingResponse(
+        live_stats.stream(totals, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # no proxy buffering
     )
-    total_revenue = float(revenue_res.scalar() or 0)
-
-    return {
-        "total_users": user_count,
-        "total_orders": order_count,
-        "total_revenue": total_revenue
-    }
 
 
 @router.get("/stats/charts")
@@ -68,49 +77,23 @@ async def get_admin_stats_charts(
     current_user: User = Depends(get_current_admin_user)
 ):
     """
-    Get chart data: orders per day and revenue per day for the last `days` days.
+    Get chart data: orders per day and revenue per day for the last `days` days (at most 90).
+    Read from the daily sales rollup: one row per day with orders.
     """
-    from datetime import datetime, timezone, timedelta
-    from sqlalchemy import cast, Date
+    from datetime import timedelta
 
-    end_date = datetime.now(timezone.utc).date()
+    end_date = utc_day()
     start_date = end_date - timedelta(days=max(1, min(days, 90)))
-
-    # Orders per day
-    order_date = cast(Order.created_at, Date)
-    orders_by_day_stmt = (
-        select(order_date.label("date"), func.count(Order.id).label("count"))
-        .filter(order_date >= start_date, order_date <= end_date)
-        .group_by(order_date)
-        .order_by(order_date)
-    )
-    orders_result = await db.execute(orders_by_day_stmt)
-    orders_rows = orders_result.all()
-
-    # Revenue per day (paid/completed/delivered/shipped)
-    revenue_by_day_stmt = (
-        select(order_date.label("date"), func.coalesce(func.sum(Order.total_amount), 0).label("total"))
-        .filter(
-            order_date >= start_date,
-            order_date <= end_date,
-            Order.status.in_(["paid", "completed", "delivered", "shipped"]),
-        )
-        .group_by(order_date)
-        .order_by(order_date)
-    )
-    revenue_result = await db.execute(revenue_by_day_stmt)
-    revenue_rows = revenue_result.all()
+    by_date = {row.day: row for row in await stats_service.daily(db, start_date, end_date)}
 
     # Fill missing days with 0
-    by_date_orders = {str(r.date): r.count for r in orders_rows}
-    by_date_revenue = {str(r.date): float(r.total) for r in revenue_rows}
     orders_by_day = []
     revenue_by_day = []
     d = start_date
     while d <= end_date:
-        key = str(d)
-        orders_by_day.append({"date": key, "count": by_date_orders.get(key, 0)})
-        revenue_by_day.append({"date": key, "total": by_date_revenue.get(key, 0)})
+        row = by_date.get(d)
+        orders_by_day.append({"date": str(d), "count": row.order_count if row else 0})
+        revenue_by_day.append({"date": str(d), "total": float(row.revenue) if row else 0})
         d += timedelta(days=1)
 
     return {
@@ -127,13 +110,15 @@ async def get_all_users(
     current_user: User = Depends(get_current_admin_user)
 ):
     """
-    Get all users (admin only). Optional search by email or full_name.
+    Get all users (admin only). Optional search by email or full_name, or by id if numeric.
     """
-    from sqlalchemy import or_
     stmt = select(User).options(selectinload(User.groups))
     if search and search.strip():
-        q = f"%{search.strip()}%"
-        stmt = stmt.filter(or_(User.email.ilike(q), User.full_name.ilike(q)))
+        user_id = as_id(search)
+        if user_id is not None:
+            stmt = stmt.filter(User.id == user_id)
+        else:
+            stmt = stmt.filter(contains(db, search, User.email, User.full_name))
     stmt = stmt.offset(skip).limit(limit)
     result = await db.execute(stmt)
     users = result.scalars().all()
@@ -154,7 +139,7 @@ async def create_user(
         raise HTTPException(status_code=400, detail="User with this email already exists")
     
     # Create user
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await hash_password(user_in.password)
     user = User(
         email=user_in.email,
         hashed_password=hashed_password,
@@ -164,6 +149,7 @@ async def create_user(
     )
     db.add(user)
     await db.flush()
+    await stats_service.record_user_created(db)
     
     # Assign groups if provided
     if user_in.group_ids:
@@ -171,6 +157,7 @@ async def create_user(
         user.groups = groups.scalars().all()
     
     await db.commit()
+    await stats_service.publish(db)
     await db.refresh(user)
     return user
 
@@ -213,7 +200,7 @@ async def update_user(
     
     # Update password if provided
     if user_in.password:
-        user.hashed_password = get_password_hash(user_in.password)
+        user.hashed_password = await hash_password(user_in.password)
     
     # Update groups if provided
     if user_in.group_ids is not None:
@@ -241,7 +228,9 @@ async def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     await db.delete(user)
+    await stats_service.record_user_deleted(db)
     await db.commit()
+    await stats_service.publish(db)
     return {"status": "success", "message": "User deleted successfully"}
 
 @router.patch("/users/{user_id}/role")
@@ -435,7 +424,8 @@ async def get_all_reviews(
     current_user: User = Depends(get_current_admin_user)
 ):
     """
-    Get all reviews (admin only). Optional search by comment, product name, or user email/name.
+    Get all reviews (admin only). Optional search by comment, product name, or user email/name,
+    or by review id if numeric.
     """
     from sqlalchemy import or_
     stmt = select(Review).options(
@@ -443,15 +433,18 @@ async def get_all_reviews(
         selectinload(Review.product)
     )
     if search and search.strip():
-        term = f"%{search.strip()}%"
-        stmt = stmt.join(Review.product).join(Review.user).filter(
-            or_(
-                Review.comment.ilike(term),
-                Product.name.ilike(term),
-                User.email.ilike(term),
-                User.full_name.ilike(term),
+        review_id = as_id(search)
+        if review_id is not None:
+            stmt = stmt.filter(Review.id == review_id)
+        else:
+            # One indexed match per table instead of filtering a three-way join
+            stmt = stmt.filter(
+                or_(
+                    contains(db, search, Review.comment),
+                    Review.product_id.in_(select(Product.id).filter(contains(db, search, Product.name))),
+                    Review.user_id.in_(select(User.id).filter(contains(db, search, User.email, User.full_name))),
+                )
             )
-        )
     stmt = stmt.offset(skip).limit(limit).order_by(Review.created_at.desc())
     result = await db.execute(stmt)
     return result.scalars().all()
@@ -465,10 +458,13 @@ async def delete_review(
     """
     Delete a review (admin only).
     """
-    review = await db.get(Review, review_id)
+    # Row lock: the product's rating summary depends on is_approved as read here
+    review = await db.get(Review, review_id, with_for_update=True)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
+    if review.is_approved:
+        await review_service.record_rating(db, review.product_id, review.rating, -1)
     await db.delete(review)
     await db.commit()
     return {"status": "success", "message": "Review deleted successfully"}
@@ -483,10 +479,12 @@ async def approve_review(
     """
     Approve or reject a review (admin only).
     """
-    review = await db.get(Review, review_id)
+    review = await db.get(Review, review_id, with_for_update=True)
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
+    if review.is_approved != is_approved:
+        await review_service.record_rating(db, review.product_id, review.rating, 1 if is_approved else -1)
     review.is_approved = is_approved
     await db.commit()
     await db.refresh(review)
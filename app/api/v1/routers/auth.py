@@ -288,7 +288,7 @@ async def reset_password(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Update password
-    hashed_password = security.get_password_hash(new_password)
+    hashed_password = await security.hash_password(new_password)
     user.hashed_password = hashed_password
     db.add(user)
     await db.commit()
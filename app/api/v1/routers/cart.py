@@ -1,5 +1,5 @@
 from typing import Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, Header, Body
+from fastapi import APIRouter, Depends, HTTPException, Header, Body, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.v1.dependencies.auth import get_current_user, get_current_user_optional
 from app.core.database import get_db
@@ -19,6 +19,7 @@ async def get_or_create_session_id(x_session_id: Optional[str] = Header(None)) -
 
 @router.get("/", response_model=Cart)
 async def get_cart(
+    promo_code: Optional[str] = Query(None, description="Include this promo code's discount in the quote"),
     current_user: Optional[User] = Depends(get_current_user_optional),
     session_id: str = Depends(get_or_create_session_id),
     db: AsyncSession = Depends(get_db)
@@ -27,15 +28,14 @@ async def get_cart(
     Get current cart. Depends on user auth or X-Session-ID header.
     Returns empty cart structure if no cart exists.
     Automatically creates session_id for guest users if not provided.
+    Guest carts live in Redis (id 0, item id = variant id) until login or checkout.
+    The quote carries server-side totals; pass its version to checkout as cart_version.
     """
-    user_id = current_user.id if current_user else None
-    
-    # If authenticated, use user_id; otherwise use session_id
-    cart = await cart_service.get_cart(db, user_id=user_id, session_id=session_id if not user_id else None)
-    if not cart:
-        # Return empty cart structure instead of 404
-        return Cart(id=0, items=[], user_id=user_id, session_id=session_id if not user_id else None)
-    return cart
+    if not current_user:
+        return await cart_service.get_guest_cart(db, session_id, promo_code=promo_code)
+
+    # Empty cart structure (id 0) instead of 404 when the user has no cart yet
+    return await cart_service.get_user_cart(db, user_id=current_user.id, promo_code=promo_code)
 
 @router.post("/items", response_model=Cart)
 async def add_cart_item(
@@ -49,9 +49,13 @@ async def add_cart_item(
     Add item to cart. Creates cart if missing.
     Automatically creates session_id for guest users if not provided.
     """
-    user_id = current_user.id if current_user else None
-    
-    cart = await cart_service.add_item(db, variant_id=variant_id, quantity=quantity, user_id=user_id, session_id=session_id if not user_id else None)
+    if not current_user:
+        cart = await cart_service.add_guest_item(db, session_id, variant_id=variant_id, quantity=quantity)
+        if not cart:
+            raise HTTPException(status_code=404, detail="Product variant not found")
+        return cart
+
+    cart = await cart_service.add_item(db, variant_id=variant_id, quantity=quantity, user_id=current_user.id)
     return cart
 
 @router.patch("/items/{item_id}", response_model=Cart)
@@ -65,8 +69,10 @@ async def update_cart_item(
     """
     Update item quantity.
     """
-    user_id = current_user.id if current_user else None
-    cart = await cart_service.update_item_quantity(db, item_id=item_id, quantity=quantity, user_id=user_id, session_id=session_id if not user_id else None)
+    if not current_user:
+        cart = await cart_service.update_guest_item(db, session_id, variant_id=item_id, quantity=quantity)
+    else:
+        cart = await cart_service.update_item_quantity(db, item_id=item_id, quantity=quantity, user_id=current_user.id)
     if not cart:
          raise HTTPException(status_code=404, detail="Cart or item not found")
     return cart
@@ -81,8 +87,10 @@ async def remove_cart_item(
     """
     Remove item from cart.
     """
-    user_id = current_user.id if current_user else None
-    cart = await cart_service.remove_item(db, item_id=item_id, user_id=user_id, session_id=session_id if not user_id else None)
+    if not current_user:
+        cart = await cart_service.remove_guest_item(db, session_id, variant_id=item_id)
+    else:
+        cart = await cart_service.remove_item(db, item_id=item_id, user_id=current_user.id)
     if not cart:
          raise HTTPException(status_code=404, detail="Cart or item not found")
     return cart
@@ -0,0 +1,42 @@
+import logging
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app.core.image_cache import RESIZE_FORMATS, get_image_cache, normalize_source, parse_size
+from app.core.storage import ImmutableStaticFiles, is_blob_path
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Non-blob sources (legacy uploads, static/) can be replaced in place under the same path
+MUTABLE_CACHE_CONTROL = "public, max-age=86400"
+
+
+@router.get("/img/{size}/{path:path}", include_in_schema=False)
+async def resized_image(size: str, path: str, fmt: str = Query("webp")):
+    """
+    Resized copy of an uploaded or static image, e.g. /img/480x0/uploads/blobs/ab/<sha>.jpg?fmt=webp.
+    Sizes and formats are limited to IMAGE_RESIZE_SIZES and RESIZE_FORMATS.
+    """
+    dimensions = parse_size(size)
+    if dimensions is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image size not allowed")
+    fmt = fmt.lower()
+    if fmt not in RESIZE_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image format not allowed")
+    source = normalize_source(path)
+    if source is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+
+    try:
+        target = await get_image_cache().get(source, *dimensions, fmt)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    except Exception:
+        logger.warning("Could not resize %s to %s (%s)", source, size, fmt, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Image could not be resized")
+
+    cache_control = ImmutableStaticFiles.CACHE_CONTROL if is_blob_path(source) else MUTABLE_CACHE_CONTROL
+    return FileResponse(target, media_type=RESIZE_FORMATS[fmt][1], headers={"Cache-Control": cache_control})
@@ -1,5 +1,5 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Body
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.v1.dependencies.auth import get_current_user, get_current_admin_user
 from app.api.v1.routers.site_config import get_or_create_site_config
@@ -7,6 +7,7 @@ from app.core.database import get_db
 from app.core.email import send_order_confirmed_email, send_order_status_email, send_order_completed_email
 from app.models.user import User
 from app.schemas.order import Order, OrderAdmin, OrderCreate, OrderUpdate
+from app.services.cart_service import cart_service
 from app.services.order_service import order_service
 
 router = APIRouter()
@@ -121,15 +122,19 @@ async def update_order_status(
 async def create_order(
     order_in: OrderCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    x_session_id: Optional[str] = Header(None),
 ) -> Any:
     """
     Create new order from current cart. Sends order-confirmation email to customer.
+    A guest cart still held under X-Session-ID is merged into the user's cart first.
     """
     import logging
     logger = logging.getLogger(__name__)
     
     try:
+        if x_session_id:
+            await cart_service.materialize_guest_cart(db, session_id=x_session_id, user_id=current_user.id)
         order = await order_service.create_order(db, user_id=current_user.id, order_in=order_in)
         try:
             site_config = await get_or_create_site_config(db)
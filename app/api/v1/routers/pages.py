@@ -6,7 +6,7 @@ from app.models.page import Page
 
 from app.api.v1.dependencies.auth import get_current_active_user, get_current_user_optional
 from app.core.database import get_db
-from app.core.storage import save_content_image
+from app.core.storage import resolve_url, save_content_image
 from app.core.query_params import str_to_bool
 from app.models.user import User
 from app.schemas.page import Page, PageCreate, PageUpdate
@@ -84,7 +84,9 @@ async def upload_page_image(
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     relative_path = await save_content_image(file)
-    url_path = "/" + relative_path.replace("\\", "/")
+    url_path = resolve_url(relative_path.replace("\\", "/"))
+    if "://" not in url_path:
+        url_path = "/" + url_path.lstrip("/")
     return {"url": url_path}
 
 
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Header, HTTPException, Request, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.database import get_db
+from app.services.order_service import order_service
 from app.services.payment_service import payment_service
 from app.models.order import Order
 
@@ -28,14 +29,13 @@ async def stripe_webhook(
         payment_intent = event["data"]["object"]
         stripe_payment_id = payment_intent["id"]
         
-        # Update Order Status
-        stmt = select(Order).filter(Order.stripe_payment_id == stripe_payment_id)
+        # Update Order Status (row lock and dashboard stats, like any other status change)
+        stmt = select(Order.id).filter(Order.stripe_payment_id == stripe_payment_id)
         result = await db.execute(stmt)
-        order = result.scalars().first()
+        order_id = result.scalars().first()
         
-        if order:
-            order.status = "paid"
-            await db.commit()
+        if order_id is not None:
+            await order_service.update_status(db, order_id, "paid")
             # Can also trigger email here
     
     return {"status": "success"}
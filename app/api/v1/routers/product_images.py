@@ -1,21 +1,58 @@
-from typing import List
+import asyncio
+import logging
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
 from app.api.v1.dependencies.auth import get_current_admin_user
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.storage import save_product_image, delete_product_image
+from app.core.images import generate_derivatives
+from app.core.storage import save_product_image
 from app.models.product import Product, ProductVariant, ProductImage
 from app.schemas.product import ProductImage as ProductImageSchema
+from app.services.cart_service import cart_service
 from app.services.product_service import product_service
 from app.models.user import User
 from app.services.product_service import product_service
+from app.services.upload_service import upload_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+async def _store_images(
+    files: List[UploadFile], product_id: int, variant_id: Optional[int] = None
+) -> List[Tuple[str, Optional[dict]]]:
+    """
+    Stream, verify and render derivatives for a batch of uploads concurrently
+    (at most UPLOAD_CONCURRENCY at a time). Returns (url, derivatives) in upload order;
+    the first failure, in upload order, is raised once every file has finished.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.UPLOAD_CONCURRENCY))
+
+    async def store(file: UploadFile) -> Tuple[str, Optional[dict]]:
+        async with semaphore:
+            try:
+                # Store relative path (without leading slash) so frontend can construct full URL
+                image_url = (await save_product_image(file, product_id, variant_id)).replace('\\', '/')
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Error uploading {file.filename}: {str(e)}")
+            # Resized WebP/JPEG renditions for srcset (generated in the image process pool)
+            return image_url, await generate_derivatives(image_url)
+
+    results = await asyncio.gather(*(store(file) for file in files), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
 @router.post("/products/{slug}/images", response_model=List[ProductImageSchema])
 async def upload_product_images(
     slug: str,
@@ -39,37 +76,25 @@ async def upload_product_images(
     if len(files) > 10:
         raise HTTPException(status_code=400, detail="Maximum 10 images allowed per upload")
     
-    saved_images = []
-    
-    for idx, file in enumerate(files):
-        try:
-            # Save image file
-            relative_path = await save_product_image(file, product_id)
-            # Store relative path (without leading slash) so frontend can construct full URL
-            # Frontend will prepend API_URL if needed
-            image_url = relative_path.replace('\\', '/')
-            
-            # Create ProductImage record
-            product_image = ProductImage(
-                product_id=product_id,
-                variant_id=None,
-                url=image_url,
-                is_main=(idx == 0)  # First image is main by default
-            )
-            db.add(product_image)
-            saved_images.append(product_image)
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error uploading {file.filename}: {str(e)}")
-    
+    stored = await _store_images(files, product_id)
+    saved_images = [
+        ProductImage(
+            product_id=product_id,
+            variant_id=None,
+            url=image_url,
+            is_main=(idx == 0),  # First image is main by default
+            derivatives=derivatives,
+        )
+        for idx, (image_url, derivatives) in enumerate(stored)
+    ]
+    # One flush inserts every row (multi-row INSERT ... RETURNING where supported). Sessions use
+    # expire_on_commit=False, so ids are already populated and no per-row refresh is needed.
+    db.add_all(saved_images)
     await db.commit()
+    cart_service.invalidate_product(product_id)
     
-    # Refresh images to return with IDs and ensure they're linked
     for img in saved_images:
-        await db.refresh(img)
-        # Verify the image was saved correctly
-        print(f"Saved image {img.id}: product_id={img.product_id}, variant_id={img.variant_id}, url={img.url}")
+        logger.debug("Saved image %s: product_id=%s variant_id=%s url=%s", img.id, img.product_id, img.variant_id, img.url)
     
     return saved_images
 
@@ -96,35 +121,23 @@ async def upload_variant_images(
     if len(files) > 10:
         raise HTTPException(status_code=400, detail="Maximum 10 images allowed per upload")
     
-    saved_images = []
-    
-    for idx, file in enumerate(files):
-        try:
-            # Save image file
-            relative_path = await save_product_image(file, variant.product_id, variant_id)
-            # Store relative path (without leading slash) so frontend can construct full URL
-            image_url = relative_path.replace('\\', '/')
-            
-            # Create ProductImage record
-            product_image = ProductImage(
-                product_id=variant.product_id,
-                variant_id=variant_id,
-                url=image_url,
-                is_main=(idx == 0)  # First image is main by default
-            )
-            db.add(product_image)
-            saved_images.append(product_image)
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error uploading {file.filename}: {str(e)}")
-    
+    stored = await _store_images(files, variant.product_id, variant_id)
+    saved_images = [
+        ProductImage(
+            product_id=variant.product_id,
+            variant_id=variant_id,
+            url=image_url,
+            is_main=(idx == 0),  # First image is main by default
+            derivatives=derivatives,
+        )
+        for idx, (image_url, derivatives) in enumerate(stored)
+    ]
+    db.add_all(saved_images)
     await db.commit()
+    cart_service.invalidate_product(variant.product_id)
     
-    # Refresh images to return with IDs and ensure they're linked
     for img in saved_images:
-        await db.refresh(img)
-        print(f"Saved variant image {img.id}: product_id={img.product_id}, variant_id={img.variant_id}, url={img.url}")
+        logger.debug("Saved variant image %s: product_id=%s variant_id=%s url=%s", img.id, img.product_id, img.variant_id, img.url)
     
     return saved_images
 
@@ -142,18 +155,21 @@ async def delete_image(
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Delete file from storage
-    try:
-        # Extract relative path from URL
-        url_path = image.url.replace("/uploads/", "uploads/")
-        await delete_product_image(url_path)
-    except Exception as e:
-        # Log error but continue with DB deletion
-        print(f"Error deleting image file: {e}")
+    url_path = image.url
+    derivatives = image.derivatives
+    product_id = image.product_id
     
     # Delete from database
     await db.delete(image)
     await db.commit()
+    cart_service.invalidate_product(product_id)
+    
+    # Delete file from storage once no other row shares the (content-addressed) file
+    try:
+        await upload_service.release_image(db, url_path, derivatives)
+    except Exception:
+        # Log error; the row is already gone
+        logger.warning("Error deleting image file for image %s", image_id, exc_info=True)
     
     return {"msg": "Image deleted successfully"}
 
@@ -187,6 +203,7 @@ async def set_main_image(
         img.is_main = (img.id == image_id)
     
     await db.commit()
+    cart_service.invalidate_product(image.product_id)
     await db.refresh(image)
     
     return image
@@ -1,4 +1,5 @@
-from typing import Any, List, Union
+import logging
+from typing import Any, List, Literal, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, status, Body, UploadFile, File, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,6 +12,8 @@ from app.schemas.product import Category, CategoryCreate, CategoryUpdate, Produc
 from app.services.product_service import category_service, product_service
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # --- Categories ---
@@ -106,22 +109,19 @@ async def read_products(
     category_slug: str = None,
     flash_deals_only: Union[str, bool, int] = Query(default=False, description="Filter flash deals only. Accepts: 1/0, true/false"),
     trending_only: Union[str, bool, int] = Query(default=False, description="Filter trending products only. Accepts: 1/0, true/false"),
+    sort: Optional[Literal["latest", "rating"]] = Query(default=None, description="latest (default) or rating (highest rated first)"),
     db: AsyncSession = Depends(get_db)
 ) -> Any:
     """
     Retrieve products with optional filtering.
     Query parameters flash_deals_only and trending_only accept: "1"/"0", "true"/"false", or boolean values.
+    sort=rating orders by the stored rating summary (rating_avg, then rating_count).
     In production (MySQL), these are converted to 1/0 for database storage.
     """
     # Convert query parameters to boolean (handles "1"/"0", "true"/"false", etc.)
     flash_deals_bool = str_to_bool(flash_deals_only)
     trending_bool = str_to_bool(trending_only)
-    
-    # Debug logging (remove in production if needed)
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Product filter - flash_deals_only: {flash_deals_only} (type: {type(flash_deals_only)}) -> {flash_deals_bool}, trending_only: {trending_only} (type: {type(trending_only)}) -> {trending_bool}")
-    
+
     products = await product_service.get_multi_with_filtering(
         db, 
         skip=skip, 
@@ -130,20 +130,11 @@ async def read_products(
         category_id=category_id,
         category_slug=category_slug,
         flash_deals_only=flash_deals_bool,
-        trending_only=trending_bool
+        trending_only=trending_bool,
+        sort=sort,
     )
-    
-    # Enhanced debug logging
-    logger.info(f"Returning {len(products)} products to client")
-    if len(products) == 0 and flash_deals_bool:
-        logger.warning(f"No products found with flash_deals_only=True. Check database for products with is_flash_deal=1 and is_active=1")
-    
-    # Debug: Log image data for first few products
-    for p in products[:5]:
-        if hasattr(p, 'images'):
-            print(f"Product {p.id}: {len(p.images)} product images, {len(p.variants)} variants")
-            for v in p.variants:
-                print(f"  Variant {v.id}: {len(v.images)} variant images")
+    if not products and flash_deals_bool:
+        logger.debug("No active products with is_flash_deal=1 found")
     return products
 
 @router.post("/products", response_model=Product)
@@ -6,7 +6,9 @@ from sqlalchemy import select, or_
 from decimal import Decimal
 
 from app.api.v1.dependencies.auth import get_current_admin_user, get_current_user
+from app.core import promo_counter
 from app.core.database import get_db
+from app.crud.search import as_id, contains
 from app.schemas.promo import PromoCode, PromoCodeCreate, PromoCodeUpdate, PromoCodeValidate, PromoCodeValidationResult
 from app.services.promo_service import promo_code_service
 from app.models.user import User
@@ -30,15 +32,15 @@ async def read_promo_codes(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
-    """Get all promo codes (admin only). Optional search by code or description."""
+    """Get all promo codes (admin only). Optional search by code or description, or by id if numeric."""
     if search and search.strip():
-        term = f"%{search.strip()}%"
-        stmt = select(PromoCodeModel).where(
-            or_(
-                PromoCodeModel.code.ilike(term),
-                PromoCodeModel.description.ilike(term),
-            )
-        ).offset(skip).limit(limit)
+        promo_id = as_id(search)
+        if promo_id is not None:
+            # Codes can be numeric too: both are unique-index lookups
+            match = or_(PromoCodeModel.id == promo_id, PromoCodeModel.code == search.strip())
+        else:
+            match = contains(db, search, PromoCodeModel.code, PromoCodeModel.description)
+        stmt = select(PromoCodeModel).where(match).offset(skip).limit(limit)
         result = await db.execute(stmt)
         promo_codes = result.scalars().all()
     else:
@@ -64,6 +66,7 @@ async def create_promo_code(
         min_purchase_amount=promo_code_in.min_purchase_amount,
         max_discount_amount=promo_code_in.max_discount_amount,
         usage_limit=promo_code_in.usage_limit,
+        once_per_user=promo_code_in.once_per_user,
         is_active=promo_code_in.is_active,
         valid_from=_ensure_utc(promo_code_in.valid_from),
         valid_until=_ensure_utc(promo_code_in.valid_until),
@@ -71,6 +74,7 @@ async def create_promo_code(
     db.add(db_obj)
     await db.commit()
     await db.refresh(db_obj)
+    promo_code_service.invalidate_rules()  # the code may have been cached as unknown
     return db_obj
 
 
@@ -88,6 +92,8 @@ async def update_promo_code(
     if promo_code_in.code:
         promo_code_in.code = promo_code_in.code.upper()
     promo_code = await promo_code_service.update(db, db_obj=promo_code, obj_in=promo_code_in)
+    await promo_counter.forget(promo_code_id)  # usage_limit may have changed: re-seed from the DB
+    promo_code_service.invalidate_rules(promo_code_id)
     return promo_code
 
 
@@ -102,6 +108,8 @@ async def delete_promo_code(
     if not promo_code:
         raise HTTPException(status_code=404, detail="Promo code not found")
     await promo_code_service.remove(db, id=promo_code_id)
+    await promo_counter.forget(promo_code_id)
+    promo_code_service.invalidate_rules(promo_code_id)
     return {"msg": "Promo code deleted successfully"}
 
 
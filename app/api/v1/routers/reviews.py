@@ -1,5 +1,5 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
@@ -9,7 +9,8 @@ from app.models.user import User
 from app.models.review import Review
 from app.models.product import Product
 from app.services.product_service import product_service
-from app.schemas.review import ReviewCreate, ReviewOut
+from app.services.review_service import review_service
+from app.schemas.review import ReviewCreate, ReviewOut, ReviewPage
 
 router = APIRouter()
 
@@ -38,6 +39,8 @@ async def create_review(
         is_approved=True # Auto-approve for now
     )
     db.add(review)
+    if review.is_approved:
+        await review_service.record_rating(db, product.id, review.rating, 1)
     await db.commit()
     await db.refresh(review)
     
@@ -49,23 +52,25 @@ async def create_review(
     result = await db.execute(stmt)
     return result.scalars().first()
 
-@router.get("/{product_slug}/reviews", response_model=List[ReviewOut])
+@router.get("/{product_slug}/reviews", response_model=ReviewPage)
 async def read_reviews(
     product_slug: str,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    sort: Literal["newest", "rating"] = "newest",
+    rating: Optional[int] = Query(default=None, ge=1, le=5, description="Only reviews with this many stars"),
+    min_rating: Optional[int] = Query(default=None, ge=1, le=5),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get reviews for a product.
+    Get a page of approved reviews for a product, newest first or highest rated first.
     """
-    product = await product_service.get_by_slug(db, slug=product_slug)
-    if not product:
+    product_id = (await db.execute(select(Product.id).filter(Product.slug == product_slug))).scalar_one_or_none()
+    if product_id is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    stmt = select(Review).filter(
-        Review.product_id == product.id, 
-        Review.is_approved == True
-    ).options(
-        selectinload(Review.user),
-        selectinload(Review.product)
-    )
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    try:
+        return await review_service.list_reviews(
+            db, product_id, limit=limit, cursor=cursor, sort=sort, rating=rating, min_rating=min_rating
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -155,12 +155,12 @@ async def update_password(
     """
     Update current user password.
     """
-    from app.core.security import verify_password, get_password_hash
+    from app.core.security import check_password, hash_password
     
-    if not verify_password(password_update.current_password, current_user.hashed_password):
+    if not await check_password(password_update.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect password")
     
-    hashed_password = get_password_hash(password_update.new_password)
+    hashed_password = await hash_password(password_update.new_password)
     current_user.hashed_password = hashed_password
     db.add(current_user)
     await db.commit()
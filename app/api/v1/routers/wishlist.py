@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.v1.dependencies.auth import get_current_user
 from app.core.database import get_db
 from app.models.user import User
-from app.schemas.wishlist import Wishlist
+from app.schemas.wishlist import Wishlist, WishlistIds
 from app.services.wishlist_service import wishlist_service
 
 router = APIRouter()
@@ -20,6 +20,16 @@ async def get_wishlist(
     wishlist = await wishlist_service.get_wishlist(db, user_id=current_user.id)
     return wishlist
 
+@router.get("/ids", response_model=WishlistIds)
+async def get_wishlist_ids(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Variant ids in the user's wishlist (cached), for "in wishlist" badges on product grids.
+    """
+    return WishlistIds(variant_ids=sorted(await wishlist_service.variant_ids(db, user_id=current_user.id)))
+
 @router.post("/items", response_model=Wishlist)
 async def add_wishlist_item(
     variant_id: int = Body(..., embed=True),
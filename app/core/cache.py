@@ -0,0 +1,73 @@
+"""
+In-process read-model cache: per-entry TTL, bounded size (least recently used entries are
+dropped first) and explicit invalidation. Hits and misses are counted per cache name in
+the cache_requests_total metric.
+
+Each worker process has its own copy, so invalidation is local: the TTL bounds how stale
+another worker can be after a write. Only cache data where that is acceptable (display
+data such as names, images and list prices), never anything a write decision depends on.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Iterable, Optional, Tuple, TypeVar
+
+from app.core.metrics import record_cache
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int = 10_000):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: K) -> Optional[Tuple[float, V]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._lookup(key)
+        record_cache(self.name, entry is not None)
+        return entry[1] if entry else None
+
+    def get_many(self, keys: Iterable[K]) -> Dict[K, V]:
+        """Cached values for the keys that are present; callers load the rest."""
+        found = {}
+        for key in keys:
+            entry = self._lookup(key)
+            record_cache(self.name, entry is not None)
+            if entry is not None:
+                found[key] = entry[1]
+        return found
+
+    def set(self, key: K, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """ttl_seconds overrides the cache's TTL for this entry."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *keys: K) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[V], bool]) -> None:
+        """Drop every entry whose value matches (O(n); for rare admin writes)."""
+        for key in [k for k, (_, value) in self._entries.items() if predicate(value)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -3,7 +3,7 @@ Application settings with environment-aware config.
 - ENVIRONMENT=development -> PostgreSQL, DEBUG default True, relaxed CORS
 - ENVIRONMENT=production -> MySQL, DEBUG default False, strict CORS/cookies
 """
-from typing import List, Optional
+from typing import List, Optional, Set, Tuple
 from urllib.parse import quote_plus
 
 from pydantic import field_validator, model_validator
@@ -22,6 +22,12 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # ---------- Password hashing (argon2id; stored hashes with other parameters are upgraded at login) ----------
+    ARGON2_TIME_COST: int = 3  # Passes over memory
+    ARGON2_MEMORY_COST: int = 65536  # KiB per hash
+    ARGON2_PARALLELISM: int = 4  # Lanes per hash
+    PASSWORD_HASH_WORKERS: int = 4  # Threads hashing per process; further requests queue (password_hash_queue_depth)
+
     # ---------- Cookie (production: secure, HTTPS) ----------
     COOKIE_ACCESS_TOKEN_NAME: str = "access_token"
     COOKIE_REFRESH_TOKEN_NAME: str = "refresh_token"
@@ -30,6 +36,9 @@ class Settings(BaseSettings):
     COOKIE_HTTPONLY: bool = True
     COOKIE_PATH: str = "/"
 
+    # Explicit SQLAlchemy URL; overrides POSTGRES_*/MYSQL_* when set (e.g. sqlite+aiosqlite:///bench.db for benchmarks)
+    DATABASE_URI: Optional[str] = None
+
     # ---------- PostgreSQL (development) ----------
     POSTGRES_USER: Optional[str] = None
     POSTGRES_PASSWORD: Optional[str] = None
@@ -57,6 +66,7 @@ class Settings(BaseSettings):
     EMAIL_HOST_USER: str = ""
     EMAIL_HOST_PASSWORD: str = ""
     FROM_EMAIL: str = "noreply@example.com"
+    EMAIL_SUPPRESS_SEND: bool = False  # Build messages but skip SMTP (benchmarks, local runs)
 
     FRONTEND_URL: str = "http://localhost:5173"
     API_URL: str = "http://localhost:8000"
@@ -67,12 +77,61 @@ class Settings(BaseSettings):
 
     # ---------- Uploads & static ----------
     UPLOAD_DIR: str = "uploads"
+    IMAGE_DERIVATIVES_ENABLED: bool = True  # Resize product uploads to 160/480/1024px WebP + JPEG
+    IMAGE_WORKERS: int = 2  # Processes in the image pool (Pillow work stays off the event loop)
+    UPLOAD_CONCURRENCY: int = 4  # Files of one multi-image upload processed in parallel
+    # /img/{w}x{h}/{path} allow-list; 0 keeps the aspect ratio, both set = center crop
+    IMAGE_RESIZE_SIZES: str = "64x64,160x160,240x0,320x320,480x0,640x360,960x0,1280x400,1920x600"
+    IMAGE_CACHE_DIR: str = "cache/images"  # Resized images (disposable, safe to wipe)
+    IMAGE_CACHE_MAX_MB: int = 512  # Least recently used resizes are evicted beyond this
+    # Orphaned upload GC (Celery beat, daily): files nothing references, older than the grace period
+    UPLOAD_GC_GRACE_HOURS: float = 24
+    UPLOAD_GC_QUARANTINE_DAYS: int = 7  # Keep collected files in uploads/.quarantine this long; 0 = delete at once
+
+    # ---------- Storage backend (content-addressed uploads: uploads/blobs/...) ----------
+    STORAGE_BACKEND: str = "local"  # "local" (served by this app) or "s3" (any S3-compatible store)
+    STORAGE_PUBLIC_URL: str = ""  # Base URL for stored files, e.g. a CDN; empty = relative paths (local) / bucket URL (s3)
+    S3_BUCKET: str = ""
+    S3_ENDPOINT_URL: Optional[str] = None  # MinIO/R2/etc.; None for AWS
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+
+    # ---------- Carts ----------
+    GUEST_CART_TTL_DAYS: float = 7  # Redis guest carts expire after this long without activity
+    CART_READ_MODEL_TTL_SECONDS: float = 30  # Cached variant/product display data in cart responses (per worker)
+    CART_QUOTE_TTL_SECONDS: float = 120  # Cached cart totals per cart version (per worker); bounds promo code staleness
+    WISHLIST_IDS_TTL_SECONDS: float = 300  # Cached wishlisted variant ids per user (Redis; dropped on every write)
+    PROMO_COUNTER_TTL_SECONDS: int = 3600  # Redis count of remaining promo code uses; re-seeded from the DB after this
+    PROMO_RULE_CACHE_TTL_SECONDS: float = 300  # Cached promo rules (per worker); entries also expire at valid_until
+
+    # ---------- Maintenance (Celery beat, hourly: abandoned guest carts, expired OTPs and tokens) ----------
+    MAINTENANCE_BATCH_SIZE: int = 1000  # Rows per DELETE; each batch is its own short transaction
+    MAINTENANCE_LOCK_SECONDS: int = 600  # Redis lock so one replica runs the purge; expires if a worker dies
+
+    # ---------- Admin dashboard stats (app.services.stats_service, app.core.live_stats) ----------
+    STATS_RECONCILE_DAYS: int = 90  # Nightly rebuild of the dashboard's daily sales rollup covers this many days
+    STATS_LIVE_TTL_SECONDS: int = 300  # Redis copy of the totals; re-seeded from the database after this
+    STATS_STREAM_KEEPALIVE_SECONDS: float = 15  # Comment line on an idle /admin/stats/stream
+
+    # ---------- Rate limiting (app.core.rate_limit: 429 + Retry-After before the route runs) ----------
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: str = ""  # Override policy limits as requests/seconds, e.g. "login=5/60,search=60/10"
+    RATE_LIMIT_PROXY_HOPS: int = 0  # Reverse proxies in front that append to X-Forwarded-For; 0 = use the peer address
+    RATE_LIMIT_MEMORY_KEYS: int = 10000  # Clients tracked per worker while Redis is unavailable
 
     # ---------- CORS (comma-separated origins; production: set to your frontend URL(s)) ----------
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:8090,http://127.0.0.1:5173,http://localhost:3000,http://localhost:8080,https://sastoho.store,https://www.sastoho.store"
 
     # ---------- Logging ----------
     LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR
+    LOG_FORMAT: str = "json"  # "json" (one object per line) or "text"
+    LOG_QUEUE_SIZE: int = 10000  # Records beyond this are dropped (counted in /metrics), never blocking requests
+    # Keep only a fraction of sub-WARNING records per logger prefix, e.g. "app.services.product_service=0.01,app.api=0.5"
+    LOG_SAMPLING: str = ""
+
+    # ---------- Metrics (Prometheus text format at /metrics) ----------
+    METRICS_ENABLED: bool = True
 
     @field_validator("ENVIRONMENT", mode="before")
     @classmethod
@@ -106,6 +165,8 @@ class Settings(BaseSettings):
 
     @property
     def DATABASE_URL(self) -> str:
+        if self.DATABASE_URI:
+            return self.DATABASE_URI
         if self.is_production:
             if not all([self.MYSQL_USER, self.MYSQL_PASSWORD, self.MYSQL_SERVER, self.MYSQL_DB]):
                 raise ValueError(
@@ -133,6 +194,15 @@ class Settings(BaseSettings):
             database=self.POSTGRES_DB,
         ).render_as_string(hide_password=False)
 
+    @property
+    def image_resize_sizes(self) -> Set[Tuple[int, int]]:
+        sizes = set()
+        for item in self.IMAGE_RESIZE_SIZES.split(","):
+            width, _, height = item.strip().lower().partition("x")
+            if width.isdigit() and height.isdigit() and (int(width) or int(height)):
+                sizes.add((int(width), int(height)))
+        return sizes
+
     @property
     def cors_origins_list(self) -> List[str]:
         if not self.CORS_ORIGINS or self.CORS_ORIGINS.strip() == "*":
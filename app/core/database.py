@@ -1,15 +1,22 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.core.metrics import observe_engine_pool
 
 # Production: pool_pre_ping for stale connections; echo=SQL only when DEBUG
+# SQLite (benchmark stand-in) uses a NullPool, which rejects pool sizing arguments
+_pool_kwargs = {} if settings.DATABASE_URL.startswith("sqlite") else {"pool_size": 10, "max_overflow": 20}
+# MySQL DATETIME has no time zone: keep now() defaults in UTC, as the dashboard's daily
+# rollups (app.services.stats_service) assume
+_connect_args = {"init_command": "SET time_zone = '+00:00'"} if settings.DATABASE_URL.startswith("mysql") else {}
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    connect_args=_connect_args,
+    **_pool_kwargs,
 )
+observe_engine_pool(engine)
 
 SessionLocal = async_sessionmaker(
     bind=engine,
@@ -1,6 +1,9 @@
 """Email sending using HTML templates with logo and site colors."""
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+from functools import lru_cache
+
 from app.core.config import settings
+from app.core.lazy import lazy_import
+from app.core.metrics import EMAIL_IN_FLIGHT, EMAIL_SENT
 from app.core.email_templates import (
     verification_email_html,
     verification_otp_email_html,
@@ -13,38 +16,65 @@ from app.core.email_templates import (
     order_completed_email_html,
 )
 
-# Port 465 uses SSL/TLS, port 587 uses STARTTLS
-# For port 465: MAIL_SSL_TLS=True, MAIL_STARTTLS=False
-# For port 587: MAIL_STARTTLS=True, MAIL_SSL_TLS=False
-use_ssl = settings.EMAIL_PORT == 465
+# fastapi_mail (and its jinja2/aiosmtplib/email-validator stack) loads on the first send
+fastapi_mail = lazy_import("fastapi_mail")
+
+
+@lru_cache(maxsize=None)
+def get_mailer() -> "fastapi_mail.FastMail":
+    """Build the FastMail client on first use."""
+    # Port 465 uses SSL/TLS, port 587 uses STARTTLS
+    # For port 465: MAIL_SSL_TLS=True, MAIL_STARTTLS=False
+    # For port 587: MAIL_STARTTLS=True, MAIL_SSL_TLS=False
+    use_ssl = settings.EMAIL_PORT == 465
+    conf = fastapi_mail.ConnectionConfig(
+        MAIL_USERNAME=settings.EMAIL_HOST_USER,
+        MAIL_PASSWORD=settings.EMAIL_HOST_PASSWORD,
+        MAIL_FROM=settings.FROM_EMAIL,
+        MAIL_PORT=settings.EMAIL_PORT,
+        MAIL_SERVER=settings.EMAIL_HOST,
+        MAIL_STARTTLS=not use_ssl,  # STARTTLS for port 587
+        MAIL_SSL_TLS=use_ssl,  # SSL/TLS for port 465
+        USE_CREDENTIALS=True,
+        VALIDATE_CERTS=True,
+        SUPPRESS_SEND=int(settings.EMAIL_SUPPRESS_SEND),
+    )
+    return fastapi_mail.FastMail(conf)
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.EMAIL_HOST_USER,
-    MAIL_PASSWORD=settings.EMAIL_HOST_PASSWORD,
-    MAIL_FROM=settings.FROM_EMAIL,
-    MAIL_PORT=settings.EMAIL_PORT,
-    MAIL_SERVER=settings.EMAIL_HOST,
-    MAIL_STARTTLS=not use_ssl,  # STARTTLS for port 587
-    MAIL_SSL_TLS=use_ssl,  # SSL/TLS for port 465
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-)
 
-fastmail = FastMail(conf)
+async def _send(message: "fastapi_mail.MessageSchema") -> None:
+    """Send through the SMTP relay, tracking in-flight sends and outcomes for /metrics."""
+    EMAIL_IN_FLIGHT.inc()
+    try:
+        await get_mailer().send_message(message)
+    except Exception:
+        EMAIL_SENT.inc(("error",))
+        raise
+    else:
+        EMAIL_SENT.inc(("ok",))
+    finally:
+        EMAIL_IN_FLIGHT.dec()
 
 
 DEFAULT_LOGO_PATH = "static/logo/logo.png"
+EMAIL_LOGO_SIZE = "240x0"  # must be listed in IMAGE_RESIZE_SIZES
 SUPPORT_EMAIL = "support@sastoho.com"
 
 
 def _logo_url(relative_path: str | None) -> str | None:
-    """Build full logo URL for emails. Uses static/logo/logo.png when not provided."""
+    """
+    Build full logo URL for emails. Uses static/logo/logo.png when not provided.
+    Served through /img as a small PNG: uploaded logos can be several MB and not every
+    mail client renders WebP.
+    """
     path = (relative_path or DEFAULT_LOGO_PATH).strip()
     if not path:
         return None
+    if "://" in path:
+        return path  # Already absolute
     base = settings.API_URL.rstrip("/")
     path = path.lstrip("/").replace("\\", "/")
-    return f"{base}/{path}"
+    return f"{base}/img/{EMAIL_LOGO_SIZE}/{path}?fmt=png"
 
 
 async def send_verification_email(
@@ -62,13 +92,13 @@ async def send_verification_email(
         logo_url=_logo_url(logo_url),
         site_title=site_title,
     )
-    message = MessageSchema(
+    message = fastapi_mail.MessageSchema(
         subject="Verify Your Email",
         recipients=[email_to],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(message)
+    await _send(message)
 
 
 async def send_verification_otp_email(
@@ -87,13 +117,13 @@ async def send_verification_otp_email(
         site_title=site_title,
         expire_minutes=expire_minutes,
     )
-    message = MessageSchema(
+    message = fastapi_mail.MessageSchema(
         subject="Your Verification Code - SastoHo",
         recipients=[email_to],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(message)
+    await _send(message)
 
 
 async def send_reset_password_email(
@@ -111,13 +141,13 @@ async def send_reset_password_email(
         logo_url=_logo_url(logo_url),
         site_title=site_title,
     )
-    message = MessageSchema(
+    message = fastapi_mail.MessageSchema(
         subject="Password Reset Request",
         recipients=[email_to],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(message)
+    await _send(message)
 
 
 async def send_newsletter_welcome_email(
@@ -132,13 +162,13 @@ async def send_newsletter_welcome_email(
         site_title=site_title,
         contact_email=contact_email or SUPPORT_EMAIL,
     )
-    message = MessageSchema(
+    message = fastapi_mail.MessageSchema(
         subject=f"Welcome to {site_title} Newsletter",
         recipients=[email_to],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(message)
+    await _send(message)
 
 
 async def send_contact_thankyou_email(
@@ -155,13 +185,13 @@ async def send_contact_thankyou_email(
         site_title=site_title,
         contact_email=contact_email or SUPPORT_EMAIL,
     )
-    message = MessageSchema(
+    message = fastapi_mail.MessageSchema(
         subject=f"We Received Your Message - {site_title}",
         recipients=[email_to],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(message)
+    await _send(message)
 
 
 async def send_contact_admin_notify_email(
@@ -184,13 +214,13 @@ async def send_contact_admin_notify_email(
         logo_url=_logo_url(logo_url),
         site_title=site_title,
     )
-    msg = MessageSchema(
+    msg = fastapi_mail.MessageSchema(
         subject=f"[{site_title}] New Contact Form: {subject[:50]}",
         recipients=[admin_email],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(msg)
+    await _send(msg)
 
 
 def _orders_url() -> str:
@@ -216,13 +246,13 @@ async def send_order_confirmed_email(
         site_title=site_title,
         orders_url=_orders_url(),
     )
-    message = MessageSchema(
+    message = fastapi_mail.MessageSchema(
         subject=f"Order Confirmed #{order_number} - {site_title}",
         recipients=[email_to],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(message)
+    await _send(message)
 
 
 async def send_order_status_email(
@@ -242,13 +272,13 @@ async def send_order_status_email(
         site_title=site_title,
         orders_url=_orders_url(),
     )
-    message = MessageSchema(
+    message = fastapi_mail.MessageSchema(
         subject=f"Order #{order_number} - Status: {new_status} - {site_title}",
         recipients=[email_to],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(message)
+    await _send(message)
 
 
 async def send_order_completed_email(
@@ -289,10 +319,10 @@ async def send_order_completed_email(
         site_title=site_title,
         orders_url=_orders_url(),
     )
-    message = MessageSchema(
+    message = fastapi_mail.MessageSchema(
         subject=f"Order Completed #{order_number} - {site_title}",
         recipients=[email_to],
         body=html,
-        subtype=MessageType.html,
+        subtype=fastapi_mail.MessageType.html,
     )
-    await fastmail.send_message(message)
+    await _send(message)
@@ -0,0 +1,128 @@
+"""
+Guest (anonymous) carts: one Redis hash per X-Session-ID, variant_id -> quantity.
+
+Nothing is written to SQL for guests; the cart is materialized into Cart/CartItem rows when
+the guest logs in (CartService.merge_carts) or checks out. Every read or write slides the
+expiry forward by GUEST_CART_TTL_DAYS, so abandoned carts disappear on their own.
+
+Falls back to an in-process dict (single worker only) when Redis is unavailable, like
+app.core.otp_store.
+"""
+import asyncio
+import time
+from typing import Dict, Tuple
+
+from app.core.config import settings
+from app.core.redis_client import get_redis as _get_redis
+
+GUEST_CART_KEY_PREFIX = "guest_cart:"
+_in_memory_store: Dict[str, Tuple[Dict[int, int], float]] = {}
+_in_memory_lock = asyncio.Lock()
+
+
+def _ttl_seconds() -> int:
+    return max(1, int(settings.GUEST_CART_TTL_DAYS * 24 * 3600))
+
+
+def _key(session_id: str) -> str:
+    return f"{GUEST_CART_KEY_PREFIX}{session_id}"
+
+
+def _decode(raw: dict) -> Dict[int, int]:
+    items = {}
+    for field, value in raw.items():
+        quantity = int(value)
+        if quantity > 0:
+            items[int(field)] = quantity
+    return items
+
+
+def _memory_items(session_id: str) -> Dict[int, int]:
+    """Live in-memory cart (caller holds the lock); expired carts are dropped and the TTL slid."""
+    items, expiry = _in_memory_store.get(session_id, ({}, 0.0))
+    if expiry < time.time():
+        items = {}
+    _in_memory_store[session_id] = (items, time.time() + _ttl_seconds())
+    return items
+
+
+async def get_items(session_id: str) -> Dict[int, int]:
+    """{variant_id: quantity} for the session; empty if none."""
+    redis = _get_redis()
+    if redis:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.hgetall(_key(session_id))
+                pipe.expire(_key(session_id), _ttl_seconds())
+                raw, _ = await pipe.execute()
+            return _decode(raw)
+        except Exception:
+            pass
+    async with _in_memory_lock:
+        items = dict(_memory_items(session_id))
+        if not items:
+            _in_memory_store.pop(session_id, None)
+        return items
+
+
+async def add_item(session_id: str, variant_id: int, quantity: int) -> Dict[int, int]:
+    """Increase a variant's quantity (HINCRBY) and return the cart."""
+    redis = _get_redis()
+    if redis:
+        try:
+            key = _key(session_id)
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hincrby(key, str(variant_id), quantity)
+                pipe.expire(key, _ttl_seconds())
+                pipe.hgetall(key)
+                new_quantity, _, raw = await pipe.execute()
+            if new_quantity <= 0:
+                await redis.hdel(key, str(variant_id))
+            return _decode(raw)
+        except Exception:
+            pass
+    async with _in_memory_lock:
+        items = _memory_items(session_id)
+        items[variant_id] = items.get(variant_id, 0) + quantity
+        if items[variant_id] <= 0:
+            del items[variant_id]
+        return dict(items)
+
+
+async def set_quantity(session_id: str, variant_id: int, quantity: int) -> Dict[int, int]:
+    """Set a variant's quantity (removing it at <= 0) and return the cart."""
+    redis = _get_redis()
+    if redis:
+        try:
+            key = _key(session_id)
+            async with redis.pipeline(transaction=True) as pipe:
+                if quantity > 0:
+                    pipe.hset(key, str(variant_id), quantity)
+                else:
+                    pipe.hdel(key, str(variant_id))
+                pipe.expire(key, _ttl_seconds())
+                pipe.hgetall(key)
+                results = await pipe.execute()
+            return _decode(results[-1])
+        except Exception:
+            pass
+    async with _in_memory_lock:
+        items = _memory_items(session_id)
+        if quantity > 0:
+            items[variant_id] = quantity
+        else:
+            items.pop(variant_id, None)
+        return dict(items)
+
+
+async def clear(session_id: str) -> None:
+    """Drop the guest cart (after it has been materialized into SQL)."""
+    redis = _get_redis()
+    if redis:
+        try:
+            await redis.delete(_key(session_id))
+            return
+        except Exception:
+            pass
+    async with _in_memory_lock:
+        _in_memory_store.pop(session_id, None)
@@ -0,0 +1,232 @@
+"""
+On-the-fly resized images for /img/{w}x{h}/{path} (banners, category tiles, email logos).
+
+- Sizes come from the IMAGE_RESIZE_SIZES allow-list and formats from RESIZE_FORMATS, so a
+  client cannot make the server render (and cache) arbitrary dimensions.
+- Resizing runs in the shared image process pool (app.core.images), never on the event loop.
+- Results are cached on disk under IMAGE_CACHE_DIR and evicted least-recently-used once the
+  directory exceeds IMAGE_CACHE_MAX_MB. Hits touch the file's mtime, so the LRU order
+  survives restarts (the index is rebuilt from mtimes on first use).
+- Concurrent requests for the same derivative share one render (single-flight), so a
+  traffic spike on a new banner resizes it once per worker process.
+
+Cache keys hash the source path, size and format. Blob keys are content-addressed and never
+change; for other paths (legacy uploads, static/) the file's mtime is part of the key so an
+edited file gets a fresh derivative.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import posixpath
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.images import _get_executor
+from app.core.lazy import lazy_import
+from app.core.metrics import record_cache
+from app.core.storage import is_blob_path
+from app.core.storage_backend import get_storage
+
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+
+logger = logging.getLogger(__name__)
+
+# format -> (file extension, content type, Pillow save options)
+RESIZE_FORMATS = {
+    "webp": (".webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": (".jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": (".png", "image/png", {"optimize": True}),  # email clients without WebP support
+}
+# Only these trees may be resized; never uploads/tmp (in-flight uploads) or the cache itself
+SOURCE_PREFIXES = ("uploads/", "static/")
+EXCLUDED_PREFIXES = ("uploads/tmp/",)
+
+
+def normalize_source(path: str) -> Optional[str]:
+    """Relative, normalized source path, or None if it points outside the allowed trees."""
+    relative = posixpath.normpath(path.replace("\\", "/").lstrip("/"))
+    if relative.startswith("..") or not relative.startswith(SOURCE_PREFIXES):
+        return None
+    if relative.startswith(EXCLUDED_PREFIXES):
+        return None
+    return relative
+
+
+def render_resized(source: str, target: str, width: int, height: int, fmt: str) -> None:
+    """
+    Resize `source` into `target`. Runs inside a pool worker.
+    width x height: scale and center-crop to exactly that box; a 0 side keeps the aspect
+    ratio. Never upscales past the original.
+    """
+    _ext, _content_type, options = RESIZE_FORMATS[fmt]
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha and fmt != "jpeg" else "RGB")
+        if width and height:
+            scale = min(1.0, image.width / width, image.height / height)
+            box = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = ImageOps.fit(image, box, Image.LANCZOS)
+        else:
+            scale = min(1.0, width / image.width if width else height / image.height)
+            box = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            if box != image.size:
+                image = image.resize(box, Image.LANCZOS)
+        out = Path(target)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename: another worker process may be serving the same cache file
+        part = out.with_name(f"{out.name}.{os.getpid()}.part")
+        image.save(part, format=fmt.upper(), **options)
+        os.replace(part, out)
+
+
+class ImageCache:
+    """Disk-backed LRU of resized images with per-key single-flight rendering."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._index: Optional["OrderedDict[Path, int]"] = None
+        self._bytes = 0
+        self._index_lock = asyncio.Lock()
+        self._inflight: Dict[Path, asyncio.Task] = {}
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def _scan(self) -> "OrderedDict[Path, int]":
+        entries = []
+        if self.root.is_dir():
+            for shard in os.scandir(self.root):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.is_file() and not entry.name.endswith(".part"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, Path(entry.path), stat.st_size))
+        entries.sort(key=lambda e: e[0])
+        return OrderedDict((path, size) for _mtime, path, size in entries)
+
+    async def _ensure_index(self) -> "OrderedDict[Path, int]":
+        if self._index is None:
+            async with self._index_lock:
+                if self._index is None:
+                    index = await run_in_threadpool(self._scan)
+                    self._bytes = sum(index.values())
+                    self._index = index
+        return self._index
+
+    def cache_path(self, source_id: str, width: int, height: int, fmt: str) -> Path:
+        digest = hashlib.sha256(f"{source_id}|{width}x{height}|{fmt}".encode()).hexdigest()
+        return self.root / digest[:2] / f"{digest}{RESIZE_FORMATS[fmt][0]}"
+
+    def _touch(self, target: Path) -> bool:
+        """Mark a cached file as recently used. False if it is gone (e.g. evicted by another worker)."""
+        index = self._index
+        try:
+            os.utime(target)
+            size = target.stat().st_size
+        except FileNotFoundError:
+            if target in index:
+                self._bytes -= index.pop(target)
+            return False
+        if target in index:
+            index.move_to_end(target)
+        else:
+            # Rendered by another worker process sharing the directory
+            index[target] = size
+            self._bytes += size
+            self._evict()
+        return True
+
+    def _add(self, target: Path) -> None:
+        size = target.stat().st_size
+        self._bytes += size - self._index.pop(target, 0)
+        self._index[target] = size
+        self._evict()
+
+    def _evict(self) -> None:
+        index = self._index
+        while self._bytes > self.max_bytes and len(index) > 1:
+            path, size = index.popitem(last=False)
+            self._bytes -= size
+            path.unlink(missing_ok=True)
+            logger.debug("Evicted resized image %s (%d bytes)", path, size)
+
+    async def _source_id(self, source: str) -> str:
+        if is_blob_path(source):
+            return source  # content-addressed: the key is the content
+        stat = await run_in_threadpool(os.stat, source)  # FileNotFoundError -> 404
+        return f"{source}@{stat.st_mtime_ns}"
+
+    async def _render(self, source: str, target: Path, width: int, height: int, fmt: str) -> None:
+        loop = asyncio.get_running_loop()
+        backend = get_storage()
+        # Absolute paths: pool workers do not necessarily share this process's cwd
+        out = os.path.abspath(target)
+        if not is_blob_path(source) or backend.is_local:
+            local = os.path.abspath(backend.path(source) if is_blob_path(source) else source)
+            await loop.run_in_executor(_get_executor(), render_resized, local, out, width, height, fmt)
+        else:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                local = os.path.join(tmp_dir, posixpath.basename(source))
+                async with aiofiles.open(local, "wb") as f:
+                    async for chunk in backend.open(source):
+                        await f.write(chunk)
+                await loop.run_in_executor(_get_executor(), render_resized, local, out, width, height, fmt)
+        self._add(target)
+
+    async def get(self, source: str, width: int, height: int, fmt: str) -> Path:
+        """
+        Path of the cached resize, rendering it on first request.
+        Raises FileNotFoundError when the source does not exist.
+        """
+        await self._ensure_index()
+        target = self.cache_path(await self._source_id(source), width, height, fmt)
+        if self._touch(target):
+            record_cache("image_resize", True)
+            return target
+
+        task = self._inflight.get(target)
+        if task is None:
+            record_cache("image_resize", False)
+            task = asyncio.ensure_future(self._render(source, target, width, height, fmt))
+            self._inflight[target] = task
+            task.add_done_callback(lambda t: self._finish(target, t))
+        # shield: a client disconnecting must not cancel a render other requests are waiting on
+        await asyncio.shield(task)
+        return target
+
+    def _finish(self, target: Path, task: asyncio.Task) -> None:
+        self._inflight.pop(target, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here so abandoned failures are not reported as "never retrieved"
+            logger.debug("Resize of %s failed: %r", target, task.exception())
+
+
+_cache: Optional[ImageCache] = None
+
+
+def get_image_cache() -> ImageCache:
+    global _cache
+    if _cache is None:
+        _cache = ImageCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_MB * 1024 * 1024)
+    return _cache
+
+
+def parse_size(size: str) -> Optional[Tuple[int, int]]:
+    """"480x0" -> (480, 0) if allowed by IMAGE_RESIZE_SIZES, else None."""
+    width, _, height = size.lower().partition("x")
+    if not (width.isdigit() and height.isdigit()):
+        return None
+    parsed = (int(width), int(height))
+    return parsed if parsed in settings.image_resize_sizes else None
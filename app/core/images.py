@@ -0,0 +1,144 @@
+"""
+Product image derivatives: fixed-width WebP and JPEG renditions for srcset.
+
+Resizing runs in a ProcessPoolExecutor so Pillow's CPU work never blocks the event loop
+(and is not serialized by the GIL). Derivatives are written next to the original as
+<stem>_<width>.<ext> and described by a dict stored on ProductImage.derivatives:
+
+    {"webp": {"160": "uploads/blobs/ab/abc..._160.webp", ...}, "jpeg": {"160": ..., ...}}
+
+Blob names are content hashes, so identical uploads share (and reuse) their renditions.
+Derivatives are stored through the storage backend under the same key prefix as the
+original; for remote backends (S3) the original is fetched to a temp dir for rendering.
+
+Widths larger than the original are clamped to the original width (no upscaling).
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import posixpath
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+import aiofiles
+
+from app.core.config import settings
+from app.core.lazy import lazy_import
+from app.core.storage_backend import get_storage
+
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (160, 480, 1024)
+# format -> (file extension, content type, Pillow save options)
+DERIVATIVE_FORMATS = {
+    "webp": (".webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": (".jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: never fork a process that has an event loop and logging threads running
+        _executor = ProcessPoolExecutor(
+            max_workers=max(1, settings.IMAGE_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def render_derivatives(relative_path: str) -> Dict[str, Dict[str, str]]:
+    """Resize one local image into every width/format next to it. Runs inside a pool worker."""
+    source = Path(relative_path)
+    derivatives: Dict[str, Dict[str, str]] = {fmt: {} for fmt in DERIVATIVE_FORMATS}
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        for width in DERIVATIVE_WIDTHS:
+            target = min(width, image.width)
+            if str(target) in derivatives["jpeg"]:
+                continue  # small original: several widths clamp to the same size
+            height = max(1, round(image.height * target / image.width))
+            resized = image if target == image.width else image.resize((target, height), Image.LANCZOS)
+            for fmt, (ext, _content_type, options) in DERIVATIVE_FORMATS.items():
+                out = source.with_name(f"{source.stem}_{target}{ext}")
+                if out.exists():
+                    # Content-addressed source: an identical upload already rendered this
+                    derivatives[fmt][str(target)] = out.as_posix()
+                    continue
+                frame = resized.convert("RGB") if fmt == "jpeg" and resized.mode != "RGB" else resized
+                # Write then rename so a concurrent identical upload never sees a partial file
+                part = out.with_name(f"{out.name}.{os.getpid()}.part")
+                frame.save(part, format=fmt.upper(), **options)
+                os.replace(part, out)
+                derivatives[fmt][str(target)] = out.as_posix()
+    return derivatives
+
+
+def _derivative_keys(key: str, rendered: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """Map rendered file paths back to storage keys next to the original key."""
+    parent = posixpath.dirname(key)
+    return {
+        fmt: {width: posixpath.join(parent, Path(path).name) for width, path in renditions.items()}
+        for fmt, renditions in rendered.items()
+    }
+
+
+async def generate_derivatives(key: str) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    Generate derivatives for a stored upload in the process pool.
+    Returns None (original only) when disabled or when rendering fails.
+    """
+    if not settings.IMAGE_DERIVATIVES_ENABLED:
+        return None
+    loop = asyncio.get_running_loop()
+    backend = get_storage()
+    try:
+        if backend.is_local:
+            rendered = await loop.run_in_executor(_get_executor(), render_derivatives, str(backend.path(key)))
+            return _derivative_keys(key, rendered)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = Path(tmp_dir) / posixpath.basename(key)
+            async with aiofiles.open(source, "wb") as f:
+                async for chunk in backend.open(key):
+                    await f.write(chunk)
+            rendered = await loop.run_in_executor(_get_executor(), render_derivatives, str(source))
+            derivatives = _derivative_keys(key, rendered)
+            for fmt, renditions in rendered.items():
+                content_type = DERIVATIVE_FORMATS[fmt][1]
+                for width, path in renditions.items():
+                    await backend.put(derivatives[fmt][width], Path(path), content_type)
+            return derivatives
+    except Exception:
+        logger.warning("Could not generate derivatives for %s", key, exc_info=True)
+        return None
+
+
+async def delete_derivatives(derivatives: Optional[Dict[str, Dict[str, str]]]) -> None:
+    """Remove derivative files. For blobs, only once no row references the original."""
+    backend = get_storage()
+    for renditions in (derivatives or {}).values():
+        for key in renditions.values():
+            await backend.delete(key)
+
+
+def build_srcset(derivatives: Optional[Dict[str, Dict[str, str]]]) -> Dict[str, str]:
+    """{"webp": "u_160.webp 160w, u_480.webp 480w", ...} with keys resolved like ProductImage.url."""
+    from app.core.storage import resolve_url
+
+    srcset = {}
+    for fmt, renditions in (derivatives or {}).items():
+        entries = sorted(renditions.items(), key=lambda item: int(item[0]))
+        if entries:
+            srcset[fmt] = ", ".join(f"{resolve_url(key)} {width}w" for width, key in entries)
+    return srcset
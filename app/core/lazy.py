@@ -0,0 +1,53 @@
+"""
+Deferred imports for heavy, rarely used dependencies (stripe, fastapi_mail, PIL).
+
+    stripe = lazy_import("stripe", on_load=_configure)
+
+binds a stand-in module at import time; the real module is imported (and on_load run
+once) on first attribute access, e.g. stripe.PaymentIntent. Worker boot and the test
+suite then only pay for these libraries when a request actually needs them.
+Annotations that name lazy modules must be strings so they are not evaluated at def time.
+"""
+import importlib
+import threading
+import types
+from typing import Callable, Optional
+
+_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str, on_load: Optional[Callable[[types.ModuleType], None]] = None):
+        super().__init__(name)
+        self.__dict__["_lazy_on_load"] = on_load
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    on_load = self.__dict__["_lazy_on_load"]
+                    if on_load is not None:
+                        on_load(module)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str, on_load: Optional[Callable[[types.ModuleType], None]] = None) -> LazyModule:
+    """Return a stand-in for module `name` that is imported on first use."""
+    return LazyModule(name, on_load)
@@ -0,0 +1,208 @@
+"""
+Live admin dashboard counters: a Redis hash mirroring stats_counter (app.services.stats_service)
+and a pub/sub channel carrying every change to it, streamed to admins by /admin/stats/stream.
+
+Writers publish their deltas after commit. The Lua script increments the hash only if it is
+seeded, which happens from the database on first read and again after STATS_LIVE_TTL_SECONDS,
+so an update lost between the two cannot skew the totals for long. Each worker holds one
+subscription to the channel and fans events out to its open streams through in-process
+queues: N open dashboards cost one PUBLISH per change instead of N polls of the totals.
+
+Without Redis the totals are read from the database and events reach only the streams on
+the worker that made the change.
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.redis_client import get_redis as _get_redis
+
+logger = logging.getLogger(__name__)
+
+TOTALS_KEY = "stats:totals"
+EVENTS_CHANNEL = "stats:events"
+SUBSCRIBER_QUEUE_SIZE = 100  # Events buffered per stream before it is told to resync
+
+_redis_failing = False
+
+_APPLY = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  redis.call('HINCRBY', KEYS[1], 'users', ARGV[1])
+  redis.call('HINCRBY', KEYS[1], 'orders', ARGV[2])
+  redis.call('HINCRBY', KEYS[1], 'revenue_cents', ARGV[3])
+end
+return redis.call('PUBLISH', KEYS[2], ARGV[4])
+"""
+
+
+def _redis_ok() -> None:
+    global _redis_failing
+    _redis_failing = False
+
+
+def _redis_failed(action: str, error: Exception) -> None:
+    """Warn once per outage: every order, signup and status change would otherwise log one."""
+    global _redis_failing
+    if not _redis_failing:
+        logger.warning("Could not %s, Redis failed: %s", action, error)
+    _redis_failing = True
+
+
+def _cents(amount: Decimal) -> int:
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def _as_totals(users, orders, revenue) -> Dict[str, float]:
+    return {"users": int(users), "orders": int(orders), "revenue": float(revenue)}
+
+
+class _Broadcaster:
+    """One Redis subscription per worker, fanned out to a queue per open stream."""
+
+    def __init__(self) -> None:
+        self._queues: Set[asyncio.Queue] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    def deliver(self, event: dict) -> None:
+        for queue in list(self._queues):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled client: drop its backlog and have it re-read the totals
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync"})
+
+    async def _listen(self) -> None:
+        while self._queues:
+            redis = _get_redis()
+            if not redis:
+                return
+            try:
+                pubsub = redis.pubsub()
+                try:
+                    await pubsub.subscribe(EVENTS_CHANNEL)
+                    _redis_ok()
+                    while self._queues:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message:
+                            self.deliver(json.loads(message["data"]))
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _redis_failed("subscribe to stats events (retrying)", e)
+                await asyncio.sleep(1)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._queues.add(queue)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            yield queue
+        finally:
+            self._queues.discard(queue)
+            if not self._queues and self._listener is not None:
+                self._listener.cancel()
+                self._listener = None
+
+
+_broadcaster = _Broadcaster()
+
+
+async def totals(load: Callable[[], Awaitable[Dict[str, Decimal]]]) -> Dict[str, float]:
+    """Current users/orders/revenue from the hash; load() (the database counters) seeds it on a miss."""
+    redis = _get_redis()
+    if redis:
+        try:
+            values = await redis.hgetall(TOTALS_KEY)
+            _redis_ok()
+            record_cache("stats_totals", bool(values))
+            if values:
+                values = {key.decode(): int(value) for key, value in values.items()}
+                return _as_totals(values["users"], values["orders"], Decimal(values["revenue_cents"]) / 100)
+        except Exception as e:
+            _redis_failed("read live stats", e)
+            redis = None
+    loaded = await load()
+    if redis:
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(TOTALS_KEY, mapping={
+                    "users": int(loaded["users"]),
+                    "orders": int(loaded["orders"]),
+                    "revenue_cents": _cents(loaded["revenue"]),
+                })
+                pipe.expire(TOTALS_KEY, settings.STATS_LIVE_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            _redis_failed("seed live stats", e)
+    return _as_totals(loaded["users"], loaded["orders"], loaded["revenue"])
+
+
+async def publish_delta(*, users: int = 0, orders: int = 0, revenue: Decimal = Decimal(0), day=None) -> None:
+    """Apply a committed change to the totals and push it to every open stream."""
+    event = {
+        "type": "delta",
+        "users": users,
+        "orders": orders,
+        "revenue": float(revenue),
+        "day": day.isoformat() if day else None,
+    }
+    redis = _get_redis()
+    if redis:
+        try:
+            await redis.eval(_APPLY, 2, TOTALS_KEY, EVENTS_CHANNEL, users, orders, _cents(revenue), json.dumps(event))
+            _redis_ok()
+            return
+        except Exception as e:
+            _redis_failed("publish stats delta", e)
+    _broadcaster.deliver(event)
+
+
+async def reset(current: Dict[str, Decimal]) -> None:
+    """Drop the hash (re-seeded on next read) and push fresh totals, e.g. after a reconciliation."""
+    event = {"type": "totals", **_as_totals(current["users"], current["orders"], current["revenue"])}
+    redis = _get_redis()
+    if redis:
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(TOTALS_KEY)
+                pipe.publish(EVENTS_CHANNEL, json.dumps(event))
+                await pipe.execute()
+            _redis_ok()
+            return
+        except Exception as e:
+            _redis_failed("reset live stats", e)
+    _broadcaster.deliver(event)
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream(
+    current: Dict[str, float], is_disconnected: Callable[[], Awaitable[bool]]
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events: "totals" with `current`, then "delta" per change, "totals" after a
+    reconciliation and "resync" if this client fell behind (re-read /admin/stats). A comment
+    line every STATS_STREAM_KEEPALIVE_SECONDS keeps proxies from closing an idle stream.
+    """
+    async with _broadcaster.subscribe() as queue:
+        yield _sse({"type": "totals", **current})
+        while not await is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.STATS_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event)
@@ -0,0 +1,173 @@
+"""
+Non-blocking logging pipeline.
+
+Application code logs into a bounded in-memory queue (QueueHandler); a listener thread
+formats records (JSON by default) and writes them to stdout, so the event loop never
+blocks on terminal/pipe I/O. Records below WARNING can be sampled per logger prefix
+(LOG_SAMPLING) before they are queued, and each record carries the current request id.
+
+Use %-style arguments (logger.debug("x=%s", x)), never f-strings: disabled or sampled-out
+records are then never formatted at all.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import counter
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+LOG_RECORDS_DROPPED = counter("log_records_dropped_total", "Log records dropped because the log queue was full.")
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, request_id and exc_info when present."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of sub-WARNING records from selected loggers.
+    rates maps a logger-name prefix to a keep ratio in [0, 1]; the longest prefix wins.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "app.services.product_service" beats "app.services"
+        self._rates = sorted(rates.items(), key=lambda kv: len(kv[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self._rates:
+            return True
+        name = record.name
+        for prefix, rate in self._rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    """QueueHandler that stamps the request id and never blocks when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Contextvars do not cross into the listener thread, so capture the id here.
+        record.request_id = request_id_var.get()
+        # Merge %-args now (cheap) so the listener never touches ORM objects or other
+        # loop-owned state; JSON encoding and I/O still happen on the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Parse "app.services.product_service=0.01,app.api=0.5" into {prefix: rate}."""
+    rates: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, sep, rate = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+def setup_logging() -> None:
+    """Route the root logger through the queue/listener pipeline. Idempotent."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s")
+        )
+
+    queue_handler = ContextQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_sampling(settings.LOG_SAMPLING)))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware: reuse the caller's X-Request-ID (or mint one), expose it to
+    logging via a contextvar and echo it on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
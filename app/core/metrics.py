@@ -0,0 +1,330 @@
+"""
+In-process Prometheus metrics (text exposition format 0.0.4).
+
+Counters, gauges and histograms keep plain Python numbers in dicts keyed by label tuples.
+Updates are a dict lookup plus an add, with no locks: each uvicorn worker runs a single
+event loop, so the hot path never contends. Each worker process exposes its own series;
+scrape every worker (or aggregate with `sum by`) when running several.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds. Tuned for API latencies (1ms .. 10s).
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def render(self) -> List[str]:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter. `inc(labels)` where labels is a tuple matching labelnames."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Gauge that is either set directly or computed at scrape time.
+    A callback returns an iterable of (label_values, value) pairs.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback: Optional[Callable[[], Iterable[Tuple[LabelValues, float]]]] = None
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        self._values[labels] = value
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def set_function(self, callback: Callable[[], Iterable[Tuple[LabelValues, float]]]) -> None:
+        self._callback = callback
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        values = dict(self._values)
+        if self._callback is not None:
+            try:
+                values.update(self._callback())
+            except Exception:
+                pass  # A broken collector must never break the scrape
+        for labels, value in values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram. Bucket counts are stored per bucket and summed at render time."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, labels: LabelValues = ()) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def time(self, labels: LabelValues = ()) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {_format_value(cumulative)}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_str} {_format_value(cumulative)}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: Histogram, labels: LabelValues):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, self._labels)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# ---------- HTTP ----------
+HTTP_REQUESTS = counter("http_requests_total", "HTTP requests by method, route template and status.", ("method", "route", "status"))
+HTTP_LATENCY = histogram("http_request_duration_seconds", "HTTP request latency by method and route template.", ("method", "route"))
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+# ---------- Database pool ----------
+DB_POOL = gauge("db_pool_connections", "SQLAlchemy pool connections by state (size, checked_in, checked_out, overflow).", ("state",))
+
+# ---------- Redis ----------
+REDIS_LATENCY = histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency by command.",
+    ("command",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+REDIS_ERRORS = counter("redis_command_errors_total", "Redis commands that raised.", ("command",))
+
+# ---------- Caches ----------
+CACHE_REQUESTS = counter("cache_requests_total", "Cache lookups by cache name and result (hit/miss).", ("cache", "result"))
+
+# ---------- Rate limiting ----------
+RATE_LIMITED = counter("rate_limited_requests_total", "Requests answered 429 by rate limit policy.", ("policy",))
+
+# ---------- Password hashing ----------
+PASSWORD_HASH_QUEUE_DEPTH = gauge("password_hash_queue_depth", "Password hash/verify jobs waiting for a hashing thread.")
+PASSWORD_HASH_IN_FLIGHT = gauge("password_hashes_in_flight", "Password hash/verify jobs queued or running.")
+
+# ---------- Email / background queues ----------
+EMAIL_IN_FLIGHT = gauge("email_sends_in_flight", "Emails currently being handed to the SMTP relay.")
+EMAIL_SENT = counter("email_sends_total", "Emails sent by result (ok/error).", ("result",))
+CELERY_QUEUE_DEPTH = gauge("celery_queue_depth", "Messages waiting in each Celery broker queue.", ("queue",))
+
+# Queues declared in app/worker/celery_app.py ("celery" is Celery's default queue)
+CELERY_QUEUES = ("celery", "main-queue")
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc((cache, "hit" if hit else "miss"))
+
+
+def observe_engine_pool(engine) -> None:
+    """Expose pool gauges for an (async) SQLAlchemy engine. Evaluated at scrape time, zero cost per request."""
+    pool = getattr(engine, "pool", None)
+
+    def collect():
+        if pool is None or not hasattr(pool, "checkedout"):
+            return []
+        return [
+            (("size",), pool.size()),
+            (("checked_in",), pool.checkedin()),
+            (("checked_out",), pool.checkedout()),
+            (("overflow",), pool.overflow()),
+        ]
+
+    DB_POOL.set_function(collect)
+
+
+async def _collect_queue_depths() -> None:
+    from app.core.redis_client import get_redis
+
+    redis = get_redis()
+    if not redis:
+        return
+    for queue in CELERY_QUEUES:
+        try:
+            CELERY_QUEUE_DEPTH.set(await redis.llen(queue), (queue,))
+        except Exception:
+            return
+
+
+async def render_metrics() -> str:
+    """Refresh scrape-time async gauges and render all metrics."""
+    await _collect_queue_depths()
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count, latency and in-flight requests.
+    Labels use the matched route template (e.g. /api/v1/catalog/products/{slug}) so
+    cardinality stays bounded; unmatched paths are grouped under "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            if route is not None:
+                path = route.path
+            elif scope.get("endpoint") is not None:
+                # Mounted app (e.g. /uploads StaticFiles): Mount rewrites root_path to the mount prefix
+                path = scope.get("root_path", "") + "/*"
+            else:
+                path = "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.observe(elapsed, (method, path))
+            HTTP_REQUESTS.inc((method, path, str(status_code)))
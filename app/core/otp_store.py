@@ -5,26 +5,14 @@ import asyncio
 from datetime import datetime, timezone
 from typing import Optional
 
-from app.core.config import settings
+from app.core.redis_client import get_redis as _get_redis
 
 OTP_EXPIRE_SECONDS = 600  # 10 minutes
 OTP_KEY_PREFIX = "verify_otp:"
-_redis_client = None
 _in_memory_store: dict[str, tuple[str, float]] = {}
 _in_memory_lock = asyncio.Lock()
 
 
-def _get_redis():
-    global _redis_client
-    if _redis_client is None:
-        try:
-            import redis.asyncio as redis
-            _redis_client = redis.from_url(settings.REDIS_URL)
-        except Exception:
-            _redis_client = False  # Mark as failed
-    return _redis_client if _redis_client else None
-
-
 def generate_otp(length: int = 6) -> str:
     """Generate a numeric OTP."""
     return "".join(random.choices(string.digits, k=length))
@@ -0,0 +1,93 @@
+"""
+Redis pre-counter of remaining uses per usage-limited promo code.
+
+Checkout takes a use here before the conditional UPDATE on promocode, so once a code is
+exhausted further checkouts are turned away without touching the database. The database
+stays authoritative: the counter is seeded from usage_limit - used_count, handed back when
+the UPDATE or the order fails, dropped when an admin edits the code, and re-seeded after
+PROMO_COUNTER_TTL_SECONDS in case it drifted.
+
+Without Redis there is no pre-check; the conditional UPDATE alone enforces the limit.
+"""
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.core.redis_client import get_redis as _get_redis
+
+PROMO_REMAINING_KEY_PREFIX = "promo_remaining:"
+
+UNLIMITED = "unlimited"  # Seeded for codes without a usage_limit, so they skip the database lookup too
+
+# Returns false (nil) if the counter is not seeded, -1 if exhausted, else the uses left after this one
+_TAKE = """
+local remaining = redis.call('GET', KEYS[1])
+if not remaining then return false end
+if remaining == ARGV[1] then return 0 end
+if tonumber(remaining) <= 0 then return -1 end
+return redis.call('DECR', KEYS[1])
+"""
+# Only hands a use back to a live counter: an expired one is re-seeded from the database
+_RELEASE = """
+local remaining = redis.call('GET', KEYS[1])
+if remaining and remaining ~= ARGV[1] then return redis.call('INCR', KEYS[1]) end
+return false
+"""
+
+
+def _key(promo_code_id: int) -> str:
+    return f"{PROMO_REMAINING_KEY_PREFIX}{promo_code_id}"
+
+
+async def take(promo_code_id: int, load_remaining: Callable[[], Awaitable[Optional[int]]]) -> Optional[bool]:
+    """
+    Take one use. False if the code is exhausted, True if a use was taken (release() it if the
+    redemption does not go through), None if Redis is unavailable and nothing was taken.
+    load_remaining() supplies usage_limit - used_count (None: no limit) to seed the counter.
+    """
+    redis = _get_redis()
+    if not redis:
+        return None
+    try:
+        key = _key(promo_code_id)
+        result = await redis.eval(_TAKE, 1, key, UNLIMITED)
+        if result is None:
+            remaining = await load_remaining()
+            seed = UNLIMITED if remaining is None else max(0, remaining)
+            await redis.set(key, seed, nx=True, ex=settings.PROMO_COUNTER_TTL_SECONDS)
+            result = await redis.eval(_TAKE, 1, key, UNLIMITED)
+        return result is not None and int(result) >= 0
+    except Exception:
+        return None
+
+
+async def remaining(promo_code_id: int) -> Optional[int]:
+    """Uses left per the counter, without taking one; None if unknown (not seeded, no limit, no Redis)."""
+    redis = _get_redis()
+    if redis:
+        try:
+            value = await redis.get(_key(promo_code_id))
+            if value is not None and value.decode() != UNLIMITED:
+                return int(value)
+        except Exception:
+            pass
+    return None
+
+
+async def release(promo_code_id: int) -> None:
+    """Hand back a use taken by take()."""
+    redis = _get_redis()
+    if redis:
+        try:
+            await redis.eval(_RELEASE, 1, _key(promo_code_id), UNLIMITED)
+        except Exception:
+            pass
+
+
+async def forget(promo_code_id: int) -> None:
+    """Drop the counter (after the code's usage_limit or used_count changed) so it is re-seeded."""
+    redis = _get_redis()
+    if redis:
+        try:
+            await redis.delete(_key(promo_code_id))
+        except Exception:
+            pass
@@ -0,0 +1,291 @@
+"""
+Per-route rate limits, enforced by RateLimitMiddleware before routing, so a throttled request
+costs one Redis round trip: no database session, password hash or email.
+
+Each policy counts requests per client (IP address, or the signed-in user where key="user")
+with one of two algorithms, each a single atomic Lua script:
+
+- sliding_window: at most `limit` requests in any `window` seconds, estimated from the counts of
+  the current and previous fixed windows (two small keys per client instead of a log of requests).
+- token_bucket: bursts of up to `limit`, refilled at limit/window requests per second.
+
+Without Redis (or while it fails) the same algorithms run in process memory, so limits then
+apply per worker. RATE_LIMITS overrides a policy's numbers, e.g. "login=5/60,search=60/10".
+"""
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.requests import Request
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED
+from app.core.redis_client import get_redis as _get_redis
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "rl:"
+
+SLIDING_WINDOW = "sliding_window"
+TOKEN_BUCKET = "token_bucket"
+
+
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    method: str
+    path: str  # Under API_V1_STR, compared without a trailing slash
+    limit: int
+    window: float  # Seconds
+    algorithm: str = SLIDING_WINDOW
+    key: str = "ip"  # "ip" or "user" (anonymous requests fall back to their IP)
+    prefix: bool = False  # path is a prefix, e.g. of /auth/password-recovery/{email}
+    query: Optional[str] = None  # Only requests carrying this query parameter
+
+
+POLICIES: Tuple[Policy, ...] = (
+    Policy("login", "POST", "/auth/login", 10, 60),
+    Policy("verification_otp", "POST", "/auth/send-verification-otp", 5, 600),
+    Policy("verify_otp", "POST", "/auth/verify-otp", 10, 600),  # 6-digit codes: caps guessing per IP
+    Policy("resend_verification", "POST", "/auth/resend-verification", 5, 600),
+    Policy("password_recovery", "POST", "/auth/password-recovery/", 5, 600, prefix=True),
+    Policy("newsletter", "POST", "/newsletter/subscribe", 5, 3600),
+    Policy("contact", "POST", "/contact", 5, 3600),
+    Policy("promo_validate", "POST", "/promo/promo-codes/validate", 20, 60, TOKEN_BUCKET, key="user"),
+    Policy("search", "GET", "/catalog/products", 30, 10, TOKEN_BUCKET, key="user", query="search"),
+)
+
+# KEYS: current window, previous window. ARGV: limit, window, seconds into the current window.
+# Returns "0" when the request is counted, else the seconds until it would be allowed.
+_SLIDING_WINDOW = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if current + 1 > limit then
+  return tostring(window - elapsed)
+end
+if previous * (window - elapsed) / window + current + 1 > limit then
+  return tostring((1 - (limit - 1 - current) / previous) * window - elapsed)
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], math.ceil(window * 2))
+return '0'
+"""
+# KEYS: bucket hash. ARGV: capacity, refill per second, now. Same return value.
+_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry = 0
+if tokens < 1 then
+  retry = (1 - tokens) / rate
+else
+  tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry)
+"""
+
+_scripts: Dict[str, object] = {}
+_in_memory_store: Dict[str, list] = {}  # key -> algorithm state, least recently used first
+_redis_failing = False
+_forwarded_for_warned = False
+
+
+def _parse_overrides(spec: str) -> Dict[str, Tuple[int, float]]:
+    overrides = {}
+    for item in spec.split(","):
+        name, _, numbers = item.partition("=")
+        limit, _, window = numbers.partition("/")
+        if name.strip() and limit and window:
+            overrides[name.strip()] = (int(limit), float(window))
+    return overrides
+
+
+def _build_policies() -> Tuple[Dict[Tuple[str, str], Policy], List[Policy]]:
+    overrides = _parse_overrides(settings.RATE_LIMITS)
+    exact: Dict[Tuple[str, str], Policy] = {}
+    prefixed: List[Policy] = []
+    for policy in POLICIES:
+        if policy.name in overrides:
+            limit, window = overrides[policy.name]
+            policy = replace(policy, limit=limit, window=window)
+        policy = replace(policy, path=(settings.API_V1_STR + policy.path).rstrip("/"))
+        if policy.prefix:
+            prefixed.append(policy)
+        else:
+            exact[(policy.method, policy.path)] = policy
+    return exact, prefixed
+
+
+_exact_policies, _prefix_policies = _build_policies()
+
+
+def match_policy(method: str, path: str, query_string: bytes = b"") -> Optional[Policy]:
+    path = path.rstrip("/")
+    policy = _exact_policies.get((method, path))
+    if policy is None:
+        policy = next((p for p in _prefix_policies if p.method == method and path.startswith(p.path + "/")), None)
+    if policy is not None and policy.query:
+        if policy.query not in parse_qs(query_string.decode("latin-1")):
+            return None
+    return policy
+
+
+def client_ip(scope) -> str:
+    """The socket peer, or with RATE_LIMIT_PROXY_HOPS the address the outermost trusted proxy saw."""
+    global _forwarded_for_warned
+    hops = settings.RATE_LIMIT_PROXY_HOPS
+    for name, value in scope["headers"]:
+        if name != b"x-forwarded-for":
+            continue
+        if hops > 0:
+            chain = [part.strip() for part in value.decode("latin-1").split(",") if part.strip()]
+            if chain:
+                return chain[max(0, len(chain) - hops)]
+        elif not _forwarded_for_warned:
+            _forwarded_for_warned = True
+            logger.warning(
+                "X-Forwarded-For received with RATE_LIMIT_PROXY_HOPS=0: rate limits count every client "
+                "behind the proxy as one. Set it to the number of proxies in front of the app."
+            )
+        break
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _identity(policy: Policy, scope) -> str:
+    if policy.key == "user":
+        request = Request(scope)
+        token = request.cookies.get(settings.COOKIE_ACCESS_TOKEN_NAME)
+        if not token:
+            auth = request.headers.get("authorization", "")
+            token = auth[7:].strip() if auth.startswith("Bearer ") else None
+        # Signature and expiry only (no revocation lookup): enough to pick whose budget to charge
+        payload = security.decode_token(token) if token else None
+        if payload and payload.get("type") == security.TOKEN_TYPE_ACCESS and payload.get("sub"):
+            return f"u:{payload['sub']}"
+    return f"ip:{client_ip(scope)}"
+
+
+def _sliding_window(state: list, limit: int, window: float, now: float) -> float:
+    """state: [window index, count in it, count in the one before]. Mirrors _SLIDING_WINDOW."""
+    index = int(now // window)
+    if state[0] != index:
+        state[:] = [index, 0, state[1] if state[0] == index - 1 else 0]
+    elapsed = now - index * window
+    current, previous = state[1], state[2]
+    if current + 1 > limit:
+        return window - elapsed
+    if previous * (window - elapsed) / window + current + 1 > limit:
+        return (1 - (limit - 1 - current) / previous) * window - elapsed
+    state[1] += 1
+    return 0.0
+
+
+def _token_bucket(state: list, capacity: int, rate: float, now: float) -> float:
+    """state: [tokens, last refill]. Mirrors _TOKEN_BUCKET."""
+    tokens = min(capacity, state[0] + max(0.0, now - state[1]) * rate)
+    state[1] = now
+    if tokens < 1:
+        state[0] = tokens
+        return (1 - tokens) / rate
+    state[0] = tokens - 1
+    return 0.0
+
+
+def _hit_in_memory(policy: Policy, identity: str, now: float) -> float:
+    key = f"{policy.name}:{identity}"
+    state = _in_memory_store.pop(key, None)
+    if state is None:
+        state = [-1, 0, 0] if policy.algorithm == SLIDING_WINDOW else [float(policy.limit), now]
+        while len(_in_memory_store) >= settings.RATE_LIMIT_MEMORY_KEYS:
+            del _in_memory_store[next(iter(_in_memory_store))]
+    _in_memory_store[key] = state
+    if policy.algorithm == SLIDING_WINDOW:
+        return _sliding_window(state, policy.limit, policy.window, now)
+    return _token_bucket(state, policy.limit, policy.limit / policy.window, now)
+
+
+async def _hit_redis(redis, policy: Policy, identity: str, now: float) -> float:
+    source = _SLIDING_WINDOW if policy.algorithm == SLIDING_WINDOW else _TOKEN_BUCKET
+    script = _scripts.get(source)
+    if script is None:
+        # EVALSHA, loading the script only when the server does not have it yet
+        script = _scripts[source] = redis.register_script(source)
+    # Hash tag keeps one client's keys in the same cluster slot
+    base = f"{RATE_LIMIT_KEY_PREFIX}{{{policy.name}:{identity}}}"
+    if policy.algorithm == SLIDING_WINDOW:
+        index = int(now // policy.window)
+        keys = [f"{base}:{index}", f"{base}:{index - 1}"]
+        args = [policy.limit, policy.window, now - index * policy.window]
+    else:
+        keys = [base]
+        args = [policy.limit, policy.limit / policy.window, now]
+    return float(await script(keys=keys, args=args, client=redis))
+
+
+async def hit(policy: Policy, identity: str) -> float:
+    """Count one request; 0 if it is allowed, else the seconds until it would be."""
+    global _redis_failing
+    now = time.time()
+    redis = _get_redis()
+    if redis:
+        try:
+            retry_after = await _hit_redis(redis, policy, identity, now)
+            _redis_failing = False
+            return retry_after
+        except Exception as e:
+            if not _redis_failing:
+                logger.warning("Rate limiting from process memory, Redis failed: %s", e)
+            _redis_failing = True
+    return _hit_in_memory(policy, identity, now)
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware: answer 429 with Retry-After when the request's policy is exhausted.
+    Requests no policy matches pass straight through. Add it inside CORSMiddleware so browsers
+    can read the 429.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        policy = match_policy(scope["method"], scope["path"], scope.get("query_string", b""))
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+        retry_after = await hit(policy, _identity(policy, scope))
+        if retry_after <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.inc((policy.name,))
+        body = json.dumps({"detail": "Too many requests, please try again later."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,36 @@
+"""Shared async Redis client. Commands are timed into the redis_command_duration_seconds histogram."""
+import time
+
+from app.core.config import settings
+from app.core.metrics import REDIS_ERRORS, REDIS_LATENCY
+
+_redis_client = None
+
+
+def _instrumented_client_class():
+    import redis.asyncio as redis
+
+    class InstrumentedRedis(redis.Redis):
+        async def execute_command(self, *args, **options):
+            command = str(args[0]).upper() if args else "UNKNOWN"
+            start = time.perf_counter()
+            try:
+                return await super().execute_command(*args, **options)
+            except Exception:
+                REDIS_ERRORS.inc((command,))
+                raise
+            finally:
+                REDIS_LATENCY.observe(time.perf_counter() - start, (command,))
+
+    return InstrumentedRedis
+
+
+def get_redis():
+    """Return the process-wide Redis client, or None if the redis package/URL is unusable."""
+    global _redis_client
+    if _redis_client is None:
+        try:
+            _redis_client = _instrumented_client_class().from_url(settings.REDIS_URL)
+        except Exception:
+            _redis_client = False  # Mark as failed
+    return _redis_client if _redis_client else None
@@ -1,10 +1,24 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union, Optional
+from typing import Any, Union, Optional, Tuple
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_IN_FLIGHT, PASSWORD_HASH_QUEUE_DEPTH
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Hashes made with other parameters still verify; needs_update() flags them for rehashing
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# argon2 releases the GIL while hashing, so threads keep it off the event loop; the pool bounds
+# how many hashes (and their memory) run at once, the rest wait in its queue
+_hash_executor: Optional[ThreadPoolExecutor] = None
 
 ALGORITHM = "HS256"
 TOKEN_TYPE_ACCESS = "access"
@@ -43,8 +57,40 @@ def verify_refresh_token(token: str) -> Optional[str]:
         return None
     return payload.get("sub")
 
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.PASSWORD_HASH_WORKERS), thread_name_prefix="password-hash"
+        )
+    return _hash_executor
+
+def _queued_hashes():
+    return [((), _hash_executor._work_queue.qsize() if _hash_executor else 0)]
+
+PASSWORD_HASH_QUEUE_DEPTH.set_function(_queued_hashes)
+
+async def _run_hashing(fn, *args):
+    PASSWORD_HASH_IN_FLIGHT.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        PASSWORD_HASH_IN_FLIGHT.dec()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Blocking; for scripts. Request handlers use check_password / verify_and_update."""
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
+    """Blocking; for scripts. Request handlers use hash_password."""
     return pwd_context.hash(password)
+
+async def hash_password(password: str) -> str:
+    return await _run_hashing(pwd_context.hash, password)
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash): new_hash is set when the stored hash used other ARGON2_* parameters."""
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
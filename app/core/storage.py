@@ -1,12 +1,19 @@
 import os
-import io
-import uuid
+import hashlib
+import tempfile
 from pathlib import Path
 from typing import Optional
 from fastapi import UploadFile, HTTPException
-from PIL import Image
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 import aiofiles
 
+from app.core.lazy import lazy_import
+from app.core.storage_backend import get_storage
+
+# Pillow is only needed when an upload is validated
+Image = lazy_import("PIL.Image")
+
 # Allowed image MIME types
 ALLOWED_IMAGE_TYPES = {
     "image/jpeg": ".jpg",
@@ -28,18 +35,48 @@ MAX_FILE_SIZE = 1024 * 1024  # 1MB in bytes
 MAX_FAVICON_SIZE = 512 * 1024  # 512KB for favicon
 MAX_LOGO_SIZE = 2 * 1024 * 1024  # 2MB for logo
 
+# Uploads are streamed in chunks of this size (never read whole into memory)
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
 # Base directory for uploads
 UPLOAD_DIR = Path("uploads")
+# Content-addressed store: uploads/blobs/<sha[:2]>/<sha256><ext>. Identical bytes share one
+# file and one URL; a name never changes content, so it can be cached forever.
+BLOBS_DIR = UPLOAD_DIR / "blobs"
+# In-progress uploads (same filesystem as BLOBS_DIR so the final move is an atomic rename)
+UPLOAD_TMP_DIR = UPLOAD_DIR / "tmp"
+# Legacy per-entity directories (files uploaded before the blob store)
 PRODUCT_IMAGES_DIR = UPLOAD_DIR / "products"
 SITE_ASSETS_DIR = UPLOAD_DIR / "site"
 CATEGORY_IMAGES_DIR = UPLOAD_DIR / "categories"
 PAGE_CONTENT_DIR = UPLOAD_DIR / "pages"
 
-# Ensure directories exist
-PRODUCT_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
-SITE_ASSETS_DIR.mkdir(parents=True, exist_ok=True)
-CATEGORY_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
-PAGE_CONTENT_DIR.mkdir(parents=True, exist_ok=True)
+_dirs_ready = False
+
+
+def _ensure_dirs() -> None:
+    """Create the upload directories on first save rather than at import time."""
+    global _dirs_ready
+    if _dirs_ready:
+        return
+    for directory in (BLOBS_DIR, UPLOAD_TMP_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+    _dirs_ready = True
+
+
+def is_blob_path(relative_path: str) -> bool:
+    """True for content-addressed paths, which may be shared by several rows."""
+    return relative_path.lstrip("/").replace("\\", "/").startswith(f"{BLOBS_DIR.as_posix()}/")
+
+
+def resolve_url(path: Optional[str]) -> Optional[str]:
+    """
+    Public URL for a stored upload path. Blobs resolve through the storage backend
+    (bucket/CDN URL for S3); legacy local paths and absolute URLs are returned unchanged.
+    """
+    if not path or "://" in path or not is_blob_path(path):
+        return path
+    return get_storage().get_url(path.lstrip("/"))
 
 
 def validate_image_file(file: UploadFile) -> None:
@@ -50,76 +87,99 @@ def validate_image_file(file: UploadFile) -> None:
             status_code=400,
             detail=f"Invalid file type. Allowed types: JPG, JPEG, PNG"
         )
-    
-    # Note: File size validation will be done when reading the file
-    # since UploadFile doesn't provide size directly
+
+    # Note: size is enforced while streaming in _store_blob
+
+
+def _verify_image(path: Path) -> None:
+    with Image.open(path) as image:
+        image.verify()
+
+
+async def _store_blob(file: UploadFile, ext: str, max_size: int, too_large_detail: str, verify_image: bool = True) -> str:
+    """
+    Stream an upload into the content-addressed store and return its key (relative path).
+
+    The body is hashed while it is copied to a local temp file in UPLOAD_CHUNK_SIZE chunks,
+    and rejected as soon as it exceeds max_size. If a blob with the same digest already
+    exists in the storage backend the temp file is discarded and the existing key is
+    returned (deduplication); otherwise the file is handed to the backend.
+    """
+    if file.size is not None and file.size > max_size:
+        raise HTTPException(status_code=400, detail=too_large_detail)
+
+    _ensure_dirs()
+    fd, tmp_name = tempfile.mkstemp(dir=UPLOAD_TMP_DIR, suffix=ext)
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(status_code=400, detail=too_large_detail)
+                digest.update(chunk)
+                await out.write(chunk)
+
+        if verify_image:
+            try:
+                await run_in_threadpool(_verify_image, tmp_path)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
+
+        sha = digest.hexdigest()
+        key = (BLOBS_DIR / sha[:2] / f"{sha}{ext}").as_posix()
+        backend = get_storage()
+        if not await backend.exists(key):
+            await backend.put(key, tmp_path, file.content_type)
+        elif backend.is_local:
+            # Reusing an existing blob: refresh its mtime so the upload GC's grace period
+            # protects it until the new row referencing it is committed
+            os.utime(backend.path(key))
+        return key
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
 
 async def save_product_image(file: UploadFile, product_id: int, variant_id: Optional[int] = None) -> str:
     """
     Save uploaded product image and return the file path.
-    
+
     Args:
         file: Uploaded file
         product_id: Product ID
         variant_id: Optional variant ID
-    
+
     Returns:
-        Relative file path from project root
+        Relative blob path (uploads/blobs/ab/<sha256>.jpg); the same image uploaded for
+        several products/variants is stored once and shares this path.
     """
-    # Validate file
     validate_image_file(file)
-    
-    # Read file content to check size
-    content = await file.read()
-    
-    # Check file size
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds 1MB limit. Current size: {len(content) / 1024:.2f}KB"
-        )
-    
-    # Validate it's actually an image
-    try:
-        image = Image.open(io.BytesIO(content))
-        image.verify()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
-    
-    # Generate unique filename
-    file_ext = ALLOWED_IMAGE_TYPES[file.content_type]
-    filename = f"{uuid.uuid4()}{file_ext}"
-    
-    # Create product-specific directory
-    product_dir = PRODUCT_IMAGES_DIR / str(product_id)
-    if variant_id:
-        product_dir = product_dir / "variants" / str(variant_id)
-    product_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Save file
-    file_path = product_dir / filename
-    async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(content)
-    
-    # Return relative path (for URL generation)
-    relative_path = f"uploads/products/{product_id}"
-    if variant_id:
-        relative_path += f"/variants/{variant_id}"
-    relative_path += f"/{filename}"
-    
-    return relative_path
+    return await _store_blob(
+        file,
+        ALLOWED_IMAGE_TYPES[file.content_type],
+        MAX_FILE_SIZE,
+        "File size exceeds 1MB limit",
+    )
 
 
 def get_image_url(relative_path: str, base_url: str = "/") -> str:
     """Convert relative file path to URL."""
     # Remove leading slash if present to avoid double slashes
-    relative_path = relative_path.lstrip('/')
-    return f"{base_url.rstrip('/')}/{relative_path.replace('\\', '/')}"
+    relative_path = relative_path.lstrip('/').replace('\\', '/')
+    return f"{base_url.rstrip('/')}/{relative_path}"
 
 
 async def delete_product_image(file_path: str) -> None:
-    """Delete product image file."""
+    """
+    Delete product image file.
+    Blob paths may be shared: only call this once no row references the path.
+    """
+    if is_blob_path(file_path):
+        await get_storage().delete(file_path.lstrip("/"))
+        return
     full_path = Path(file_path)
     if full_path.exists():
         full_path.unlink()
@@ -139,7 +199,7 @@ async def save_site_asset(file: UploadFile, asset_type: str) -> str:
         file: Uploaded file
         asset_type: "logo" or "favicon"
     Returns:
-        Relative path (e.g., uploads/site/logo_xxx.png)
+        Relative blob path (e.g., uploads/blobs/ab/<sha256>.png)
     """
     if asset_type not in ("logo", "favicon"):
         raise HTTPException(status_code=400, detail="asset_type must be 'logo' or 'favicon'")
@@ -148,44 +208,20 @@ async def save_site_asset(file: UploadFile, asset_type: str) -> str:
             status_code=400,
             detail="Invalid file type. Allowed: JPG, PNG, SVG, ICO"
         )
-    content = await file.read()
     max_size = MAX_LOGO_SIZE if asset_type == "logo" else MAX_FAVICON_SIZE
-    if len(content) > max_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds {max_size // 1024}KB limit"
-        )
     ext = ALLOWED_SITE_IMAGE_TYPES.get(file.content_type, ".png")
-    filename = f"{asset_type}_{uuid.uuid4()}{ext}"
-    file_path = SITE_ASSETS_DIR / filename
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
-    return f"uploads/site/{filename}"
+    # SVG/ICO are not Pillow-verifiable; site assets were never verified
+    return await _store_blob(file, ext, max_size, f"File size exceeds {max_size // 1024}KB limit", verify_image=False)
 
 
 async def save_content_image(file: UploadFile) -> str:
     """
     Save uploaded content/page image (for rich text editors).
-    Returns relative path (e.g., uploads/pages/uuid.jpg).
+    Returns relative blob path (e.g., uploads/blobs/ab/<sha256>.jpg).
     """
     validate_image_file(file)
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds 1MB limit. Current size: {len(content) / 1024:.2f}KB",
-        )
-    try:
-        image = Image.open(io.BytesIO(content))
-        image.verify()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
     ext = ALLOWED_IMAGE_TYPES.get(file.content_type, ".png")
-    filename = f"{uuid.uuid4()}{ext}"
-    file_path = PAGE_CONTENT_DIR / filename
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
-    return f"uploads/pages/{filename}"
+    return await _store_blob(file, ext, MAX_FILE_SIZE, "File size exceeds 1MB limit")
 
 
 async def delete_site_asset(relative_path: str) -> None:
@@ -202,27 +238,23 @@ async def save_category_image(file: UploadFile, category_id: int) -> str:
         file: Uploaded file
         category_id: Category ID
     Returns:
-        Relative path (e.g., uploads/categories/category_xxx.png)
+        Relative blob path (e.g., uploads/blobs/ab/<sha256>.png)
     """
     if file.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(
             status_code=400,
             detail="Invalid file type. Allowed: JPG, PNG"
         )
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds {MAX_FILE_SIZE // 1024}KB limit"
-        )
-    try:
-        image = Image.open(io.BytesIO(content))
-        image.verify()
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
     ext = ALLOWED_IMAGE_TYPES.get(file.content_type, ".png")
-    filename = f"category_{category_id}_{uuid.uuid4()}{ext}"
-    file_path = CATEGORY_IMAGES_DIR / filename
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
-    return f"uploads/categories/{filename}"
+    return await _store_blob(file, ext, MAX_FILE_SIZE, f"File size exceeds {MAX_FILE_SIZE // 1024}KB limit")
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed blobs: names never change content, so cache forever."""
+
+    CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = self.CACHE_CONTROL
+        return response
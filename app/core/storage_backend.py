@@ -0,0 +1,197 @@
+"""
+Pluggable object storage for uploaded files.
+
+Keys are the relative paths already stored in the database ("uploads/blobs/ab/<sha>.jpg"),
+so switching STORAGE_BACKEND does not require rewriting rows:
+
+- "local" (default): files live under the app's working directory and are served by the
+  /uploads mounts in app.main.
+- "s3": any S3-compatible store (AWS S3, MinIO, R2...). boto3 is imported on first use
+  and its blocking calls run in the threadpool. Image traffic is then served by the bucket
+  or a CDN in front of it (STORAGE_PUBLIC_URL) instead of the API workers.
+
+Only content-addressed blobs go through the backend; legacy uuid-named uploads stay on the
+local disk and keep their relative URLs.
+"""
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import aiofiles
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.lazy import lazy_import
+
+boto3 = lazy_import("boto3")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class StorageBackend(ABC):
+    """Object storage addressed by relative key (e.g. "uploads/blobs/ab/<sha>.jpg")."""
+
+    is_local: bool = False
+
+    @abstractmethod
+    async def put(self, key: str, source: Path, content_type: Optional[str] = None) -> None:
+        """Store the file at `source` under `key`. The source file may be moved or consumed."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete `key`; missing keys are ignored."""
+
+    @abstractmethod
+    def get_url(self, key: str) -> str:
+        """URL the client should fetch `key` from."""
+
+    @abstractmethod
+    def open(self, key: str) -> AsyncIterator[bytes]:
+        """Stream the object's bytes in chunks. Raises FileNotFoundError for missing keys."""
+
+
+class LocalStorage(StorageBackend):
+    """Files under `root` (the working directory by default), served by app.main's mounts."""
+
+    is_local = True
+
+    def __init__(self, root: str = ".", public_url: str = ""):
+        self.root = Path(root)
+        self.public_url = public_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    async def put(self, key: str, source: Path, content_type: Optional[str] = None) -> None:
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Atomic when source is on the same filesystem (uploads/tmp); copies otherwise
+        await run_in_threadpool(shutil.move, os.fspath(source), os.fspath(target))
+
+    async def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    async def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def get_url(self, key: str) -> str:
+        # Without STORAGE_PUBLIC_URL keep the relative path: the frontend prepends API_URL
+        return f"{self.public_url}/{key}" if self.public_url else key
+
+    async def open(self, key: str) -> AsyncIterator[bytes]:
+        async with aiofiles.open(self.path(key), "rb") as f:
+            while chunk := await f.read(READ_CHUNK_SIZE):
+                yield chunk
+
+
+class S3Storage(StorageBackend):
+    """S3-compatible bucket. Objects are public-read via the bucket policy or a CDN."""
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        public_url: str = "",
+    ):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url or None
+        self.region = region or None
+        self.access_key_id = access_key_id or None
+        self.secret_access_key = secret_access_key or None
+        if public_url:
+            self.public_url = public_url.rstrip("/")
+        elif self.endpoint_url:
+            self.public_url = f"{self.endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.public_url = f"https://{bucket}.s3.amazonaws.com"
+        self._client = None
+
+    @property
+    def client(self):
+        # boto3 clients are thread-safe; build one lazily and share it across threadpool calls
+        if self._client is None:
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                region_name=self.region,
+                aws_access_key_id=self.access_key_id,
+                aws_secret_access_key=self.secret_access_key,
+            )
+        return self._client
+
+    async def put(self, key: str, source: Path, content_type: Optional[str] = None) -> None:
+        extra = {"CacheControl": "public, max-age=31536000, immutable"}
+        if content_type:
+            extra["ContentType"] = content_type
+        await run_in_threadpool(self.client.upload_file, os.fspath(source), self.bucket, key, ExtraArgs=extra)
+
+    async def exists(self, key: str) -> bool:
+        def head() -> bool:
+            try:
+                self.client.head_object(Bucket=self.bucket, Key=key)
+                return True
+            except self.client.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    return False
+                raise
+
+        return await run_in_threadpool(head)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    def get_url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    async def open(self, key: str) -> AsyncIterator[bytes]:
+        def get():
+            try:
+                return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+            except self.client.exceptions.NoSuchKey:
+                raise FileNotFoundError(key)
+
+        body = await run_in_threadpool(get)
+        try:
+            while chunk := await run_in_threadpool(body.read, READ_CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide backend selected by STORAGE_BACKEND."""
+    global _backend
+    if _backend is None:
+        if settings.STORAGE_BACKEND == "s3":
+            _backend = S3Storage(
+                bucket=settings.S3_BUCKET,
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                region=settings.S3_REGION,
+                access_key_id=settings.S3_ACCESS_KEY_ID,
+                secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+                public_url=settings.STORAGE_PUBLIC_URL,
+            )
+        elif settings.STORAGE_BACKEND == "local":
+            _backend = LocalStorage(public_url=settings.STORAGE_PUBLIC_URL)
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r} (expected 'local' or 's3')")
+    return _backend
+
+
+def set_storage(backend: Optional[StorageBackend]) -> None:
+    """Override the backend (tests); None re-reads settings on next use."""
+    global _backend
+    _backend = backend
+
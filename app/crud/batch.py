@@ -0,0 +1,56 @@
+"""
+Bounded deletes for maintenance jobs: many short transactions instead of one long one, so
+purging a large backlog never holds row locks (or a MySQL table's gap locks) for long.
+"""
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def delete_in_batches(
+    db: AsyncSession,
+    model,
+    *criteria,
+    batch_size: int = 1000,
+) -> int:
+    """
+    DELETE FROM model WHERE id IN (SELECT id FROM (SELECT id ... WHERE criteria LIMIT n)),
+    committing after each batch until nothing matches. Returns the number of rows deleted.
+
+    The extra derived table is for MySQL, which rejects LIMIT in an IN subquery and a subquery
+    on the table being deleted from.
+    """
+    batch = select(model.id).filter(*criteria).limit(batch_size).subquery("batch")
+    stmt = delete(model).where(model.id.in_(select(batch.c.id))).execution_options(synchronize_session=False)
+    total = 0
+    while True:
+        deleted = (await db.execute(stmt)).rowcount
+        await db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+async def delete_ids_in_batches(
+    db: AsyncSession,
+    model,
+    *criteria,
+    before_delete: Optional[Callable[[List[int]], Awaitable[None]]] = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Like delete_in_batches, but selects each batch's ids first so before_delete(ids) can
+    remove dependent rows (e.g. child rows without ON DELETE CASCADE) in the same transaction.
+    """
+    total = 0
+    while True:
+        ids = list((await db.execute(select(model.id).filter(*criteria).limit(batch_size))).scalars())
+        if ids:
+            if before_delete is not None:
+                await before_delete(ids)
+            await db.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+            await db.commit()
+            total += len(ids)
+        if len(ids) < batch_size:
+            return total
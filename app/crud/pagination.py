@@ -0,0 +1,26 @@
+"""
+Keyset ("cursor") pagination. A cursor carries the sort key of the last row served; the next
+page is the rows after it in sort order, so each page is an index range scan however deep the
+client pages. This is unlike OFFSET, which reads and discards every earlier row.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Sequence
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque token for a row's sort key (ints, strings and datetimes)."""
+    plain = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(plain).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, types: Sequence[type]) -> List[Any]:
+    """The sort key in token, converted to types; ValueError if the token is not one of ours."""
+    try:
+        plain = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(plain, list) or len(plain) != len(types):
+            raise ValueError
+        return [datetime.fromisoformat(value) if kind is datetime else kind(value) for kind, value in zip(types, plain)]
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor") from None
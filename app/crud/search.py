@@ -0,0 +1,50 @@
+"""
+Admin search: substring matches that an index can serve, plus exact-match fast paths.
+
+Substring terms go through contains(). On PostgreSQL it is an ILIKE, which the pg_trgm GIN
+index on each searched column serves for terms of three or more characters. On MySQL it is
+a MATCH ... AGAINST phrase query over an n-gram FULLTEXT index on the same column set. Both
+kinds of index are created by migration d1e2f3a4b5c6 and are not declared on the models:
+create_all (tests, benchmarks) builds the plain schema. Other dialects fall back to ILIKE.
+
+The FULLTEXT indexes must be built without stopwords: the ngram parser drops every token that
+contains one, and the default list includes "a" and "i". The migration sets
+innodb_ft_enable_stopword=OFF for its session. Anything that rebuilds these indexes later,
+such as a table-rebuilding ALTER TABLE or OPTIMIZE TABLE, must do the same.
+
+Callers try the exact forms first, such as a numeric term as a primary key (as_id()), and
+only search substrings otherwise.
+"""
+from typing import Optional
+
+from sqlalchemy import ColumnElement, or_
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Shortest term an n-gram FULLTEXT index can match (MySQL's default ngram_token_size)
+MIN_NGRAM_TERM = 2
+
+
+def as_id(term: str) -> Optional[int]:
+    """The term as a primary key, if it is one (digits only)."""
+    term = term.strip()
+    return int(term) if term.isdigit() and len(term) <= 18 else None
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def contains(db: AsyncSession, term: str, *columns) -> ColumnElement[bool]:
+    """
+    Any of columns (all on one table) contains term, case-insensitively. On MySQL the
+    columns must be exactly those of one FULLTEXT index, in its order.
+    """
+    term = term.strip()
+    if db.get_bind().dialect.name == "mysql" and len(term) >= MIN_NGRAM_TERM:
+        # A quoted phrase: its n-grams must appear in sequence, i.e. the term as a substring
+        phrase = '"{}"'.format(term.replace('"', " "))
+        return mysql.match(*columns, against=phrase).in_boolean_mode()
+    pattern = _like_pattern(term)
+    return or_(*(column.ilike(pattern, escape="\\") for column in columns))
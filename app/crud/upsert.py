@@ -0,0 +1,112 @@
+"""
+INSERT ... ON CONFLICT for the dialects we run on: PostgreSQL (dev), MySQL (prod) and
+SQLite (tests and benchmarks). SQLAlchemy has a separate insert() per dialect, so callers
+build their statement through here instead of importing one directly.
+"""
+from typing import Iterable, List, Sequence, Union
+
+from sqlalchemy import Select, literal_column
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert, "mysql": mysql.insert}
+
+
+def _insert(db: AsyncSession, model, rows: Union[Select, List[dict]], columns: Sequence[str]):
+    dialect = db.get_bind().dialect.name
+    if dialect not in _INSERTS:
+        raise NotImplementedError(f"No upsert for dialect {dialect!r}")
+    stmt = _INSERTS[dialect](model)
+    stmt = stmt.from_select(list(columns), rows) if isinstance(rows, Select) else stmt.values(rows)
+    return dialect, stmt
+
+
+def _onupdate_values(table) -> dict:
+    """SET entries for columns with an onupdate (updated_at): ON CONFLICT / ON DUPLICATE KEY skip them."""
+    return {
+        column.name: column.onupdate.arg
+        for column in table.c
+        if column.onupdate is not None and column.onupdate.is_clause_element
+    }
+
+
+def insert_or_increment(
+    db: AsyncSession,
+    model,
+    rows: Union[Select, List[dict]],
+    *,
+    conflict_columns: Sequence[str],
+    increment_columns: Iterable[str],
+    columns: Sequence[str] = (),
+):
+    """
+    Insert rows, adding increment_columns onto the existing row when conflict_columns
+    (a unique constraint) already match one.
+
+    rows is either a list of value dicts or a SELECT whose columns line up with columns.
+    The conflict target must be unique within rows: PostgreSQL refuses to update the same
+    row twice in one statement. A SELECT needs a WHERE clause, which SQLite requires to
+    tell ON CONFLICT apart from a join constraint.
+    """
+    dialect, stmt = _insert(db, model, rows, columns)
+    table = model.__table__
+
+    if dialect == "mysql":
+        # VALUES(col) rather than the 8.0.20+ row alias, which MySQL rejects on INSERT ... SELECT
+        return stmt.on_duplicate_key_update({
+            **_onupdate_values(table),
+            **{name: table.c[name] + literal_column(f"VALUES({name})") for name in increment_columns},
+        })
+    return stmt.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={
+            **_onupdate_values(table),
+            **{name: table.c[name] + stmt.excluded[name] for name in increment_columns},
+        },
+    )
+
+
+def insert_or_update(
+    db: AsyncSession,
+    model,
+    rows: Union[Select, List[dict]],
+    *,
+    conflict_columns: Sequence[str],
+    update_columns: Iterable[str],
+    columns: Sequence[str] = (),
+):
+    """
+    Insert rows, overwriting update_columns of the existing row when conflict_columns
+    (a unique constraint) already match one. rows as for insert_or_increment.
+    """
+    dialect, stmt = _insert(db, model, rows, columns)
+    updated = _onupdate_values(model.__table__)
+    if dialect == "mysql":
+        return stmt.on_duplicate_key_update(
+            {**updated, **{name: literal_column(f"VALUES({name})") for name in update_columns}}
+        )
+    return stmt.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={**updated, **{name: stmt.excluded[name] for name in update_columns}},
+    )
+
+
+def insert_ignore(
+    db: AsyncSession,
+    model,
+    rows: Union[Select, List[dict]],
+    *,
+    conflict_columns: Sequence[str],
+    columns: Sequence[str] = (),
+):
+    """
+    Insert rows, skipping those whose conflict_columns (a unique constraint) already exist.
+    rows as for insert_or_increment. The result's rowcount is the number of rows inserted
+    (on PostgreSQL and SQLite; MySQL may also count the no-op updates of existing rows).
+    """
+    dialect, stmt = _insert(db, model, rows, columns)
+    if dialect == "mysql":
+        # A no-op update instead of INSERT IGNORE, which would also swallow foreign key errors
+        key = model.__table__.c[conflict_columns[0]]
+        return stmt.on_duplicate_key_update({key.name: key})
+    return stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
@@ -11,6 +11,7 @@ from app.models.order import Order
 from app.models.review import Review
 from app.models.user_group import UserGroup
 from app.models.permission import Permission
+from app.services.stats_service import stats_service
 from sqlalchemy import select
 
 logging.basicConfig(level=logging.INFO)
@@ -34,7 +35,9 @@ async def create_initial_data() -> None:
                 role="admin"
             )
             db.add(user)
+            await stats_service.record_user_created(db)
             await db.commit()
+            await stats_service.publish(db)
             logger.info("Superuser created")
         else:
             # Update password for existing superuser to ensure it matches CREDENTIALS.md
@@ -1,8 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
+from app.core.logging_config import RequestIdMiddleware, setup_logging
+from app.core.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render_metrics
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.storage import ImmutableStaticFiles
 from app.api.v1.api import api_router
+from app.api.v1.routers import image_resize
+
+setup_logging()
 
 # Disable OpenAPI docs in production when DEBUG is False
 _docs_url = None if (settings.is_production and not settings.DEBUG) else "/docs"
@@ -23,6 +30,9 @@ app = FastAPI(
     redoc_url=_redoc_url,
 )
 
+# Innermost: throttled requests never reach a route, and their 429 still gets CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 # CORS: use config (CORS_ORIGINS in .env; production should set exact frontend URL(s))
 app.add_middleware(
     CORSMiddleware,
@@ -33,12 +43,32 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+app.add_middleware(RequestIdMiddleware)
+
+# Outermost so latency covers CORS handling too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+# Short, CDN-friendly image URLs outside the versioned API: /img/{w}x{h}/{path}
+app.include_router(image_resize.router)
 
 # Mount static files for uploaded images and logo
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# check_dir=False: upload directories are created on first save, not at import time
+# Content-addressed blobs never change, so they are served with immutable cache headers
+if settings.STORAGE_BACKEND == "local":
+    app.mount("/uploads/blobs", ImmutableStaticFiles(directory="uploads/blobs", check_dir=False), name="upload-blobs")
+app.mount("/uploads", StaticFiles(directory="uploads", check_dir=False), name="uploads")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "app": settings.PROJECT_NAME}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint (per worker process)."""
+        return Response(content=await render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
@@ -15,6 +15,7 @@ from app.models.page import Page
 from app.models.contact_submission import ContactSubmission
 from app.models.newsletter_subscriber import NewsletterSubscriber
 from app.models.verification_otp import VerificationOtp
+from app.models.stats import DailySalesRollup, StatsCounter
 
 __all__ = [
     'User',
@@ -40,4 +41,6 @@ __all__ = [
     'ContactSubmission',
     'NewsletterSubscriber',
     'VerificationOtp',
+    'DailySalesRollup',
+    'StatsCounter',
 ]
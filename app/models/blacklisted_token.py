@@ -12,7 +12,7 @@ class BlacklistedToken(Base):
     
     token: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
     token_type: Mapped[str] = mapped_column(String(20), nullable=False)  # 'access' or 'refresh'
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
     blacklisted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
     __table_args__ = (
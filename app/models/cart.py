@@ -1,5 +1,5 @@
 from typing import List, Optional
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.models.base import Base
 
@@ -12,6 +12,9 @@ class Cart(Base):
     items: Mapped[List["CartItem"]] = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan", lazy="selectin")
 
 class CartItem(Base):
+    # One line per variant: add-to-cart and merges upsert onto it (app.crud.upsert)
+    __table_args__ = (UniqueConstraint("cart_id", "product_variant_id", name="uq_cartitem_cart_variant"),)
+
     cart_id: Mapped[int] = mapped_column(ForeignKey("cart.id"))
     product_variant_id: Mapped[int] = mapped_column(ForeignKey("productvariant.id"))
     quantity: Mapped[int] = mapped_column(Integer, default=1)
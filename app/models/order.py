@@ -1,7 +1,7 @@
 from typing import List, Optional, TYPE_CHECKING
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import ForeignKey, Numeric, String, Integer, JSON
+from sqlalchemy import ForeignKey, Index, Numeric, String, Integer, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import Base
 
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 
 class Order(Base):
     __tablename__ = "order"
+    # Range scans by date: admin order filters and the dashboard rollup reconciliation
+    __table_args__ = (Index("ix_order_created_at", "created_at"),)
 
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), index=True)
     order_number: Mapped[str] = mapped_column(String(8), unique=True, index=True)  # Unique 8-digit tracking ID
@@ -12,7 +12,8 @@ from sqlalchemy import (
     Float,
     JSON,
     DECIMAL,
-    DateTime
+    DateTime,
+    Index,
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.models.base import Base
@@ -53,6 +54,17 @@ class Product(Base):
     # Trending field
     is_trending: Mapped[bool] = mapped_column(Boolean, default=False)
     view_count: Mapped[int] = mapped_column(Integer, default=0)  # Track views for trending calculation
+
+    # Rating summary of approved reviews, kept current by app.services.review_service
+    rating_avg: Mapped[float] = mapped_column(DECIMAL(3, 2), default=0, server_default="0")  # 0 = no ratings
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    ratings_1: Mapped[int] = mapped_column(Integer, default=0, server_default="0")  # Histogram: reviews per star
+    ratings_2: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    ratings_3: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    ratings_4: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    ratings_5: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    __table_args__ = (Index("ix_product_rating", "rating_avg", "rating_count"),)  # sort=rating
     
     category: Mapped["Category"] = relationship("Category", back_populates="products")
     variants: Mapped[List["ProductVariant"]] = relationship("ProductVariant", back_populates="product", cascade="all, delete-orphan", lazy="selectin")
@@ -76,6 +88,8 @@ class ProductImage(Base):
     product_id: Mapped[Optional[int]] = mapped_column(ForeignKey("product.id"), nullable=True) # Fallback if image belongs to product generally
     url: Mapped[str] = mapped_column(String)
     is_main: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Resized WebP/JPEG renditions: {"webp": {"160": path, ...}, "jpeg": {...}} (see app.core.images)
+    derivatives: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     
     variant: Mapped[Optional["ProductVariant"]] = relationship("ProductVariant", back_populates="images")
     product: Mapped[Optional["Product"]] = relationship("Product", back_populates="images")
\ No newline at end of file
@@ -1,7 +1,8 @@
 from typing import Optional, TYPE_CHECKING
 from datetime import datetime
-from sqlalchemy import String, Integer, DECIMAL, Boolean, DateTime, ForeignKey
+from sqlalchemy import String, Integer, DECIMAL, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql.expression import false
 from app.models.base import Base
 
 if TYPE_CHECKING:
@@ -19,6 +20,7 @@ class PromoCode(Base):
     min_purchase_amount: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)
     max_discount_amount: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)
     usage_limit: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Total usage limit
+    once_per_user: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())  # One redemption per customer
     used_count: Mapped[int] = mapped_column(Integer, default=0)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     valid_from: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -30,6 +32,8 @@ class PromoCode(Base):
 
 class PromoCodeUsage(Base):
     __tablename__ = "promocodeusage"
+    # Who has used a code: once_per_user checks and the per-code user id set
+    __table_args__ = (Index("ix_promocodeusage_promo_code_user", "promo_code_id", "user_id"),)
     
     promo_code_id: Mapped[int] = mapped_column(ForeignKey("promocode.id"))
     user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("user.id"), nullable=True)
@@ -1,9 +1,15 @@
 from datetime import datetime, timezone
-from sqlalchemy import ForeignKey, Integer, String, Boolean, DateTime
+from sqlalchemy import ForeignKey, Index, Integer, String, Boolean, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import Base
 
 class Review(Base):
+    # Paginated product review listing: newest first, or by rating (app.services.review_service)
+    __table_args__ = (
+        Index("ix_review_product_approved_created", "product_id", "is_approved", "created_at"),
+        Index("ix_review_product_approved_rating", "product_id", "is_approved", "rating", "created_at"),
+    )
+
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), index=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("product.id"), index=True)
     rating: Mapped[int] = mapped_column(Integer) # 1-5
@@ -0,0 +1,27 @@
+"""Precomputed figures for the admin dashboard, kept current by app.services.stats_service."""
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class DailySalesRollup(Base):
+    """Orders and revenue (paid/shipped/delivered/completed orders) by UTC day of order creation."""
+
+    __tablename__ = "daily_sales_rollup"
+
+    day: Mapped[date] = mapped_column(Date, unique=True, index=True)
+    order_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    revenue: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0, server_default="0")
+
+
+class StatsCounter(Base):
+    """Running totals by name: "users", "orders", "revenue"."""
+
+    __tablename__ = "stats_counter"
+
+    name: Mapped[str] = mapped_column(String(50), unique=True, index=True)
+    value: Mapped[Decimal] = mapped_column(Numeric(16, 2), default=0, server_default="0")
@@ -13,4 +13,4 @@ class VerificationOtp(Base):
 
     email: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     otp: Mapped[str] = mapped_column(String(10), nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,5 +1,5 @@
 from typing import List
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.models.base import Base
 
@@ -11,6 +11,8 @@ class Wishlist(Base):
     items: Mapped[List["WishlistItem"]] = relationship("WishlistItem", back_populates="wishlist", cascade="all, delete-orphan", lazy="selectin")
 
 class WishlistItem(Base):
+    __table_args__ = (UniqueConstraint("wishlist_id", "product_variant_id", name="uq_wishlistitem_wishlist_variant"),)
+
     wishlist_id: Mapped[int] = mapped_column(ForeignKey("wishlist.id"))
     product_variant_id: Mapped[int] = mapped_column(ForeignKey("productvariant.id"))
     
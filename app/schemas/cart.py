@@ -1,5 +1,6 @@
 from typing import List, Optional
-from pydantic import ConfigDict, UUID4
+from decimal import Decimal
+from pydantic import ConfigDict, Field, UUID4
 from app.schemas.product import ProductVariant, ProductImage
 from pydantic import BaseModel
 
@@ -35,6 +36,25 @@ class CartItem(CartItemBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+# Server-side totals (app.services.pricing_service); clients display these instead of recomputing
+class CartQuoteLine(BaseModel):
+    product_variant_id: int
+    quantity: int
+    unit_price: Decimal  # list price
+    effective_price: Decimal  # after an active flash deal or product discount
+    line_total: Decimal
+
+class CartQuote(BaseModel):
+    version: str  # changes whenever lines, quantities or prices change; send back as OrderCreate.cart_version
+    lines: List[CartQuoteLine] = []
+    subtotal: Decimal  # at list prices
+    item_discount: Decimal  # flash deals and product discounts
+    promo_code: Optional[str] = None
+    promo_discount: Decimal = Decimal("0.00")
+    promo_message: Optional[str] = None
+    total: Decimal
+    promo_code_id: Optional[int] = Field(default=None, exclude=True)
+
 class CartBase(BaseModel):
     session_id: Optional[str] = None
 
@@ -45,5 +65,6 @@ class Cart(CartBase):
     id: int = 0
     user_id: Optional[int] = None
     items: List[CartItem] = []
+    quote: Optional[CartQuote] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -49,6 +49,8 @@ class OrderCreate(OrderBase):
     payment_method_id: Optional[str] = None
     # Optional voucher/promo code (validated server-side)
     promo_code: Optional[str] = None 
+    # Cart.quote.version the customer saw; the order is refused if the cart or its prices changed since
+    cart_version: Optional[str] = None
 
 class OrderUpdate(BaseModel):
     status: str 
@@ -1,8 +1,11 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_serializer, field_validator
 from decimal import Decimal
 
+from app.core.images import build_srcset
+from app.core.storage import resolve_url
+
 # --- Product Image ---
 class ProductImageBase(BaseModel):
     url: str
@@ -15,6 +18,25 @@ class ProductImage(ProductImageBase):
     id: int
     product_id: Optional[int]
     variant_id: Optional[int]
+    # {"webp": {"160": path, "480": path, "1024": path}, "jpeg": {...}}; None for images uploaded before derivatives
+    derivatives: Optional[Dict[str, Dict[str, str]]] = None
+
+    @computed_field
+    @property
+    def srcset(self) -> Dict[str, str]:
+        """Per-format srcset strings ("url 160w, url 480w, ..."), resolved like url."""
+        return build_srcset(self.derivatives)
+
+    # Stored keys -> public URLs via the storage backend (unchanged for local storage by default)
+    @field_serializer("url")
+    def serialize_url(self, url: str) -> str:
+        return resolve_url(url)
+
+    @field_serializer("derivatives")
+    def serialize_derivatives(self, derivatives: Optional[Dict[str, Dict[str, str]]]) -> Optional[Dict[str, Dict[str, str]]]:
+        if not derivatives:
+            return derivatives
+        return {fmt: {width: resolve_url(key) for width, key in renditions.items()} for fmt, renditions in derivatives.items()}
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -82,6 +104,20 @@ class Product(ProductBase):
     slug: str
     variants: List[ProductVariant] = []
     images: List[ProductImage] = []
+    # Approved reviews; rating_avg is 0 while rating_count is 0
+    rating_avg: Decimal = Decimal(0)
+    rating_count: int = 0
+    ratings_1: int = Field(0, exclude=True)
+    ratings_2: int = Field(0, exclude=True)
+    ratings_3: int = Field(0, exclude=True)
+    ratings_4: int = Field(0, exclude=True)
+    ratings_5: int = Field(0, exclude=True)
+
+    @computed_field
+    @property
+    def rating_histogram(self) -> Dict[str, int]:
+        """Approved reviews per star: {"1": n, ..., "5": n}."""
+        return {str(star): getattr(self, f"ratings_{star}") for star in range(1, 6)}
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -104,6 +140,10 @@ class Category(CategoryBase):
     slug: str
     subcategories: List["Category"] = []
 
+    @field_serializer("image_url")
+    def serialize_image_url(self, image_url: Optional[str]) -> Optional[str]:
+        return resolve_url(image_url)
+
     model_config = ConfigDict(from_attributes=True)
 
 Category.model_rebuild()
@@ -12,6 +12,7 @@ class PromoCodeBase(BaseModel):
     min_purchase_amount: Optional[Decimal] = None
     max_discount_amount: Optional[Decimal] = None
     usage_limit: Optional[int] = None
+    once_per_user: bool = False
     is_active: bool = True
     valid_from: datetime
     valid_until: datetime
@@ -31,8 +32,18 @@ class PromoCodeBase(BaseModel):
         return v
 
 
+def _check_usage_limit(v: Optional[int]) -> Optional[int]:
+    # None is unlimited; 0 would be a code nobody can redeem
+    if v is not None and v < 1:
+        raise ValueError('usage_limit must be at least 1 (leave it empty for no limit)')
+    return v
+
+
 class PromoCodeCreate(PromoCodeBase):
-    pass
+    @field_validator('usage_limit')
+    @classmethod
+    def usage_limit_positive(cls, v: Optional[int]) -> Optional[int]:
+        return _check_usage_limit(v)
 
 
 class PromoCodeUpdate(BaseModel):
@@ -43,10 +54,16 @@ class PromoCodeUpdate(BaseModel):
     min_purchase_amount: Optional[Decimal] = None
     max_discount_amount: Optional[Decimal] = None
     usage_limit: Optional[int] = None
+    once_per_user: Optional[bool] = None
     is_active: Optional[bool] = None
     valid_from: Optional[datetime] = None
     valid_until: Optional[datetime] = None
 
+    @field_validator('usage_limit')
+    @classmethod
+    def usage_limit_positive(cls, v: Optional[int]) -> Optional[int]:
+        return _check_usage_limit(v)
+
 
 class PromoCode(PromoCodeBase):
     id: int
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -34,3 +34,19 @@ class ReviewOut(ReviewBase):
     product: Optional[ProductInfo] = None
     
     model_config = ConfigDict(from_attributes=True)
+
+
+# --- Public listing (GET /products/{slug}/reviews) ---
+class ReviewPublic(BaseModel):
+    """A review as shown on the product page: the author's display name only."""
+    id: int
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+    author_name: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ReviewPage(BaseModel):
+    items: List[ReviewPublic]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; None on the last page
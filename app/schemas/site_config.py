@@ -1,5 +1,7 @@
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_serializer
+
+from app.core.storage import resolve_url
 
 
 class SocialLinks(BaseModel):
@@ -25,6 +27,10 @@ class SiteConfigResponse(BaseModel):
 
     model_config = {"from_attributes": True}
 
+    @field_serializer("logo_url", "favicon_url")
+    def serialize_asset_url(self, url: Optional[str]) -> Optional[str]:
+        return resolve_url(url)
+
 
 class SiteConfigUpdate(BaseModel):
     site_title: Optional[str] = Field(None, max_length=255)
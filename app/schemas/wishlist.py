@@ -27,3 +27,7 @@ class Wishlist(WishlistBase):
     items: List[WishlistItem] = []
 
     model_config = ConfigDict(from_attributes=True)
+
+class WishlistIds(BaseModel):
+    """Wishlisted variant ids, for marking product grids without loading the wishlist."""
+    variant_ids: List[int] = []
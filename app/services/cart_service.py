@@ -1,11 +1,27 @@
-from typing import Optional
+from typing import Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Integer, case, delete, func, literal, select, update
 from sqlalchemy.orm import selectinload
 
+from app.core import guest_cart_store
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.crud.upsert import insert_or_increment
 from app.models.cart import Cart, CartItem
 from app.models.product import Product, ProductVariant
-from app.schemas.cart import CartItemCreate, CartItemUpdate
+from app.services.pricing_service import PRICING_COLUMNS, PricedLine, pricing_service
+from app.schemas.cart import (
+    Cart as CartSchema,
+    CartItem as CartItemSchema,
+    CartItemCreate,
+    CartItemUpdate,
+    ProductVariantWithProduct,
+)
+
+# variant_id -> variant with product and images, as rendered in cart responses
+variant_read_model: TTLCache[int, ProductVariantWithProduct] = TTLCache(
+    "cart_variant", ttl_seconds=settings.CART_READ_MODEL_TTL_SECONDS
+)
 
 class CartService:
     async def get_cart(self, db: AsyncSession, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Optional[Cart]:
@@ -30,120 +46,235 @@ class CartService:
         await db.refresh(cart)
         return cart
 
-    async def add_item(self, db: AsyncSession, variant_id: int, quantity: int, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Cart:
-        cart = await self.get_cart(db, user_id, session_id)
-        if not cart:
-            cart = await self.create_cart(db, user_id, session_id)
-            # Re-fetch with options/greenlet safe
-            stmt = select(Cart).filter(Cart.id == cart.id).options(selectinload(Cart.items).selectinload(CartItem.variant).selectinload(ProductVariant.product).selectinload(Product.images))
-            result = await db.execute(stmt)
-            cart = result.scalars().first()
-
-        # Check if item exists
-        existing_item = next((item for item in cart.items if item.product_variant_id == variant_id), None)
-        
-        if existing_item:
-            existing_item.quantity += quantity
-            db.add(existing_item)
-        else:
-            new_item = CartItem(cart_id=cart.id, product_variant_id=variant_id, quantity=quantity)
-            db.add(new_item)
-        
-        cart_id = cart.id 
+    # ---------- Cart responses from the variant read model ----------
+    # Mutations are single statements against cartitem; the response is one narrow
+    # SELECT of the cart's lines plus cached variant/product display data.
+
+    async def _variants(self, db: AsyncSession, variant_ids) -> Dict[int, ProductVariantWithProduct]:
+        """Variant + product + images for display, from the read model; misses are loaded in one query."""
+        variants = variant_read_model.get_many(variant_ids)
+        missing = [vid for vid in variant_ids if vid not in variants]
+        if missing:
+            stmt = select(ProductVariant).filter(ProductVariant.id.in_(missing)).options(
+                selectinload(ProductVariant.product).selectinload(Product.images)
+            )
+            for variant in (await db.execute(stmt)).scalars():
+                variants[variant.id] = ProductVariantWithProduct.model_validate(variant)
+                variant_read_model.set(variant.id, variants[variant.id])
+        return variants
+
+    async def _cart_response(
+        self,
+        db: AsyncSession,
+        cart_id: int,
+        lines,
+        priced,
+        user_id: Optional[int] = None,
+        session_id: Optional[str] = None,
+        promo_code: Optional[str] = None,
+    ) -> CartSchema:
+        """lines: (item_id, variant_id, quantity) in display order; priced: their PricedLines for the quote."""
+        lines = list(lines)
+        variants = await self._variants(db, [variant_id for _, variant_id, _ in lines])
+        owner = f"user:{user_id}" if user_id else f"session:{session_id}"
+        return CartSchema(
+            id=cart_id,
+            user_id=user_id,
+            session_id=session_id,
+            items=[
+                CartItemSchema(id=item_id, cart_id=cart_id, product_variant_id=vid, quantity=qty, variant=variants[vid])
+                for item_id, vid, qty in lines
+                if vid in variants  # variant deleted since it was added
+            ],
+            quote=await pricing_service.quote(db, priced, owner=owner, promo_code=promo_code, user_id=user_id),
+        )
+
+    async def get_user_cart(self, db: AsyncSession, user_id: int, promo_code: Optional[str] = None) -> CartSchema:
+        """The user's cart and its quote in one query (id 0 and no items if there is none yet)."""
+        stmt = (
+            select(Cart.id, CartItem.id, CartItem.product_variant_id, CartItem.quantity, *PRICING_COLUMNS)
+            .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+            .outerjoin(ProductVariant, ProductVariant.id == CartItem.product_variant_id)
+            .outerjoin(Product, Product.id == ProductVariant.product_id)
+            .filter(Cart.user_id == user_id)
+            .order_by(Cart.id, CartItem.id)
+        )
+        rows = (await db.execute(stmt)).all()
+        cart_id = rows[0][0] if rows else 0
+        rows = [row for row in rows if row[0] == cart_id and row[1] is not None]
+        priced = [PricedLine.from_row(row[2], row[3], row[4:]) for row in rows]
+        return await self._cart_response(
+            db,
+            cart_id,
+            [row[1:4] for row in rows],
+            [line for line in priced if line],
+            user_id=user_id,
+            promo_code=promo_code,
+        )
+
+    def _user_cart_id(self, user_id: int):
+        # Lowest id, matching get_user_cart, should a user ever have more than one cart row
+        return select(func.min(Cart.id)).filter(Cart.user_id == user_id).scalar_subquery()
+
+    async def _execute_write(self, db: AsyncSession, stmt) -> int:
+        """Run a Core-style write against cartitem; returns the affected row count."""
+        # No ORM state to synchronize: carts are never held in the session across these writes
+        result = await db.execute(stmt.execution_options(synchronize_session=False))
+        return result.rowcount
+
+    async def _ensure_user_cart_id(self, db: AsyncSession, user_id: int) -> int:
+        cart_id = (await db.execute(select(self._user_cart_id(user_id)))).scalar()
+        if cart_id is None:
+            cart = Cart(user_id=user_id)
+            db.add(cart)
+            await db.flush()
+            cart_id = cart.id
+        return cart_id
+
+    def _upsert_lines(self, db: AsyncSession, rows):
+        """INSERT (cart_id, product_variant_id, quantity) rows, adding onto existing lines (uq_cartitem_cart_variant)."""
+        return insert_or_increment(
+            db,
+            CartItem,
+            rows,
+            columns=["cart_id", "product_variant_id", "quantity"],
+            conflict_columns=["cart_id", "product_variant_id"],
+            increment_columns=["quantity"],
+        )
+
+    async def add_item(self, db: AsyncSession, variant_id: int, quantity: int, user_id: int) -> CartSchema:
+        """Add quantity to the user's line for variant_id, creating the line (and cart) if missing."""
+        # One upsert, so concurrent adds of the same variant cannot create duplicate lines
+        upsert = self._upsert_lines(
+            db,
+            select(Cart.id, literal(variant_id, Integer), literal(quantity, Integer))
+            .filter(Cart.id == self._user_cart_id(user_id)),
+        )
+        if not await self._execute_write(db, upsert):
+            # First item for this user: create the cart, then the same upsert finds it
+            await self._ensure_user_cart_id(db, user_id)
+            await self._execute_write(db, upsert)
         await db.commit()
-        
-        # Force strict reload to avoid stale identity map state
-        db.expire_all()
-        
-        stmt = select(Cart).filter(Cart.id == cart_id).options(selectinload(Cart.items).selectinload(CartItem.variant).selectinload(ProductVariant.product).selectinload(Product.images))
-        result = await db.execute(stmt)
-        return result.scalars().first()
+        return await self.get_user_cart(db, user_id)
 
-    async def remove_item(self, db: AsyncSession, item_id: int, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Optional[Cart]:
-        cart = await self.get_cart(db, user_id, session_id)
-        if not cart:
+    async def remove_item(self, db: AsyncSession, item_id: int, user_id: int) -> Optional[CartSchema]:
+        """Returns None if the item is not in the user's cart."""
+        removed = await self._execute_write(
+            db, delete(CartItem).filter(CartItem.id == item_id, CartItem.cart_id == self._user_cart_id(user_id))
+        )
+        if not removed:
             return None
-            
-        item = await db.get(CartItem, item_id)
-        if item and item.cart_id == cart.id:
-            await db.delete(item)
-            cart_id = cart.id
-            await db.commit()
-            
-            db.expire_all()
-            stmt = select(Cart).filter(Cart.id == cart_id).options(selectinload(Cart.items).selectinload(CartItem.variant).selectinload(ProductVariant.product).selectinload(Product.images))
-            result = await db.execute(stmt)
-            return result.scalars().first()
-        return None
-
-    async def update_item_quantity(self, db: AsyncSession, item_id: int, quantity: int, user_id: Optional[int] = None, session_id: Optional[str] = None) -> Optional[Cart]:
-        cart = await self.get_cart(db, user_id, session_id)
-        if not cart:
+        await db.commit()
+        return await self.get_user_cart(db, user_id)
+
+    async def update_item_quantity(self, db: AsyncSession, item_id: int, quantity: int, user_id: int) -> Optional[CartSchema]:
+        """Set an item's quantity (<= 0 removes it). Returns None if the item is not in the user's cart."""
+        if quantity <= 0:
+            return await self.remove_item(db, item_id, user_id)
+        updated = await self._execute_write(
+            db,
+            update(CartItem)
+            .filter(CartItem.id == item_id, CartItem.cart_id == self._user_cart_id(user_id))
+            .values(quantity=quantity),
+        )
+        if not updated:
             return None
+        await db.commit()
+        return await self.get_user_cart(db, user_id)
 
-        item = await db.get(CartItem, item_id)
-        if item and item.cart_id == cart.id:
-            if quantity <= 0:
-                await db.delete(item)
-            else:
-                item.quantity = quantity
-                db.add(item)
-            
-            cart_id = cart.id
-            await db.commit()
-            
-            db.expire_all()
-            stmt = select(Cart).filter(Cart.id == cart_id).options(selectinload(Cart.items).selectinload(CartItem.variant).selectinload(ProductVariant.product).selectinload(Product.images))
-            result = await db.execute(stmt)
-            return result.scalars().first()
-        return None
+    def invalidate_variants(self, *variant_ids: int) -> None:
+        """Call after changing a variant's price, stock or SKU."""
+        variant_read_model.invalidate(*variant_ids)
+
+    def invalidate_product(self, product_id: int) -> None:
+        """Call after changing a product's name, slug or images."""
+        variant_read_model.invalidate_where(lambda variant: variant.product_id == product_id)
+
+    # ---------- Guest carts (Redis, see app.core.guest_cart_store) ----------
+    # Guest cart items have no rows: their id is the variant id and cart_id is 0
+
+    async def _guest_cart(
+        self, db: AsyncSession, session_id: str, items: Dict[int, int], promo_code: Optional[str] = None
+    ) -> CartSchema:
+        """Build the same response shape as a SQL cart from {variant_id: quantity}."""
+        return await self._cart_response(
+            db,
+            0,
+            [(vid, vid, qty) for vid, qty in sorted(items.items())],
+            await pricing_service.priced_items(db, items),
+            session_id=session_id,
+            promo_code=promo_code,
+        )
+
+    async def get_guest_cart(self, db: AsyncSession, session_id: str, promo_code: Optional[str] = None) -> CartSchema:
+        return await self._guest_cart(db, session_id, await guest_cart_store.get_items(session_id), promo_code)
+
+    async def add_guest_item(self, db: AsyncSession, session_id: str, variant_id: int, quantity: int) -> Optional[CartSchema]:
+        """Returns None if the variant does not exist."""
+        if not await self._variants(db, [variant_id]):
+            return None
+        items = await guest_cart_store.add_item(session_id, variant_id, quantity)
+        return await self._guest_cart(db, session_id, items)
+
+    async def update_guest_item(self, db: AsyncSession, session_id: str, variant_id: int, quantity: int) -> Optional[CartSchema]:
+        """Set (or at <= 0 remove) a guest item. Returns None if it is not in the cart."""
+        if variant_id not in await guest_cart_store.get_items(session_id):
+            return None
+        items = await guest_cart_store.set_quantity(session_id, variant_id, quantity)
+        return await self._guest_cart(db, session_id, items)
+
+    async def remove_guest_item(self, db: AsyncSession, session_id: str, variant_id: int) -> Optional[CartSchema]:
+        return await self.update_guest_item(db, session_id, variant_id, 0)
+
+    async def materialize_guest_cart(self, db: AsyncSession, session_id: str, user_id: int) -> bool:
+        """
+        Move a guest cart into the user's SQL cart (on login/merge and at checkout).
+        Combines quantities for variants already in the user cart. Returns False if there was nothing to move.
+        """
+        items = await guest_cart_store.get_items(session_id)
+        if not items:
+            return False
+        cart_id = await self._ensure_user_cart_id(db, user_id)
+        # One INSERT ... SELECT for the whole cart; selecting from productvariant skips deleted variants
+        await self._execute_write(
+            db,
+            self._upsert_lines(
+                db,
+                select(
+                    literal(cart_id, Integer),
+                    ProductVariant.id,
+                    case(items, value=ProductVariant.id, else_=0),
+                ).filter(ProductVariant.id.in_(items)),
+            ),
+        )
+        await db.commit()
+        # Cleared only once the rows are committed, so a failed merge keeps the guest cart
+        await guest_cart_store.clear(session_id)
+        return True
 
-    async def merge_carts(self, db: AsyncSession, session_id: str, user_id: int) -> Cart:
+    async def merge_carts(self, db: AsyncSession, session_id: str, user_id: int) -> CartSchema:
         """
         Merge session cart into user cart.
         Combines quantities for matching items, moves unique items to user cart.
+        Covers the Redis guest cart and SQL session carts created before guest carts moved to Redis.
         """
-        # Get carts with items loaded
-        user_cart = await self.get_cart(db, user_id=user_id)
-        session_cart = await self.get_cart(db, session_id=session_id)
-        
-        if not session_cart or not session_cart.items:
-            # No session cart or empty session cart
-            if not user_cart:
-                user_cart = await self.create_cart(db, user_id=user_id)
-            return user_cart
-
-        if not user_cart:
-            # If user has no cart, just assign the session cart to user and clear session_id
-            session_cart.user_id = user_id
-            session_cart.session_id = None
-            db.add(session_cart)
+        await self.materialize_guest_cart(db, session_id, user_id)
+
+        session_cart_id = (await db.execute(select(Cart.id).filter(Cart.session_id == session_id))).scalar()
+        if session_cart_id is not None:
+            cart_id = await self._ensure_user_cart_id(db, user_id)
+            # The whole merge is one statement however many lines the session cart has
+            await self._execute_write(
+                db,
+                self._upsert_lines(
+                    db,
+                    select(literal(cart_id, Integer), CartItem.product_variant_id, CartItem.quantity)
+                    .filter(CartItem.cart_id == session_cart_id),
+                ),
+            )
+            await self._execute_write(db, delete(CartItem).filter(CartItem.cart_id == session_cart_id))
+            await self._execute_write(db, delete(Cart).filter(Cart.id == session_cart_id))
             await db.commit()
-            await db.refresh(session_cart)
-            # Reload with relationships
-            return await self.get_cart(db, user_id=user_id)
-        
-        # Merge items: combine quantities for matching variants, move unique items
-        user_item_map = {item.product_variant_id: item for item in user_cart.items}
-        
-        for s_item in list(session_cart.items):  # Use list() to avoid modification during iteration
-            if s_item.product_variant_id in user_item_map:
-                # Item exists in user cart - merge quantities
-                u_item = user_item_map[s_item.product_variant_id]
-                u_item.quantity += s_item.quantity
-                db.add(u_item)
-                # Delete the session item
-                await db.delete(s_item)
-            else:
-                # Item doesn't exist in user cart - move it
-                s_item.cart_id = user_cart.id
-                db.add(s_item)
-        
-        # Delete the empty session cart
-        await db.delete(session_cart)
-        await db.commit()
-        
-        # Return refreshed user cart with all relationships
-        return await self.get_cart(db, user_id=user_id)
+        return await self.get_user_cart(db, user_id)
 
 cart_service = CartService()
@@ -0,0 +1,67 @@
+"""
+Scheduled purge of rows nothing will read again (Celery beat, see app.worker.tasks):
+
+- guest SQL carts (and their items) untouched for GUEST_CART_TTL_DAYS. Guest carts live in
+  Redis now and expire there after the same period; these rows predate that or were left
+  behind by sessions that never logged in;
+- verification OTPs past expires_at;
+- blacklisted tokens past expires_at (the token itself is rejected by its exp claim by then).
+
+Every table is purged in batches of MAINTENANCE_BATCH_SIZE, one short transaction each.
+"""
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.batch import delete_ids_in_batches
+from app.models.cart import Cart, CartItem
+from app.services import otp_service
+from app.services.token_service import token_service
+
+
+@dataclass
+class PurgeReport:
+    removed: Dict[str, int] = field(default_factory=dict)  # table -> rows deleted
+    skipped: bool = False  # another replica held the lock
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class MaintenanceService:
+    def _abandoned_cart_criteria(self, cutoff: datetime):
+        recent_item = exists().where(CartItem.cart_id == Cart.id, CartItem.updated_at >= cutoff)
+        return (Cart.user_id.is_(None), Cart.updated_at < cutoff, ~recent_item)
+
+    async def purge_abandoned_carts(self, db: AsyncSession, *, batch_size: int, now: datetime) -> Dict[str, int]:
+        cutoff = now - timedelta(days=settings.GUEST_CART_TTL_DAYS)
+        removed = {"cartitem": 0}
+
+        async def delete_items(cart_ids: List[int]) -> None:
+            result = await db.execute(
+                delete(CartItem).where(CartItem.cart_id.in_(cart_ids)).execution_options(synchronize_session=False)
+            )
+            removed["cartitem"] += result.rowcount
+
+        removed["cart"] = await delete_ids_in_batches(
+            db, Cart, *self._abandoned_cart_criteria(cutoff), before_delete=delete_items, batch_size=batch_size
+        )
+        return removed
+
+    async def purge_expired(
+        self, db: AsyncSession, *, batch_size: Optional[int] = None, now: Optional[datetime] = None
+    ) -> PurgeReport:
+        batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+        now = now or datetime.now(timezone.utc)
+        report = PurgeReport()
+        report.removed.update(await self.purge_abandoned_carts(db, batch_size=batch_size, now=now))
+        report.removed["verification_otp"] = await otp_service.delete_expired_otps_db(db, batch_size=batch_size)
+        report.removed["blacklisted_token"] = await token_service.cleanup_expired_tokens(db, batch_size=batch_size)
+        return report
+
+
+maintenance_service = MaintenanceService()
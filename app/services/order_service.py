@@ -1,17 +1,21 @@
+import logging
 import random
 import string
+from datetime import datetime, timezone
 from typing import List, Optional
-from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
+from app.crud.search import as_id, contains
 from app.models.order import Order, OrderItem
 
 # 8-char alphanumeric (uppercase + digits) for order_number
 ORDER_NUMBER_CHARS = string.ascii_uppercase + string.digits
 ORDER_NUMBER_LENGTH = 8
 
+logger = logging.getLogger(__name__)
+
 
 def _generate_order_number() -> str:
     return "".join(random.choices(ORDER_NUMBER_CHARS, k=ORDER_NUMBER_LENGTH))
@@ -20,7 +24,10 @@ from app.models.product import ProductVariant
 from app.models.address import Address
 from app.models.user import User
 from app.schemas.order import OrderCreate
+from app.services.cart_service import cart_service
+from app.services.pricing_service import pricing_service
 from app.services.promo_service import promo_code_service
+from app.services.stats_service import stats_service
 
 class OrderService:
     async def create_order(self, db: AsyncSession, user_id: int, order_in: OrderCreate) -> Order:
@@ -34,8 +41,16 @@ class OrderService:
         if not cart or not cart.items:
             raise ValueError("Cart is empty")
 
-        # 3. Calculate Total & Create Items
-        total_amount = Decimal("0.00")
+        # 2. Price the cart: reuses the quote the customer was shown while the cart version is unchanged
+        priced = await pricing_service.priced_cart(db, cart.id)
+        quote = await pricing_service.quote(
+            db, priced, owner=f"user:{user_id}", promo_code=order_in.promo_code, user_id=user_id
+        )
+        if order_in.cart_version and order_in.cart_version != quote.version:
+            raise ValueError("Cart has changed since it was quoted; please review the updated totals")
+        prices = {line.product_variant_id: line.effective_price for line in quote.lines}
+
+        # 3. Create Items
         order_items = []
         
         for item in cart.items:
@@ -43,42 +58,20 @@ class OrderService:
             if item.variant.stock_quantity < item.quantity:
                 raise ValueError(f"Insufficient stock for {item.variant.sku}")
             
-            item_total = item.variant.price * item.quantity
-            total_amount += item_total
-            
             order_item = OrderItem(
                 product_variant_id=item.variant.id,
                 quantity=item.quantity,
-                price_at_purchase=item.variant.price
+                price_at_purchase=prices[item.variant.id]
             )
             order_items.append(order_item)
             
             # Deduct stock (simple version, ideally reserve)
             item.variant.stock_quantity -= item.quantity
 
-        # Apply promo code if provided (validate server-side)
-        discount_amount = Decimal("0.00")
-        promo_code_id = None
-        if order_in.promo_code and order_in.promo_code.strip():
-            try:
-                validation = await promo_code_service.validate_promo_code(
-                    db, code=order_in.promo_code.strip(), total_amount=total_amount, user_id=user_id
-                )
-                if validation.valid and validation.discount_amount is not None:
-                    discount_amount = validation.discount_amount
-                    if validation.promo_code:
-                        promo_code_id = validation.promo_code.id
-                # If invalid, we proceed without discount (no error, ignore bad code)
-            except Exception as e:
-                # Log promo code validation error but don't fail the order
-                import logging
-                logging.getLogger(__name__).warning(f"Promo code validation error: {e}. Proceeding without discount.")
-                discount_amount = Decimal("0.00")
-                promo_code_id = None
-
-        final_amount = total_amount - discount_amount
-        if final_amount < 0:
-            final_amount = Decimal("0.00")
+        # An invalid promo code was dropped from the quote (no error, ignore bad code)
+        discount_amount = quote.promo_discount
+        promo_code_id = quote.promo_code_id
+        final_amount = quote.total
 
         # 4. Payment: COD skips Stripe; other methods use Stripe (or future Esewa/Khalti)
         payment_method = (order_in.payment_method or "cod").lower().strip()
@@ -129,6 +122,9 @@ class OrderService:
         order = Order(
             user_id=user_id,
             order_number=order_number,
+            # Set here, not by the server default: the dashboard stats read it right after the
+            # flush, and without INSERT ... RETURNING (MySQL) it would be unloaded there
+            created_at=datetime.now(timezone.utc),
             status="pending",
             total_amount=final_amount,
             shipping_address=shipping_address_data,
@@ -140,7 +136,27 @@ class OrderService:
             discount_amount=discount_amount if discount_amount > 0 else None,
         )
         db.add(order)
-        await db.commit()
+        # 7b. Count the promo use (conditional UPDATE) and record who used it in the order's
+        # transaction, so a second checkout by the same user cannot pass before the usage row exists
+        if promo_code_id is not None:
+            await db.flush()
+            if not await promo_code_service.redeem(db, promo_code_id, user_id=user_id):
+                await db.rollback()
+                raise ValueError("Promo code usage limit reached or already used")
+            promo_code_service.record_usage(
+                db, promo_code_id=promo_code_id, order_id=order.id,
+                discount_amount=discount_amount, user_id=user_id
+            )
+        await stats_service.record_order_created(db, order)
+        try:
+            await db.commit()
+        except Exception:
+            if promo_code_id is not None:
+                await promo_code_service.release(promo_code_id)
+            raise
+        if promo_code_id is not None:
+            promo_code_service.remember_user(promo_code_id, user_id)
+        await stats_service.publish(db)
         await db.refresh(order)
 
         # 4. Attach Items
@@ -152,14 +168,9 @@ class OrderService:
         for item in cart.items:
             await db.delete(item)
 
-        # 5b. Record promo usage if applied
-        if promo_code_id is not None and discount_amount > 0:
-            await promo_code_service.apply_promo_code(
-                db, promo_code_id=promo_code_id, order_id=order.id,
-                discount_amount=discount_amount, user_id=user_id
-            )
-            
         await db.commit()
+        # Stock changed: drop the cached cart display data for these variants
+        cart_service.invalidate_variants(*(item.product_variant_id for item in order_items))
         await db.refresh(order)
         
         # Re-fetch with items and variant.product for schema
@@ -200,8 +211,8 @@ class OrderService:
         date_to: Optional[str] = None,
         search: Optional[str] = None,
     ) -> List[Order]:
-        from datetime import datetime, timezone, timedelta
-        from sqlalchemy import or_, cast, String
+        from datetime import timedelta
+        from sqlalchemy import or_
         stmt = select(Order).options(
             self._order_load_options(),
             selectinload(Order.user),
@@ -209,13 +220,16 @@ class OrderService:
         if status and status.strip():
             stmt = stmt.filter(Order.status == status.strip())
         if search and search.strip():
-            term = f"%{search.strip()}%"
-            stmt = stmt.filter(
-                or_(
-                    Order.order_number.ilike(term),
-                    cast(Order.id, String).ilike(term),
-                )
-            )
+            term = search.strip()
+            order_id = as_id(term)
+            if order_id is not None or len(term) == ORDER_NUMBER_LENGTH:
+                # Exact lookups: the primary key and/or the unique order_number index
+                exact = [Order.order_number == term.upper()] if len(term) == ORDER_NUMBER_LENGTH else []
+                if order_id is not None:
+                    exact.append(Order.id == order_id)
+                stmt = stmt.filter(or_(*exact))
+            else:
+                stmt = stmt.filter(contains(db, term, Order.order_number))
         if date_from:
             try:
                 dt = datetime.fromisoformat(date_from.replace("Z", "+00:00"))
@@ -238,22 +252,28 @@ class OrderService:
         return result.scalars().all()
 
     async def delete_order(self, db: AsyncSession, order_id: int) -> bool:
-        result = await db.execute(select(Order).filter(Order.id == order_id))
+        # Row lock: the dashboard stats adjustment depends on the status read here
+        result = await db.execute(select(Order).filter(Order.id == order_id).with_for_update())
         order = result.scalars().first()
         if not order:
             return False
+        await stats_service.record_order_deleted(db, order)
         await db.delete(order)
         await db.commit()
+        await stats_service.publish(db)
         return True
 
     async def update_status(self, db: AsyncSession, order_id: int, status: str) -> Optional[Order]:
-        stmt = select(Order).filter(Order.id == order_id)
+        stmt = select(Order).filter(Order.id == order_id).with_for_update()
         result = await db.execute(stmt)
         order = result.scalars().first()
         if order:
+            old_status = order.status
             order.status = status
             db.add(order)
+            await stats_service.record_status_change(db, order, old_status)
             await db.commit()
+            await stats_service.publish(db)
             await db.refresh(order)
         return order
 
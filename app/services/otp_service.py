@@ -5,6 +5,7 @@ from typing import Optional
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.batch import delete_in_batches
 from app.models.verification_otp import VerificationOtp
 
 
@@ -43,3 +44,10 @@ async def get_and_delete_otp_db(db: AsyncSession, email: str) -> Optional[str]:
     await db.delete(row)
     await db.commit()
     return otp
+
+
+async def delete_expired_otps_db(db: AsyncSession, batch_size: int = 1000) -> int:
+    """Remove expired OTPs that were never used (in batches). Returns the number removed."""
+    return await delete_in_batches(
+        db, VerificationOtp, VerificationOtp.expires_at <= datetime.now(timezone.utc), batch_size=batch_size
+    )
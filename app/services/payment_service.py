@@ -1,10 +1,16 @@
-import stripe
 from app.core.config import settings
+from app.core.lazy import lazy_import
 
-stripe.api_key = settings.STRIPE_API_KEY
+
+def _configure_stripe(module) -> None:
+    module.api_key = settings.STRIPE_API_KEY
+
+
+# Imported on first payment call, not at app startup
+stripe = lazy_import("stripe", on_load=_configure_stripe)
 
 class PaymentService:
-    def create_payment_intent(self, amount: int, currency: str = "usd", metadata: dict = None) -> stripe.PaymentIntent:
+    def create_payment_intent(self, amount: int, currency: str = "usd", metadata: dict = None) -> "stripe.PaymentIntent":
         """
         Create a Stripe PaymentIntent.
         Amount is in cents.
@@ -20,7 +26,7 @@ class PaymentService:
         except stripe.error.StripeError as e:
             raise ValueError(f"Stripe Error: {str(e)}")
 
-    def construct_event(self, payload: bytes, sig_header: str) -> stripe.Event:
+    def construct_event(self, payload: bytes, sig_header: str) -> "stripe.Event":
         """
         Verify and construct webhook event.
         """
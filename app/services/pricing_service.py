@@ -0,0 +1,202 @@
+"""
+Cart quotes: subtotal, effective (flash deal / product discount) prices, promo discount and
+grand total, computed in one pass over the cart's lines and cached per cart version.
+
+The version hashes every line's quantity together with its pricing inputs (list price, flash
+deal and discount fields), so a price change yields a new version rather than needing an
+invalidation hook. Quotes expire early when a flash deal starts or ends, or the promo code
+lapses, before CART_QUOTE_TTL_SECONDS. Promo code edits and usage counts can be stale for
+up to that TTL; redemption itself is recorded at checkout.
+"""
+import hashlib
+import logging
+from dataclasses import astuple, dataclass
+from datetime import datetime, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.cart import CartItem
+from app.models.product import Product, ProductVariant
+from app.schemas.cart import CartQuote, CartQuoteLine
+from app.services.promo_service import promo_code_service
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+# Selected next to a cart's lines so pricing needs no query of its own (see PricedLine.from_row)
+PRICING_COLUMNS = (
+    ProductVariant.price,
+    Product.is_flash_deal,
+    Product.flash_deal_start,
+    Product.flash_deal_end,
+    Product.flash_deal_price,
+    Product.discount_percentage,
+    Product.discount_amount,
+)
+
+# (owner, cart version, promo code) -> quote
+quote_cache: TTLCache[Tuple[str, str, str], CartQuote] = TTLCache(
+    "cart_quote", ttl_seconds=settings.CART_QUOTE_TTL_SECONDS
+)
+
+
+def _money(value) -> Decimal:
+    return Decimal(value or 0).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _aware(dt: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes for DateTime(timezone=True) columns
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+@dataclass(frozen=True)
+class PricedLine:
+    variant_id: int
+    quantity: int
+    price: Decimal
+    is_flash_deal: bool = False
+    flash_deal_start: Optional[datetime] = None
+    flash_deal_end: Optional[datetime] = None
+    flash_deal_price: Optional[Decimal] = None
+    discount_percentage: Optional[Decimal] = None
+    discount_amount: Optional[Decimal] = None
+
+    @classmethod
+    def from_row(cls, variant_id: int, quantity: int, pricing) -> Optional["PricedLine"]:
+        """pricing: the PRICING_COLUMNS values; None when the variant no longer exists."""
+        price, is_flash_deal, start, end, flash_price, percentage, amount = pricing
+        if price is None:
+            return None
+        return cls(variant_id, quantity, price, bool(is_flash_deal), _aware(start), _aware(end), flash_price, percentage, amount)
+
+    def flash_deal_active(self, now: datetime) -> bool:
+        return (
+            self.is_flash_deal
+            and self.flash_deal_price is not None
+            and (self.flash_deal_start is None or self.flash_deal_start <= now)
+            and (self.flash_deal_end is None or now <= self.flash_deal_end)
+        )
+
+    def effective_price(self, now: datetime) -> Decimal:
+        price = _money(self.price)
+        if self.flash_deal_active(now):
+            return min(price, _money(self.flash_deal_price))
+        if self.discount_percentage:
+            price = price * (100 - Decimal(self.discount_percentage)) / 100
+        elif self.discount_amount:
+            price = price - Decimal(self.discount_amount)
+        return max(_money(price), ZERO)
+
+
+def cart_version(lines: Iterable[PricedLine]) -> str:
+    """Stable across line order; changes with any quantity or pricing input."""
+    digest = hashlib.sha1()
+    for line in sorted(lines, key=lambda line: line.variant_id):
+        digest.update(repr(astuple(line)).encode())
+    return digest.hexdigest()[:16]
+
+
+class PricingService:
+    async def priced_items(self, db: AsyncSession, items: Dict[int, int]) -> List[PricedLine]:
+        """Pricing for {variant_id: quantity} (guest carts) in one query; unknown variants are dropped."""
+        if not items:
+            return []
+        stmt = (
+            select(ProductVariant.id, *PRICING_COLUMNS)
+            .join(Product, Product.id == ProductVariant.product_id)
+            .filter(ProductVariant.id.in_(items))
+        )
+        return [PricedLine.from_row(row[0], items[row[0]], row[1:]) for row in (await db.execute(stmt)).all()]
+
+    async def priced_cart(self, db: AsyncSession, cart_id: int) -> List[PricedLine]:
+        """The cart's lines with pricing, in one query."""
+        stmt = (
+            select(CartItem.product_variant_id, CartItem.quantity, *PRICING_COLUMNS)
+            .join(ProductVariant, ProductVariant.id == CartItem.product_variant_id)
+            .join(Product, Product.id == ProductVariant.product_id)
+            .filter(CartItem.cart_id == cart_id)
+        )
+        return [PricedLine.from_row(row[0], row[1], row[2:]) for row in (await db.execute(stmt)).all()]
+
+    def _ttl(self, lines: List[PricedLine], now: datetime, promo_valid_until: Optional[datetime]) -> float:
+        """Seconds until the quote could change on its own: a deal boundary or promo expiry."""
+        boundaries = [dt for line in lines if line.is_flash_deal for dt in (line.flash_deal_start, line.flash_deal_end)]
+        boundaries.append(_aware(promo_valid_until))
+        upcoming = [(dt - now).total_seconds() for dt in boundaries if dt is not None and dt > now]
+        return min([settings.CART_QUOTE_TTL_SECONDS, *upcoming])
+
+    async def quote(
+        self,
+        db: AsyncSession,
+        lines: List[PricedLine],
+        *,
+        owner: str,
+        promo_code: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> CartQuote:
+        """
+        Quote for the given lines. owner scopes the cache (e.g. "user:7" or "session:<id>").
+        An invalid promo code is reported in promo_message and does not fail the quote.
+        """
+        code = (promo_code or "").strip().upper()
+        version = cart_version(lines)
+        key = (owner, version, code)
+        cached = quote_cache.get(key)
+        if cached is not None:
+            return cached
+
+        now = datetime.now(timezone.utc)
+        quote_lines = []
+        subtotal = discounted = ZERO
+        for line in sorted(lines, key=lambda line: line.variant_id):
+            unit_price, effective_price = _money(line.price), line.effective_price(now)
+            quote_lines.append(CartQuoteLine(
+                product_variant_id=line.variant_id,
+                quantity=line.quantity,
+                unit_price=unit_price,
+                effective_price=effective_price,
+                line_total=effective_price * line.quantity,
+            ))
+            subtotal += unit_price * line.quantity
+            discounted += effective_price * line.quantity
+
+        promo_discount, promo_message, promo_code_id, promo_valid_until = ZERO, None, None, None
+        if code and quote_lines:
+            try:
+                validation = await promo_code_service.validate_promo_code(
+                    db, code=code, total_amount=discounted, user_id=user_id
+                )
+                promo_message = validation.message
+                if validation.valid and validation.discount_amount is not None and validation.promo_code:
+                    promo_discount = _money(validation.discount_amount)
+                    promo_code_id = validation.promo_code.id
+                    promo_valid_until = validation.promo_code.valid_until
+            except Exception as e:
+                logger.warning("Promo code validation error: %s. Quoting without discount.", e)
+                promo_message = "Promo code could not be applied"
+
+        quote = CartQuote(
+            version=version,
+            lines=quote_lines,
+            subtotal=subtotal,
+            item_discount=subtotal - discounted,
+            promo_code=code or None,
+            promo_discount=promo_discount,
+            promo_message=promo_message,
+            total=max(discounted - promo_discount, ZERO),
+            promo_code_id=promo_code_id,
+        )
+        quote_cache.set(key, quote, ttl_seconds=self._ttl(lines, now, promo_valid_until))
+        return quote
+
+
+pricing_service = PricingService()
@@ -1,3 +1,4 @@
+import logging
 from typing import List, Optional, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -6,6 +7,9 @@ from sqlalchemy.orm import selectinload
 from app.models.product import Category, Product, ProductVariant, ProductImage
 from app.schemas.product import CategoryCreate, ProductCreate, CategoryUpdate, ProductUpdate
 from app.crud.base import CRUDBase
+from app.services.cart_service import cart_service
+
+logger = logging.getLogger(__name__)
 
 # Slugify helper
 import re
@@ -156,6 +160,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductCreate]):
         
         db.add(db_obj)
         await db.commit()
+        cart_service.invalidate_product(db_obj.id)
         await db.refresh(db_obj)
         return db_obj
     
@@ -191,7 +196,8 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductCreate]):
         min_price: Optional[float] = None,
         max_price: Optional[float] = None,
         flash_deals_only: bool = False,
-        trending_only: bool = False
+        trending_only: bool = False,
+        sort: Optional[str] = None,
     ) -> List[Product]:
         # Note: is_deleted filter removed temporarily - add back after running migration b55f5ee61a4c
         # Load variants, their images, and product-level images
@@ -204,11 +210,6 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductCreate]):
         # Use .is_(True) for MySQL boolean compatibility (converts to = 1)
         # Filter only active products
         stmt = stmt.filter(Product.is_active.is_(True))
-        
-        # Debug: Log active filter
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Applied is_active filter - only showing active products")
 
         if category_id:
             stmt = stmt.filter(Product.category_id == category_id)
@@ -227,16 +228,10 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductCreate]):
         if flash_deals_only:
             # Show all products where is_flash_deal is True (regardless of dates)
             # Dates are for display/countdown purposes only, not for filtering
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.info(f"Applying flash_deals_only filter - flash_deals_only={flash_deals_only} (type: {type(flash_deals_only)})")
-            
             # Filter by is_flash_deal = True (MySQL stores as 1)
             # Use .is_(True) for MySQL boolean compatibility
             stmt = stmt.filter(Product.is_flash_deal.is_(True))
             
-            logger.info(f"Flash deals filter applied - filtering for is_flash_deal=True")
-            
             # Order by: active deals first (end date >= now), then expired deals, then no dates
             # MySQL doesn't support NULLS LAST, so use CASE to handle NULLs
             from sqlalchemy import case, and_
@@ -271,24 +266,22 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductCreate]):
             stmt = stmt.filter(Product.is_trending.is_(True))
             stmt = stmt.order_by(Product.view_count.desc())
 
+        if sort == "rating":
+            # Highest rated first (unrated products have rating_avg 0); served by ix_product_rating
+            stmt = stmt.order_by(None).order_by(
+                Product.rating_avg.desc(), Product.rating_count.desc(), Product.id.desc()
+            )
         # Default: latest first (by created_at)
-        if not flash_deals_only and not trending_only:
+        elif not flash_deals_only and not trending_only:
             stmt = stmt.order_by(Product.created_at.desc())
         
         stmt = stmt.offset(skip).limit(limit)
-        
-        # Debug logging
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Executing product query - flash_deals_only={flash_deals_only}, trending_only={trending_only}, skip={skip}, limit={limit}")
-        
         result = await db.execute(stmt)
         products = result.scalars().all()
-        
-        logger.info(f"Found {len(products)} products matching criteria")
-        if products:
-            logger.info(f"First product: id={products[0].id}, name={products[0].name}, is_flash_deal={products[0].is_flash_deal}, is_active={products[0].is_active}")
-        
+        logger.debug(
+            "Product query flash_deals_only=%s trending_only=%s sort=%s skip=%s limit=%s -> %d rows",
+            flash_deals_only, trending_only, sort, skip, limit, len(products),
+        )
         return products
     
     async def increment_view_count(self, db: AsyncSession, product_id: int) -> None:
@@ -312,6 +305,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductCreate]):
                 # Column doesn't exist yet, use hard delete
                 await db.delete(product)
                 await db.commit()
+            cart_service.invalidate_product(id)
         return product
 
     async def update_variant_stock(self, db: AsyncSession, sku: str, quantity: int) -> Optional[ProductVariant]:
@@ -322,6 +316,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductCreate]):
             variant.stock_quantity = quantity
             db.add(variant)
             await db.commit()
+            cart_service.invalidate_variants(variant.id)
             await db.refresh(variant)
         return variant
 
@@ -1,15 +1,71 @@
-from typing import Optional
+from typing import Optional, Set, Union
 from datetime import datetime, timezone
 from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, exists, or_, update
 
+from app.core import promo_counter
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.models.promo import PromoCode, PromoCodeUsage
-from app.schemas.promo import PromoCodeCreate, PromoCodeUpdate, PromoCodeValidationResult
+from app.schemas.promo import PromoCode as PromoCodeSchema, PromoCodeCreate, PromoCodeUpdate, PromoCodeValidationResult
 from app.crud.base import CRUDBase
 
 
+# Active promo rules by normalized code, so validating a code (every cart view and keystroke in
+# the promo box) is a dict lookup. Entries expire at valid_until, or after
+# PROMO_RULE_CACHE_TTL_SECONDS to pick up edits made on other workers; admin writes here clear
+# them at once. Unknown codes are remembered briefly too.
+promo_rules: TTLCache[str, Union[PromoCodeSchema, bool]] = TTLCache(
+    "promo_rule", ttl_seconds=settings.PROMO_RULE_CACHE_TTL_SECONDS
+)
+UNKNOWN_CODE_TTL_SECONDS = 30
+_UNKNOWN_CODE = False
+# promo_code_id -> ids of users who have redeemed it (once_per_user checks)
+promo_users: TTLCache[int, Set[int]] = TTLCache("promo_users", ttl_seconds=settings.PROMO_RULE_CACHE_TTL_SECONDS)
+
+
+def _utc(dt: datetime) -> datetime:
+    # SQLite hands back naive datetimes for DateTime(timezone=True) columns
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
 class CRUDPromoCode(CRUDBase[PromoCode, PromoCodeCreate, PromoCodeUpdate]):
+    async def get_rule(self, db: AsyncSession, code: str) -> Optional[PromoCodeSchema]:
+        """The active, unexpired code (possibly not yet valid_from), from the rule cache."""
+        key = code.upper().strip()
+        rule = promo_rules.get(key)
+        if rule is None:
+            now = datetime.now(timezone.utc)
+            # Use is_(True) for MySQL compatibility (SQLAlchemy handles boolean conversion)
+            stmt = select(PromoCode).filter(PromoCode.code == key, PromoCode.is_active.is_(True))
+            promo_code = (await db.execute(stmt)).scalars().first()
+            if promo_code is None or _utc(promo_code.valid_until) < now:
+                promo_rules.set(key, _UNKNOWN_CODE, ttl_seconds=UNKNOWN_CODE_TTL_SECONDS)
+                return None
+            rule = PromoCodeSchema.model_validate(promo_code)
+            rule.valid_from, rule.valid_until = _utc(rule.valid_from), _utc(rule.valid_until)
+            ttl = min(settings.PROMO_RULE_CACHE_TTL_SECONDS, (rule.valid_until - now).total_seconds())
+            promo_rules.set(key, rule, ttl_seconds=ttl)
+        return rule or None
+
+    async def user_ids(self, db: AsyncSession, promo_code_id: int) -> Set[int]:
+        """Users who have redeemed the code (cached)."""
+        ids = promo_users.get(promo_code_id)
+        if ids is None:
+            stmt = select(PromoCodeUsage.user_id).filter(
+                PromoCodeUsage.promo_code_id == promo_code_id, PromoCodeUsage.user_id.isnot(None)
+            ).distinct()
+            ids = set((await db.execute(stmt)).scalars())
+            promo_users.set(promo_code_id, ids)
+        return ids
+
+    def invalidate_rules(self, promo_code_id: Optional[int] = None) -> None:
+        """Call after creating, updating or deleting a promo code."""
+        promo_rules.clear()  # the code itself may have been renamed
+        if promo_code_id is not None:
+            promo_users.invalidate(promo_code_id)
+
     async def validate_promo_code(
         self, 
         db: AsyncSession, 
@@ -17,31 +73,34 @@ class CRUDPromoCode(CRUDBase[PromoCode, PromoCodeCreate, PromoCodeUpdate]):
         total_amount: Decimal,
         user_id: Optional[int] = None
     ) -> PromoCodeValidationResult:
-        """Validate a promo code and calculate discount."""
+        """Validate a promo code and calculate discount (no query while the rule is cached)."""
         now = datetime.now(timezone.utc)
+        promo_code = await self.get_rule(db, code)
         
-        # Use is_(True) for MySQL compatibility (SQLAlchemy handles boolean conversion)
-        stmt = select(PromoCode).filter(
-            PromoCode.code == code.upper().strip(),
-            PromoCode.is_active.is_(True),
-            PromoCode.valid_from <= now,
-            PromoCode.valid_until >= now
-        )
-        result = await db.execute(stmt)
-        promo_code = result.scalars().first()
-        
-        if not promo_code:
+        if not promo_code or not promo_code.valid_from <= now <= promo_code.valid_until:
             return PromoCodeValidationResult(
                 valid=False,
                 message="Promo code not found or expired"
             )
         
-        # Check usage limit
-        if promo_code.usage_limit and promo_code.used_count >= promo_code.usage_limit:
+        # Check usage limit: the Redis counter is current; the cached used_count may lag
+        remaining = await promo_counter.remaining(promo_code.id)
+        if remaining is not None:
+            exhausted = remaining <= 0
+        else:
+            # None is unlimited, as in redeem()'s UPDATE
+            exhausted = promo_code.usage_limit is not None and promo_code.used_count >= promo_code.usage_limit
+        if exhausted:
             return PromoCodeValidationResult(
                 valid=False,
                 message="Promo code usage limit reached"
             )
+
+        if promo_code.once_per_user and user_id is not None and user_id in await self.user_ids(db, promo_code.id):
+            return PromoCodeValidationResult(
+                valid=False,
+                message="You have already used this promo code"
+            )
         
         # Check minimum purchase amount
         if promo_code.min_purchase_amount and total_amount < promo_code.min_purchase_amount:
@@ -68,7 +127,83 @@ class CRUDPromoCode(CRUDBase[PromoCode, PromoCodeCreate, PromoCodeUpdate]):
             message="Promo code applied successfully"
         )
     
-    async def apply_promo_code(
+    async def _remaining_uses(self, db: AsyncSession, promo_code_id: int) -> Optional[int]:
+        row = (await db.execute(
+            select(PromoCode.usage_limit, PromoCode.used_count).filter(PromoCode.id == promo_code_id)
+        )).first()
+        if row is None:
+            return 0
+        usage_limit, used_count = row
+        return None if usage_limit is None else usage_limit - (used_count or 0)
+
+    async def redeem(self, db: AsyncSession, promo_code_id: int, user_id: Optional[int] = None) -> bool:
+        """
+        Count one use of the code in the caller's transaction (not committed here): a single
+        conditional UPDATE, so concurrent checkouts cannot exceed usage_limit. Returns False,
+        counting nothing, if the code is exhausted, inactive or (once_per_user) already used by
+        user_id. A code the Redis pre-counter already knows to be exhausted is rejected without a query.
+        """
+        taken = await promo_counter.take(promo_code_id, lambda: self._remaining_uses(db, promo_code_id))
+        if taken is False:
+            return False
+        stmt = (
+            update(PromoCode)
+            .where(
+                PromoCode.id == promo_code_id,
+                PromoCode.is_active.is_(True),
+                or_(PromoCode.usage_limit.is_(None), PromoCode.used_count < PromoCode.usage_limit),
+                or_(
+                    PromoCode.once_per_user.is_(False),
+                    ~exists().where(
+                        PromoCodeUsage.promo_code_id == PromoCode.id, PromoCodeUsage.user_id == user_id
+                    ),
+                ),
+            )
+            .values(used_count=PromoCode.used_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            redeemed = (await db.execute(stmt)).rowcount == 1
+            if redeemed and user_id is not None and await self._used_by(db, promo_code_id, user_id):
+                # A checkout by the same user committed while this UPDATE waited for the row lock
+                await db.execute(
+                    update(PromoCode)
+                    .where(PromoCode.id == promo_code_id)
+                    .values(used_count=PromoCode.used_count - 1)
+                    .execution_options(synchronize_session=False)
+                )
+                redeemed = False
+        except Exception:
+            await self.release(promo_code_id)
+            raise
+        if not redeemed:
+            await self.release(promo_code_id)
+        return redeemed
+
+    async def _used_by(self, db: AsyncSession, promo_code_id: int, user_id: int) -> bool:
+        """
+        Whether user_id has a committed use of a once_per_user code. Redemptions of a code queue
+        on the row lock of redeem()'s UPDATE, but PostgreSQL re-checks a queued UPDATE's NOT EXISTS
+        against its original snapshot; a locking read sees the latest commit (on MySQL too).
+        """
+        stmt = (
+            select(PromoCodeUsage.id)
+            .join(PromoCode, PromoCode.id == PromoCodeUsage.promo_code_id)
+            .filter(
+                PromoCodeUsage.promo_code_id == promo_code_id,
+                PromoCodeUsage.user_id == user_id,
+                PromoCode.once_per_user.is_(True),
+            )
+            .limit(1)
+            .with_for_update(read=True, of=PromoCodeUsage)
+        )
+        return (await db.execute(stmt)).first() is not None
+
+    async def release(self, promo_code_id: int) -> None:
+        """Hand back the pre-counter use of a redemption whose transaction was rolled back."""
+        await promo_counter.release(promo_code_id)
+
+    def record_usage(
         self,
         db: AsyncSession,
         promo_code_id: int,
@@ -76,12 +211,10 @@ class CRUDPromoCode(CRUDBase[PromoCode, PromoCodeCreate, PromoCodeUpdate]):
         discount_amount: Decimal,
         user_id: Optional[int] = None
     ) -> PromoCodeUsage:
-        """Record promo code usage."""
-        promo_code = await self.get(db, id=promo_code_id)
-        if promo_code:
-            promo_code.used_count += 1
-            db.add(promo_code)
-        
+        """
+        Add the usage row to the caller's transaction, the one redeem() counted the use in: for
+        once_per_user codes it is what later redemptions check. Call remember_user() after commit.
+        """
         usage = PromoCodeUsage(
             promo_code_id=promo_code_id,
             user_id=user_id,
@@ -90,9 +223,13 @@ class CRUDPromoCode(CRUDBase[PromoCode, PromoCodeCreate, PromoCodeUpdate]):
             used_at=datetime.now(timezone.utc)
         )
         db.add(usage)
-        await db.commit()
-        await db.refresh(usage)
         return usage
 
+    def remember_user(self, promo_code_id: int, user_id: Optional[int]) -> None:
+        """Add a committed redemption to the cached user id set."""
+        users = promo_users.get(promo_code_id)
+        if users is not None and user_id is not None:
+            users.add(user_id)
+
 
 promo_code_service = CRUDPromoCode(PromoCode)
@@ -0,0 +1,91 @@
+"""
+Product rating summaries: the average, count and per-star histogram of a product's approved
+reviews, stored on the product row so listings can show and sort by rating without reading
+any reviews.
+
+Every change to the set of approved reviews (create, approve/unapprove, delete) moves the
+summary by one rating with a single UPDATE in the same transaction.
+
+The public review listing is cursor-paginated over the (product_id, is_approved, created_at)
+and (product_id, is_approved, rating, created_at) indexes, selecting only the columns shown.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, func, literal_column, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.pagination import decode_cursor, encode_cursor
+from app.models.product import Product
+from app.models.review import Review
+from app.models.user import User
+from app.schemas.review import ReviewPage, ReviewPublic
+
+STARS = range(1, 6)
+REVIEW_SORTS = {
+    # sort -> key columns (all descending) and their types in the cursor
+    "newest": ((Review.created_at, Review.id), (datetime, int)),
+    "rating": ((Review.rating, Review.created_at, Review.id), (int, datetime, int)),
+}
+
+
+def _stars(rating: int):
+    return getattr(Product, f"ratings_{rating}")
+
+
+class ReviewService:
+    async def record_rating(self, db: AsyncSession, product_id: int, rating: int, delta: int) -> None:
+        """Add (delta=1) or remove (delta=-1) one approved rating from the product's summary; the caller commits."""
+        count = Product.rating_count + delta
+        total = sum(_stars(star) * star for star in STARS) + rating * delta
+        # 1.0 keeps the division exact: numeric on PostgreSQL/MySQL, real on SQLite
+        average = case((count > 0, func.round(total * literal_column("1.0") / count, 2)), else_=0)
+        stmt = (
+            update(Product)
+            .where(Product.id == product_id)
+            # rating_avg first: MySQL evaluates SET left to right, seeing columns already updated
+            .ordered_values(
+                (Product.rating_avg, average),
+                (_stars(rating), _stars(rating) + delta),
+                (Product.rating_count, count),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
+
+    async def list_reviews(
+        self,
+        db: AsyncSession,
+        product_id: int,
+        *,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: str = "newest",
+        rating: Optional[int] = None,
+        min_rating: Optional[int] = None,
+    ) -> ReviewPage:
+        """A page of the product's approved reviews; ValueError for a malformed cursor."""
+        key, key_types = REVIEW_SORTS[sort]
+        stmt = (
+            select(Review.id, Review.rating, Review.comment, Review.created_at, User.full_name.label("author_name"))
+            .join(User, User.id == Review.user_id)
+            # "= true" rather than IS TRUE, which PostgreSQL cannot match against the index
+            .filter(Review.product_id == product_id, Review.is_approved == True)
+        )
+        if rating is not None:
+            stmt = stmt.filter(Review.rating == rating)
+        if min_rating is not None:
+            stmt = stmt.filter(Review.rating >= min_rating)
+        if cursor:
+            stmt = stmt.filter(tuple_(*key) < tuple_(*decode_cursor(cursor, key_types)))
+        stmt = stmt.order_by(*(column.desc() for column in key)).limit(limit + 1)
+
+        rows = (await db.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in key])
+        return ReviewPage(items=[ReviewPublic.model_validate(row) for row in rows], next_cursor=next_cursor)
+
+
+review_service = ReviewService()
@@ -0,0 +1,176 @@
+"""
+Admin dashboard figures without scanning the order and user tables on every load:
+
+- daily_sales_rollup: orders and revenue per UTC day of order creation;
+- stats_counter: running totals of users, orders and revenue.
+
+Both are bumped by upserts in the same transaction as the write that changes them (order
+created, order status changed, order deleted, user created or deleted), so the dashboard
+reads at most 91 rollup rows and three counters however many orders there are. reconcile()
+(Celery beat, nightly) recomputes the counters and the last STATS_RECONCILE_DAYS of rollups
+from the source tables, correcting drift from writes made outside this service.
+
+Once the caller has committed, publish() hands the same deltas to app.core.live_stats, which
+keeps a Redis copy of the totals and pushes each change to open /admin/stats/stream clients.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import live_stats
+from app.core.config import settings
+from app.crud.upsert import insert_or_increment, insert_or_update
+from app.models.order import Order
+from app.models.stats import DailySalesRollup, StatsCounter
+from app.models.user import User
+
+# Orders counted towards revenue
+REVENUE_STATUSES = ("paid", "shipped", "delivered", "completed")
+COUNTERS = ("users", "orders", "revenue")
+PENDING_DELTAS = "stats_deltas"  # Session.info key: deltas of the open transaction, for publish()
+
+
+def utc_day(moment: Optional[datetime] = None) -> date:
+    """UTC calendar day of moment (now if None); naive datetimes are taken as UTC."""
+    moment = moment or datetime.now(timezone.utc)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+def _revenue(status: Optional[str], total_amount: Optional[Decimal]) -> Decimal:
+    return Decimal(total_amount or 0) if status in REVENUE_STATUSES else Decimal(0)
+
+
+def _utc_date(db: AsyncSession, column):
+    """SQL for the UTC calendar day of a created_at column, matching utc_day()."""
+    if db.get_bind().dialect.name == "postgresql":
+        # timestamptz: DATE() alone would use the session's TimeZone
+        return func.date(func.timezone("UTC", column))
+    # MySQL DATETIME holds UTC wall time (app.core.database sets the session time_zone to UTC);
+    # SQLite stores what was written
+    return func.date(column)
+
+
+class StatsService:
+    async def _bump(
+        self, db: AsyncSession, *, day: Optional[date] = None, users: int = 0, orders: int = 0, revenue: Decimal = Decimal(0)
+    ) -> None:
+        """Add the deltas to the day's rollup and the counters; the caller commits, then calls publish()."""
+        db.info.setdefault(PENDING_DELTAS, []).append(
+            {"day": day, "users": users, "orders": orders, "revenue": revenue}
+        )
+        if day is not None and (orders or revenue):
+            await db.execute(
+                insert_or_increment(
+                    db,
+                    DailySalesRollup,
+                    [{"day": day, "order_count": orders, "revenue": revenue}],
+                    conflict_columns=["day"],
+                    increment_columns=["order_count", "revenue"],
+                )
+            )
+        deltas = [{"name": name, "value": value} for name, value in zip(COUNTERS, (users, orders, revenue)) if value]
+        if deltas:
+            await db.execute(
+                insert_or_increment(db, StatsCounter, deltas, conflict_columns=["name"], increment_columns=["value"])
+            )
+
+    async def record_order_created(self, db: AsyncSession, order: Order) -> None:
+        await self._bump(
+            db, day=utc_day(order.created_at), orders=1, revenue=_revenue(order.status, order.total_amount)
+        )
+
+    async def record_status_change(self, db: AsyncSession, order: Order, old_status: Optional[str]) -> None:
+        """order.status already holds the new status; revenue moves only when crossing REVENUE_STATUSES."""
+        delta = _revenue(order.status, order.total_amount) - _revenue(old_status, order.total_amount)
+        if delta:
+            await self._bump(db, day=utc_day(order.created_at), revenue=delta)
+
+    async def record_order_deleted(self, db: AsyncSession, order: Order) -> None:
+        await self._bump(
+            db, day=utc_day(order.created_at), orders=-1, revenue=-_revenue(order.status, order.total_amount)
+        )
+
+    async def record_user_created(self, db: AsyncSession) -> None:
+        await self._bump(db, users=1)
+
+    async def record_user_deleted(self, db: AsyncSession) -> None:
+        await self._bump(db, users=-1)
+
+    async def publish(self, db: AsyncSession) -> None:
+        """Push the deltas recorded on db since the last publish() to the live dashboard; call after commit."""
+        for delta in db.info.pop(PENDING_DELTAS, []):
+            await live_stats.publish_delta(**delta)
+
+    async def totals(self, db: AsyncSession) -> Dict[str, Decimal]:
+        """Counter values by name (0 for a counter not written yet)."""
+        rows = await db.execute(select(StatsCounter.name, StatsCounter.value).filter(StatsCounter.name.in_(COUNTERS)))
+        values = {name: Decimal(0) for name in COUNTERS}
+        values.update({name: Decimal(value or 0) for name, value in rows})
+        return values
+
+    async def daily(self, db: AsyncSession, start: date, end: date) -> List[DailySalesRollup]:
+        """Rollup rows for start..end inclusive; days without orders have no row."""
+        stmt = select(DailySalesRollup).filter(DailySalesRollup.day >= start, DailySalesRollup.day <= end)
+        return list((await db.execute(stmt.order_by(DailySalesRollup.day))).scalars())
+
+    async def reconcile(self, db: AsyncSession, *, days: Optional[int] = None, today: Optional[date] = None) -> dict:
+        """
+        Recompute the counters and the rollups from `days` days ago onwards from the order and
+        user tables, and commit. Totals are full aggregates; the rollups are one grouped query
+        over a created_at range.
+        """
+        days = days or settings.STATS_RECONCILE_DAYS
+        start = (today or utc_day()) - timedelta(days=days)
+        counted = case((Order.status.in_(REVENUE_STATUSES), Order.total_amount), else_=0)
+
+        users = (await db.execute(select(func.count(User.id)))).scalar_one()
+        orders, revenue = (
+            await db.execute(select(func.count(Order.id), func.coalesce(func.sum(counted), 0)))
+        ).one()
+        await db.execute(
+            insert_or_update(
+                db,
+                StatsCounter,
+                [{"name": name, "value": value} for name, value in zip(COUNTERS, (users, orders, revenue))],
+                conflict_columns=["name"],
+                update_columns=["value"],
+            )
+        )
+
+        # Filter on the bare column so the created_at index serves the range
+        order_day = _utc_date(db, Order.created_at)
+        stmt = (
+            select(order_day, func.count(Order.id), func.coalesce(func.sum(counted), 0))
+            .filter(Order.created_at >= datetime.combine(start, time.min, tzinfo=timezone.utc))
+            .group_by(order_day)
+        )
+        rollups = [
+            {"day": date.fromisoformat(str(day)), "order_count": count, "revenue": day_revenue}
+            for day, count, day_revenue in await db.execute(stmt)
+        ]
+        if rollups:
+            await db.execute(
+                insert_or_update(
+                    db,
+                    DailySalesRollup,
+                    rollups,
+                    conflict_columns=["day"],
+                    update_columns=["order_count", "revenue"],
+                )
+            )
+        await db.execute(
+            delete(DailySalesRollup)
+            .where(DailySalesRollup.day >= start, DailySalesRollup.day.not_in([row["day"] for row in rollups]))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        await live_stats.reset({"users": users, "orders": orders, "revenue": revenue})
+        return {"users": users, "orders": orders, "revenue": float(revenue), "days": len(rollups)}
+
+
+stats_service = StatsService()
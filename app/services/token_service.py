@@ -1,8 +1,9 @@
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select
 from app.models.blacklisted_token import BlacklistedToken
 from app.core import security
+from app.crud.batch import delete_in_batches
 
 class TokenService:
     async def is_token_blacklisted(self, db: AsyncSession, token: str) -> bool:
@@ -68,13 +69,10 @@ class TokenService:
                     expires_at = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
                     await self.blacklist_token(db, refresh_token, security.TOKEN_TYPE_REFRESH, expires_at)
 
-    async def cleanup_expired_tokens(self, db: AsyncSession) -> int:
-        """Remove expired blacklisted tokens from database."""
-        stmt = delete(BlacklistedToken).filter(
-            BlacklistedToken.expires_at < datetime.now(timezone.utc)
+    async def cleanup_expired_tokens(self, db: AsyncSession, batch_size: int = 1000) -> int:
+        """Remove expired blacklisted tokens from database (in batches; run by the purge_expired_rows task)."""
+        return await delete_in_batches(
+            db, BlacklistedToken, BlacklistedToken.expires_at < datetime.now(timezone.utc), batch_size=batch_size
         )
-        result = await db.execute(stmt)
-        await db.commit()
-        return result.rowcount
 
 token_service = TokenService()
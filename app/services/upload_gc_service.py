@@ -0,0 +1,210 @@
+"""
+Garbage collection of orphaned upload files.
+
+Files become orphaned when the row pointing at them goes away without the file: image
+deletes whose file removal failed, soft-deleted products, replaced logos/favicons/profile
+pictures, and rich-text page images that were removed from the HTML.
+
+A sweep:
+1. streams every referenced upload path from the database (yield_per, never one big list
+   of ORM objects) into a set of "uploads/..." keys,
+2. walks the uploads/ tree with os.scandir,
+3. moves unreferenced files older than UPLOAD_GC_GRACE_HOURS to uploads/.quarantine/<run>/
+   (or deletes them when UPLOAD_GC_QUARANTINE_DAYS is 0) and purges expired quarantine runs.
+
+The grace period covers uploads whose row has not been committed yet (files are written
+before the row). Only the local uploads/ tree is swept; with STORAGE_BACKEND=s3 expire
+unreferenced blobs with a bucket lifecycle rule instead.
+"""
+import logging
+import os
+import re
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.storage import UPLOAD_DIR, UPLOAD_TMP_DIR
+from app.models.page import Page
+from app.models.product import Category, Product, ProductImage
+from app.models.site_config import SiteConfig
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_DIR = UPLOAD_DIR / ".quarantine"
+QUARANTINE_RUN_FORMAT = "%Y%m%dT%H%M%S"
+# An upload path inside a column value or HTML: relative, "/uploads/...", or a full URL
+UPLOAD_REF_RE = re.compile(r"uploads/[^\s\"'<>()?#\\]+")
+STREAM_BATCH_SIZE = 1000
+
+
+@dataclass
+class UploadGCReport:
+    referenced: int = 0
+    scanned: int = 0
+    orphaned: int = 0
+    reclaimed_bytes: int = 0
+    skipped_recent: int = 0
+    tmp_removed: int = 0
+    quarantine_purged: int = 0
+    dry_run: bool = False
+    orphans: List[str] = field(default_factory=list)
+
+    def as_dict(self, max_orphans: int = 100) -> dict:
+        """JSON-friendly summary (Celery result); the orphan list is truncated."""
+        data = asdict(self)
+        data["orphans"] = self.orphans[:max_orphans]
+        return data
+
+
+def _not_deleted(column):
+    return or_(column.is_(False), column.is_(None))
+
+
+class UploadGCService:
+    def _reference_queries(self):
+        """One single-column SELECT per place that can hold an upload path."""
+        live_product_images = select(ProductImage).join(Product, ProductImage.product_id == Product.id).filter(
+            _not_deleted(Product.is_deleted)
+        )
+        return (
+            live_product_images.with_only_columns(ProductImage.url),
+            live_product_images.with_only_columns(ProductImage.derivatives),
+            select(Category.image_url).filter(_not_deleted(Category.is_deleted), Category.image_url.isnot(None)),
+            select(SiteConfig.logo_url).filter(SiteConfig.logo_url.isnot(None)),
+            select(SiteConfig.favicon_url).filter(SiteConfig.favicon_url.isnot(None)),
+            select(User.profile_image).filter(User.profile_image.isnot(None)),
+            select(Page.content).filter(Page.content.contains("uploads/")),
+        )
+
+    async def referenced_paths(self, db: AsyncSession) -> Set[str]:
+        """Every "uploads/..." key referenced by a live row."""
+        referenced: Set[str] = set()
+        for stmt in self._reference_queries():
+            result = await db.stream_scalars(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for value in result:
+                if isinstance(value, dict):
+                    # ProductImage.derivatives: {"webp": {"160": "uploads/...", ...}, ...}
+                    value = " ".join(key for renditions in value.values() for key in renditions.values())
+                if value:
+                    referenced.update(UPLOAD_REF_RE.findall(value.replace("\\", "/")))
+        return referenced
+
+    def _walk(self, root: Path) -> Iterator[Tuple[str, os.DirEntry]]:
+        """Yield ("uploads/...", entry) for every file, skipping tmp, quarantine and dotfiles."""
+        skip = {os.path.normpath(UPLOAD_TMP_DIR), os.path.normpath(QUARANTINE_DIR)}
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.normpath(entry.path) not in skip:
+                        stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path).as_posix(), entry
+
+    def _sweep(self, referenced: Set[str], grace_seconds: float, quarantine_days: int, dry_run: bool) -> UploadGCReport:
+        report = UploadGCReport(referenced=len(referenced), dry_run=dry_run)
+        now = time.time()
+        cutoff = now - grace_seconds
+        run_dir = QUARANTINE_DIR / datetime.now(timezone.utc).strftime(QUARANTINE_RUN_FORMAT)
+
+        for key, entry in self._walk(UPLOAD_DIR):
+            report.scanned += 1
+            if key in referenced:
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                report.skipped_recent += 1
+                continue
+            report.orphaned += 1
+            report.reclaimed_bytes += stat.st_size
+            report.orphans.append(key)
+            if dry_run:
+                continue
+            try:
+                if quarantine_days > 0:
+                    target = run_dir / Path(key).relative_to(UPLOAD_DIR)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(entry.path, target)
+                else:
+                    os.unlink(entry.path)
+            except OSError:
+                logger.warning("Could not collect orphaned upload %s", key, exc_info=True)
+
+        if not dry_run:
+            report.tmp_removed = self._remove_stale_tmp(cutoff)
+            report.quarantine_purged = self._purge_quarantine(quarantine_days)
+        return report
+
+    def _remove_stale_tmp(self, cutoff: float) -> int:
+        """Temp files left behind by interrupted uploads (normally removed by _store_blob)."""
+        removed = 0
+        try:
+            entries = list(os.scandir(UPLOAD_TMP_DIR))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime <= cutoff:
+                Path(entry.path).unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def _purge_quarantine(self, quarantine_days: int) -> int:
+        """Delete quarantine runs older than quarantine_days."""
+        purged = 0
+        expires = datetime.now(timezone.utc) - timedelta(days=quarantine_days)
+        try:
+            runs = list(os.scandir(QUARANTINE_DIR))
+        except FileNotFoundError:
+            return 0
+        for run in runs:
+            try:
+                started = datetime.strptime(run.name, QUARANTINE_RUN_FORMAT).replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            if run.is_dir() and started <= expires:
+                shutil.rmtree(run.path, ignore_errors=True)
+                purged += 1
+        return purged
+
+    async def collect(
+        self,
+        db: AsyncSession,
+        *,
+        grace_hours: Optional[float] = None,
+        quarantine_days: Optional[int] = None,
+        dry_run: bool = False,
+    ) -> UploadGCReport:
+        """Quarantine (or delete) unreferenced uploads older than the grace period."""
+        grace_hours = settings.UPLOAD_GC_GRACE_HOURS if grace_hours is None else grace_hours
+        quarantine_days = settings.UPLOAD_GC_QUARANTINE_DAYS if quarantine_days is None else quarantine_days
+        referenced = await self.referenced_paths(db)
+        report = await run_in_threadpool(self._sweep, referenced, grace_hours * 3600, quarantine_days, dry_run)
+        logger.info(
+            "Upload GC: %d orphaned of %d files, %d bytes %s, %d recent skipped, %d tmp removed",
+            report.orphaned,
+            report.scanned,
+            report.reclaimed_bytes,
+            "reclaimable (dry run)" if dry_run else "reclaimed",
+            report.skipped_recent,
+            report.tmp_removed,
+        )
+        return report
+
+
+upload_gc_service = UploadGCService()
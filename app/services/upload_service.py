@@ -0,0 +1,54 @@
+from typing import Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.images import delete_derivatives
+from app.core.storage import delete_product_image, is_blob_path
+from app.models.page import Page
+from app.models.product import Category, ProductImage
+from app.models.site_config import SiteConfig
+from app.models.user import User
+
+# Columns that store an upload path (relative "uploads/..." or "/uploads/...")
+UPLOAD_PATH_COLUMNS = (
+    ProductImage.url,
+    Category.image_url,
+    SiteConfig.logo_url,
+    SiteConfig.favicon_url,
+    User.profile_image,
+)
+
+
+class UploadService:
+    async def count_references(self, db: AsyncSession, path: str) -> int:
+        """
+        Number of rows that still point at an upload path.
+        Content-addressed blobs are shared, so a file may only be removed at zero.
+        """
+        relative = path.lstrip("/")
+        total = 0
+        for column in UPLOAD_PATH_COLUMNS:
+            stmt = select(func.count()).select_from(column.class_).filter(
+                or_(column == relative, column == f"/{relative}")
+            )
+            total += (await db.execute(stmt)).scalar_one()
+        # Rich-text pages embed "/uploads/..." URLs in their HTML
+        stmt = select(func.count()).select_from(Page).filter(Page.content.contains(relative))
+        total += (await db.execute(stmt)).scalar_one()
+        return total
+
+    async def release_image(self, db: AsyncSession, path: str, derivatives: Optional[dict] = None) -> bool:
+        """
+        Delete an image file (and its derivatives) once nothing references it.
+        Call after the owning row has been deleted/flushed. Returns True if files were removed.
+        """
+        relative = path.replace("\\", "/").lstrip("/")
+        if is_blob_path(relative) and await self.count_references(db, relative) > 0:
+            return False
+        await delete_derivatives(derivatives)
+        await delete_product_image(relative)
+        return True
+
+
+upload_service = UploadService()
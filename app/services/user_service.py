@@ -5,6 +5,7 @@ from sqlalchemy import func
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.core import security
+from app.services.stats_service import stats_service
 
 class UserService:
     async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
@@ -21,7 +22,7 @@ class UserService:
         return result.scalars().first()
     
     async def create_user(self, db: AsyncSession, user_in: UserCreate) -> User:
-        hashed_password = security.get_password_hash(user_in.password)
+        hashed_password = await security.hash_password(user_in.password)
         db_user = User(
             email=user_in.email,
             hashed_password=hashed_password,
@@ -31,7 +32,9 @@ class UserService:
             is_verified=False 
         )
         db.add(db_user)
+        await stats_service.record_user_created(db)
         await db.commit()
+        await stats_service.publish(db)
         await db.refresh(db_user)
         return db_user
 
@@ -39,8 +42,14 @@ class UserService:
         user = await self.get_by_email(db, email)
         if not user:
             return None
-        if not security.verify_password(password, user.hashed_password):
+        valid, new_hash = await security.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            # Stored with older ARGON2_* parameters: upgrade while we have the plain password
+            user.hashed_password = new_hash
+            db.add(user)
+            await db.commit()
         return user
 
 user_service = UserService()
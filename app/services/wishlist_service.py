@@ -1,61 +1,110 @@
-from typing import Optional
+import logging
+from typing import Set
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Integer, delete, literal, select
 from sqlalchemy.orm import selectinload
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.redis_client import get_redis as _get_redis
+from app.crud.upsert import insert_ignore
 from app.models.wishlist import Wishlist, WishlistItem
+from app.schemas.wishlist import Wishlist as WishlistSchema
+
+logger = logging.getLogger(__name__)
+
+# Per-user set of wishlisted variant ids, for "in my wishlist" badges on product grids.
+# Shared through Redis (one set per user, dropped on every write); per-worker when Redis is down.
+WISHLIST_IDS_KEY_PREFIX = "wishlist_ids:"
+EMPTY_MARKER = "0"  # Redis has no empty sets; variant ids start at 1
+_local_ids: TTLCache[int, frozenset] = TTLCache("wishlist_ids", ttl_seconds=settings.WISHLIST_IDS_TTL_SECONDS)
+
 
 class WishlistService:
-    async def get_wishlist(self, db: AsyncSession, user_id: int) -> Wishlist:
-        stmt = select(Wishlist).filter(Wishlist.user_id == user_id).options(selectinload(Wishlist.items).selectinload(WishlistItem.variant))
-        result = await db.execute(stmt)
-        wishlist = result.scalars().first()
-        
+    def _wishlist_id(self, user_id: int):
+        return select(Wishlist.id).filter(Wishlist.user_id == user_id).scalar_subquery()
+
+    async def get_wishlist(self, db: AsyncSession, user_id: int) -> WishlistSchema:
+        """The user's wishlist; id 0 and no items if there is none yet (nothing is created on read)."""
+        stmt = (
+            select(Wishlist)
+            .filter(Wishlist.user_id == user_id)
+            .options(selectinload(Wishlist.items).selectinload(WishlistItem.variant))
+            # The session may hold this wishlist from before a Core-level write
+            .execution_options(populate_existing=True)
+        )
+        wishlist = (await db.execute(stmt)).scalars().first()
         if not wishlist:
-            wishlist = Wishlist(user_id=user_id)
-            db.add(wishlist)
-            await db.commit()
-            # No items yet, so simple refresh or manual construction is fine, 
-            # but sticking to pattern for safety
-            db.expire_all()
-            stmt = select(Wishlist).filter(Wishlist.user_id == user_id).options(selectinload(Wishlist.items).selectinload(WishlistItem.variant))
-            result = await db.execute(stmt)
-            return result.scalars().first()
-        
-        return wishlist
-
-    async def add_item(self, db: AsyncSession, user_id: int, variant_id: int) -> Wishlist:
-        wishlist = await self.get_wishlist(db, user_id)
-        
-        # Check duplicate
-        if any(item.product_variant_id == variant_id for item in wishlist.items):
-            return wishlist
-        
-        new_item = WishlistItem(wishlist_id=wishlist.id, product_variant_id=variant_id)
-        db.add(new_item)
-        
-        wishlist_id = wishlist.id
+            return WishlistSchema(id=0, user_id=user_id, items=[])
+        return WishlistSchema.model_validate(wishlist)
+
+    async def variant_ids(self, db: AsyncSession, user_id: int) -> Set[int]:
+        """Wishlisted variant ids, cached; queries only on a miss."""
+        redis = _get_redis()
+        key = f"{WISHLIST_IDS_KEY_PREFIX}{user_id}"
+        if redis:
+            try:
+                members = await redis.smembers(key)
+                record_cache("wishlist_ids", bool(members))
+                if members:
+                    return {int(member) for member in members} - {int(EMPTY_MARKER)}
+            except Exception:
+                redis = None
+        if not redis:
+            cached = _local_ids.get(user_id)
+            if cached is not None:
+                return set(cached)
+
+        stmt = select(WishlistItem.product_variant_id).filter(WishlistItem.wishlist_id == self._wishlist_id(user_id))
+        ids = set((await db.execute(stmt)).scalars())
+        if redis:
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.sadd(key, EMPTY_MARKER, *ids)
+                    pipe.expire(key, int(settings.WISHLIST_IDS_TTL_SECONDS))
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning("Could not cache wishlist ids for user %s: %s", user_id, e)
+        else:
+            _local_ids.set(user_id, frozenset(ids))
+        return ids
+
+    async def _invalidate_ids(self, user_id: int) -> None:
+        _local_ids.invalidate(user_id)
+        redis = _get_redis()
+        if redis:
+            try:
+                await redis.delete(f"{WISHLIST_IDS_KEY_PREFIX}{user_id}")
+            except Exception as e:
+                logger.warning("Could not drop cached wishlist ids for user %s: %s", user_id, e)
+
+    async def add_item(self, db: AsyncSession, user_id: int, variant_id: int) -> WishlistSchema:
+        """Add a variant (no-op if already there), creating the wishlist on first use."""
+        add = insert_ignore(
+            db,
+            WishlistItem,
+            select(Wishlist.id, literal(variant_id, Integer)).filter(Wishlist.user_id == user_id),
+            columns=["wishlist_id", "product_variant_id"],
+            conflict_columns=["wishlist_id", "product_variant_id"],
+        )
+        if not (await db.execute(add)).rowcount:
+            # No wishlist yet (or the variant is already in it): create one if missing and retry
+            await db.execute(insert_ignore(db, Wishlist, [{"user_id": user_id}], conflict_columns=["user_id"]))
+            await db.execute(add)
         await db.commit()
-        
-        db.expire_all()
-        stmt = select(Wishlist).filter(Wishlist.id == wishlist_id).options(selectinload(Wishlist.items).selectinload(WishlistItem.variant))
-        result = await db.execute(stmt)
-        return result.scalars().first()
-
-    async def remove_item(self, db: AsyncSession, user_id: int, variant_id: int) -> Wishlist:
-        wishlist = await self.get_wishlist(db, user_id)
-        item = next((i for i in wishlist.items if i.product_variant_id == variant_id), None)
-        
-        if item:
-            await db.delete(item)
-            wishlist_id = wishlist.id
+        await self._invalidate_ids(user_id)
+        return await self.get_wishlist(db, user_id)
+
+    async def remove_item(self, db: AsyncSession, user_id: int, variant_id: int) -> WishlistSchema:
+        stmt = delete(WishlistItem).filter(
+            WishlistItem.wishlist_id == self._wishlist_id(user_id),
+            WishlistItem.product_variant_id == variant_id,
+        )
+        if (await db.execute(stmt.execution_options(synchronize_session=False))).rowcount:
             await db.commit()
-            
-            db.expire_all()
-            stmt = select(Wishlist).filter(Wishlist.id == wishlist_id).options(selectinload(Wishlist.items).selectinload(WishlistItem.variant))
-            result = await db.execute(stmt)
-            return result.scalars().first()
-            
-        return wishlist
+            await self._invalidate_ids(user_id)
+        return await self.get_wishlist(db, user_id)
 
 wishlist_service = WishlistService()
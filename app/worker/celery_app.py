@@ -1,8 +1,25 @@
 from celery import Celery
+from celery.schedules import crontab
 from app.core.config import settings
 
-celery_app = Celery("worker", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
+celery_app = Celery("worker", broker=settings.REDIS_URL, backend=settings.REDIS_URL, include=["app.worker.tasks"])
 
 celery_app.conf.task_routes = {
     "app.worker.tasks.*": {"queue": "main-queue"},
 }
+
+# Periodic jobs; run a scheduler with `celery -A app.worker.celery_app beat`
+celery_app.conf.beat_schedule = {
+    "collect-orphaned-uploads": {
+        "task": "app.worker.tasks.collect_orphaned_uploads",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "purge-expired-rows": {
+        "task": "app.worker.tasks.purge_expired_rows",
+        "schedule": crontab(minute=15),  # hourly
+    },
+    "reconcile-dashboard-stats": {
+        "task": "app.worker.tasks.reconcile_dashboard_stats",
+        "schedule": crontab(hour=0, minute=45),  # after the UTC day closes
+    },
+}
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.services.maintenance_service import PurgeReport, maintenance_service
+from app.services.stats_service import stats_service
+from app.services.upload_gc_service import upload_gc_service
+from app.worker.celery_app import celery_app
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def worker_session() -> AsyncIterator[AsyncSession]:
+    """
+    Session for a task run under asyncio.run(). Each run has its own event loop, so it gets
+    its own NullPool engine instead of the app's pooled one (asyncpg/aiomysql connections
+    are bound to the loop that opened them).
+    """
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as session:
+            yield session
+    finally:
+        await engine.dispose()
+
+
+@asynccontextmanager
+async def task_lock(name: str, timeout: int) -> AsyncIterator[bool]:
+    """
+    Redis lock so a periodic task runs on one replica at a time; yields False if another holds it.
+    Uses its own client for the same reason worker_session uses its own engine. If Redis is
+    unreachable the task runs unlocked: the jobs using this are idempotent.
+    """
+    import redis.asyncio as redis
+    from redis.exceptions import LockError
+
+    client = redis.from_url(settings.REDIS_URL)
+    lock = client.lock(f"lock:task:{name}", timeout=timeout, blocking=False)
+    try:
+        try:
+            acquired = await lock.acquire()
+        except redis.RedisError as e:
+            logger.warning("Task lock %s unavailable (%s); running without it", name, e)
+            yield True
+            return
+        if not acquired:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            try:
+                await lock.release()
+            except (LockError, redis.RedisError):
+                logger.warning("Task lock %s expired before the run finished", name)
+    finally:
+        await client.aclose()
+
+
+async def _collect_orphaned_uploads(dry_run: bool) -> dict:
+    async with worker_session() as db:
+        report = await upload_gc_service.collect(db, dry_run=dry_run)
+    return report.as_dict()
+
+
+@celery_app.task(name="app.worker.tasks.collect_orphaned_uploads")
+def collect_orphaned_uploads(dry_run: bool = False) -> dict:
+    """Quarantine upload files no row references (see app.services.upload_gc_service)."""
+    return asyncio.run(_collect_orphaned_uploads(dry_run))
+
+
+async def _purge_expired_rows() -> dict:
+    async with task_lock("purge_expired_rows", timeout=settings.MAINTENANCE_LOCK_SECONDS) as acquired:
+        if not acquired:
+            logger.info("purge_expired_rows already running on another worker; skipped")
+            return PurgeReport(skipped=True).as_dict()
+        async with worker_session() as db:
+            report = await maintenance_service.purge_expired(db)
+    logger.info("purge_expired_rows removed %s", report.removed)
+    return report.as_dict()
+
+
+@celery_app.task(name="app.worker.tasks.purge_expired_rows")
+def purge_expired_rows() -> dict:
+    """Delete abandoned guest carts, expired OTPs and blacklisted tokens (see app.services.maintenance_service)."""
+    return asyncio.run(_purge_expired_rows())
+
+
+async def _reconcile_dashboard_stats() -> dict:
+    async with task_lock("reconcile_dashboard_stats", timeout=settings.MAINTENANCE_LOCK_SECONDS) as acquired:
+        if not acquired:
+            logger.info("reconcile_dashboard_stats already running on another worker; skipped")
+            return {"skipped": True}
+        async with worker_session() as db:
+            report = await stats_service.reconcile(db)
+    logger.info("reconcile_dashboard_stats: %s", report)
+    return report
+
+
+@celery_app.task(name="app.worker.tasks.reconcile_dashboard_stats")
+def reconcile_dashboard_stats() -> dict:
+    """Recompute the admin dashboard counters and daily sales rollup (see app.services.stats_service)."""
+    return asyncio.run(_reconcile_dashboard_stats())
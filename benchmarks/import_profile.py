@@ -0,0 +1,107 @@
+"""
+Import-time profile of the application (distilled `python -X importtime`).
+
+    python -m benchmarks.import_profile                  # top 25 modules by cumulative time
+    python -m benchmarks.import_profile --budget-ms 1500 # exit 1 if app.main exceeds the budget
+
+Runs the import in a fresh interpreter so nothing is already cached in sys.modules.
+Also reports which deferred dependencies (see app.core.lazy) were imported anyway.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Loaded on first use via app.core.lazy; importing app.main must not pull these in
+DEFERRED_MODULES = ("stripe", "fastapi_mail", "PIL.Image", "boto3")
+
+_PROBE = (
+    "import json, sys, {module}; "
+    "print(json.dumps(sorted(m for m in {deferred!r} if m in sys.modules)))"
+)
+
+
+@dataclass
+class ImportRow:
+    module: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    rows: List[ImportRow]
+    loaded_deferred: List[str]
+
+    @property
+    def total_ms(self) -> float:
+        for row in self.rows:
+            if row.module == self.module:
+                return row.cumulative_us / 1000
+        return 0.0
+
+    def top(self, n: int = 25) -> List[ImportRow]:
+        return sorted(self.rows, key=lambda r: r.cumulative_us, reverse=True)[:n]
+
+
+def parse_importtime(stderr: str) -> List[ImportRow]:
+    """Parse `-X importtime` lines: 'import time: self [us] | cumulative | imported package'."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        rows.append(ImportRow(stripped, (len(name) - len(stripped) - 1) // 2, int(parts[0]), int(parts[1])))
+    return rows
+
+
+def profile(module: str = "app.main", env: Optional[Dict[str, str]] = None) -> ImportProfile:
+    """Import `module` in a fresh interpreter and return its import-time profile."""
+    code = _PROBE.format(module=module, deferred=DEFERRED_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **(env or {})},
+        cwd=os.getcwd(),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return ImportProfile(module=module, rows=parse_importtime(proc.stderr), loaded_deferred=loaded)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Distilled -X importtime report.")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--max-depth", type=int, default=3, help="Hide modules nested deeper than this")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the module's cumulative import time exceeds this")
+    args = parser.parse_args(argv)
+
+    report = profile(args.module)
+    rows = [r for r in report.top(len(report.rows)) if r.depth <= args.max_depth][: args.top]
+    print(f"{'cumulative':>12s} {'self':>10s}  module")
+    for row in rows:
+        print(f"{row.cumulative_us / 1000:10.1f}ms {row.self_us / 1000:8.1f}ms  {'  ' * row.depth}{row.module}")
+    print(f"\n{args.module}: {report.total_ms:.1f}ms")
+    if report.loaded_deferred:
+        print(f"Deferred modules imported at startup: {', '.join(report.loaded_deferred)}")
+
+    if args.budget_ms is not None and report.total_ms > args.budget_ms:
+        print(f"Over budget: {report.total_ms:.1f}ms > {args.budget_ms:.1f}ms")
+        return 1
+    return 1 if report.loaded_deferred else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""Benchmark runner. See benchmarks/__init__.py for usage."""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.stats import compare, summarize
+
+DEFAULT_DB_URL = "sqlite+aiosqlite:///bench.db?timeout=30"
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+API = "/api/v1"
+
+SHIPPING_ADDRESS = {"full_name": "Bench", "phone_number": "9800000000", "street": "1 Bench St", "city": "Kathmandu", "country": "Nepal"}
+
+
+class Context:
+    """Shared state handed to scenarios: seeded ids plus one auth header set per worker."""
+
+    def __init__(self, seeded, concurrency: int):
+        self.seeded = seeded
+        self.variant_ids = seeded.variant_ids
+        tokens = seeded.user_tokens
+        if len(tokens) < concurrency:
+            raise SystemExit(f"Need at least {concurrency} seeded users for concurrency={concurrency}; pass --users")
+        # One user per worker so concurrent checkouts never race on the same cart
+        self.worker_headers = [{"Authorization": f"Bearer {tokens[w]}"} for w in range(concurrency)]
+        self.admin_headers = {"Authorization": f"Bearer {seeded.admin_token}"}
+        self._upload_jpeg: Optional[bytes] = None
+        # Files written by upload scenarios, removed after the run
+        self.created_paths: List[str] = []
+
+    def variant(self, i: int) -> int:
+        return self.variant_ids[(i * 7919) % len(self.variant_ids)]
+
+    def upload_image(self, i: int, n: int) -> bytes:
+        """A ~1200x900 photo-like JPEG, made unique per upload so the blob store cannot dedupe it."""
+        if self._upload_jpeg is None:
+            from PIL import Image
+
+            noise = Image.effect_noise((1200, 900), 48).convert("RGB")
+            gradient = Image.linear_gradient("L").resize((1200, 900)).convert("RGB")
+            buf = io.BytesIO()
+            Image.blend(noise, gradient, 0.6).save(buf, "JPEG", quality=80)
+            self._upload_jpeg = buf.getvalue()
+        # Bytes after the JPEG end-of-image marker are ignored by decoders
+        return self._upload_jpeg + f"bench-{i}-{n}".encode()
+
+
+# A scenario performs one iteration and returns (status_code, timed_seconds).
+# Any setup it needs (e.g. filling a cart before checkout) runs outside the timed section.
+Scenario = Callable[["httpx.AsyncClient", Context, int, int], Awaitable[Tuple[int, float]]]
+
+
+async def _timed(call: Awaitable) -> Tuple[int, float]:
+    start = time.perf_counter()
+    response = await call
+    return response.status_code, time.perf_counter() - start
+
+
+async def _timed_json(call: Awaitable) -> Tuple[int, float, Any]:
+    start = time.perf_counter()
+    response = await call
+    elapsed = time.perf_counter() - start
+    return response.status_code, elapsed, response.json()
+
+
+async def catalog_list(client, ctx: Context, worker: int, i: int) -> Tuple[int, float]:
+    return await _timed(client.get(f"{API}/catalog/products", params={"limit": 20}))
+
+
+async def catalog_search(client, ctx: Context, worker: int, i: int) -> Tuple[int, float]:
+    return await _timed(client.get(f"{API}/catalog/products", params={"limit": 20, "search": f"Product {i % 50}"}))
+
+
+async def cart_add(client, ctx: Context, worker: int, i: int) -> Tuple[int, float]:
+    return await _timed(
+        client.post(
+            f"{API}/cart/items",
+            json={"variant_id": ctx.variant(i), "quantity": 1},
+            headers=ctx.worker_headers[worker],
+        )
+    )
+
+
+async def guest_cart_add(client, ctx: Context, worker: int, i: int) -> Tuple[int, float]:
+    # A new visitor every few requests, like bots and window-shoppers
+    return await _timed(
+        client.post(
+            f"{API}/cart/items",
+            json={"variant_id": ctx.variant(i), "quantity": 1},
+            headers={"X-Session-ID": f"bench_guest_{worker}_{i // 5}"},
+        )
+    )
+
+
+async def order_create(client, ctx: Context, worker: int, i: int) -> Tuple[int, float]:
+    headers = ctx.worker_headers[worker]
+    await client.post(f"{API}/cart/items", json={"variant_id": ctx.variant(i), "quantity": 1}, headers=headers)
+    return await _timed(
+        client.post(f"{API}/orders/", json={"shipping_address": SHIPPING_ADDRESS, "payment_method": "cod"}, headers=headers)
+    )
+
+
+async def _upload_images(client, ctx: Context, i: int, count: int) -> Tuple[int, float]:
+    slug = ctx.seeded.product_slugs[i % len(ctx.seeded.product_slugs)]
+    files = [("files", (f"bench-{n}.jpg", ctx.upload_image(i, n), "image/jpeg")) for n in range(count)]
+    status, elapsed, body = await _timed_json(
+        client.post(f"{API}/catalog/products/{slug}/images", files=files, headers=ctx.admin_headers)
+    )
+    for image in body if status < 400 else []:
+        ctx.created_paths.append(image["url"])
+        for renditions in (image.get("derivatives") or {}).values():
+            ctx.created_paths.extend(renditions.values())
+    return status, elapsed
+
+
+async def upload_1(client, ctx: Context, worker: int, i: int) -> Tuple[int, float]:
+    return await _upload_images(client, ctx, i, 1)
+
+
+async def upload_10(client, ctx: Context, worker: int, i: int) -> Tuple[int, float]:
+    return await _upload_images(client, ctx, i, 10)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "catalog_list": catalog_list,
+    "catalog_search": catalog_search,
+    "cart_add": cart_add,
+    "guest_cart_add": guest_cart_add,
+    "order_create": order_create,
+    "upload_1": upload_1,
+    "upload_10": upload_10,
+}
+# Run when --scenarios is not given; uploads are slow and write files, so they are opt-in
+DEFAULT_SCENARIOS = ("catalog_list", "catalog_search", "cart_add", "order_create")
+
+
+async def run_scenario(client, ctx: Context, scenario: Scenario, requests: int, concurrency: int, warmup: int) -> Dict:
+    for i in range(warmup):
+        await scenario(client, ctx, 0, i)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(w: int) -> None:
+        nonlocal errors
+        for i in counter:  # shared iterator: workers pull the next iteration index
+            status, elapsed = await scenario(client, ctx, w, i)
+            latencies.append(elapsed)
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def main_async(args) -> int:
+    # The app reads settings at import time, so configure the environment first
+    os.environ["DATABASE_URI"] = args.db_url
+    os.environ.setdefault("DEBUG", "false")
+    os.environ.setdefault("EMAIL_SUPPRESS_SEND", "true")
+    # One client hammering search/login would be throttled (429s); set RATE_LIMIT_ENABLED=true to time the limiter
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    # Keep per-request httpx/app INFO records out of the timing output
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    if args.db_url.startswith("sqlite") and not args.keep_db:
+        db_path = args.db_url.split("///", 1)[-1].split("?", 1)[0]
+        if db_path and db_path != ":memory:" and os.path.exists(db_path):
+            os.remove(db_path)
+
+    import httpx
+    from benchmarks.seed import SeedConfig, ensure_schema, reset_schema, seed
+    from app.main import app
+
+    if args.reset:
+        await reset_schema()
+    else:
+        await ensure_schema()
+    config = SeedConfig(
+        products=args.products,
+        variants_per_product=args.variants,
+        users=max(args.users, args.concurrency),
+        cart_items_per_user=args.cart_items,
+        orders=args.orders,
+    )
+    ctx = Context(await seed(config), args.concurrency)
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}. Available: {', '.join(SCENARIOS)}")
+
+    results: Dict[str, Dict] = {}
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=120) as client:
+            for name in names:
+                results[name] = await run_scenario(client, ctx, SCENARIOS[name], args.requests, args.concurrency, args.warmup)
+                r = results[name]
+                print(
+                    f"{name:16s} n={r['requests']:<5d} err={r['errors']:<4d} "
+                    f"p50={r['p50_ms']:8.2f}ms p95={r['p95_ms']:8.2f}ms p99={r['p99_ms']:8.2f}ms "
+                    f"{r['throughput_rps']:8.1f} req/s"
+                )
+    finally:
+        for path in ctx.created_paths:
+            Path(path).unlink(missing_ok=True)
+
+    report = {
+        "meta": {
+            "db": args.db_url.split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "dataset": vars(config),
+            "python": platform.python_version(),
+            "machine": platform.node(),
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    exit_code = 0
+    failed = [n for n, r in results.items() if r["errors"] and not args.allow_errors]
+    if failed:
+        print(f"Scenarios with HTTP errors: {', '.join(failed)}")
+        exit_code = 1
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to record one.")
+        return exit_code
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("meta", {}).get("concurrency") != args.concurrency:
+        print("Warning: baseline was recorded with a different concurrency; comparison may be meaningless.")
+    regressions = compare(baseline.get("scenarios", {}), results, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        exit_code = 1
+    elif not failed:
+        print(f"No regressions beyond {args.threshold:.0%} of baseline.")
+    return exit_code
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="In-process latency benchmarks for hot endpoints.")
+    parser.add_argument("--db-url", default=DEFAULT_DB_URL, help="SQLAlchemy async URL (default: SQLite file bench.db)")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables before seeding")
+    parser.add_argument("--keep-db", action="store_true", help="Reuse an existing SQLite file instead of recreating it")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(DEFAULT_SCENARIOS),
+        help=f"Comma-separated scenario names (available: {', '.join(SCENARIOS)})",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Timed iterations per scenario")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--variants", type=int, default=3, help="Variants per product")
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--cart-items", type=int, default=3, help="Pre-seeded cart lines per user")
+    parser.add_argument("--orders", type=int, default=500, help="Historical orders to seed")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed regression ratio (0.25 = 25%%)")
+    parser.add_argument("--output", help="Also write this run's results to a JSON file")
+    parser.add_argument("--allow-errors", action="store_true", help="Do not fail on non-2xx responses")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return asyncio.run(main_async(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Dataset seeding for benchmarks. Import only after benchmarks.run has set DATABASE_URI,
+since app.core.database builds its engine at import time.
+"""
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List
+
+from sqlalchemy import select
+
+import app.models  # noqa: F401 - register every model on Base.metadata
+from app.core.database import engine, SessionLocal
+from app.core.security import create_access_token, get_password_hash
+from app.models.base import Base
+from app.models.cart import Cart, CartItem
+from app.models.order import Order, OrderItem
+from app.models.product import Category, Product, ProductVariant, ProductImage
+from app.models.user import User
+
+SEED_MARKER_SLUG = "bench-seed"
+BENCH_PASSWORD = "benchpassword"
+BENCH_ADMIN_EMAIL = "bench_admin@example.com"
+
+
+@dataclass
+class SeedConfig:
+    products: int = 500
+    variants_per_product: int = 3
+    users: int = 64
+    cart_items_per_user: int = 3
+    orders: int = 500
+    seed: int = 1234
+
+
+@dataclass
+class SeedResult:
+    variant_ids: List[int] = field(default_factory=list)
+    product_slugs: List[str] = field(default_factory=list)
+    user_tokens: List[str] = field(default_factory=list)
+    admin_token: str = ""
+
+
+async def reset_schema() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def ensure_schema() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed(config: SeedConfig) -> SeedResult:
+    """Seed the dataset once (idempotent via a marker category) and return ids/tokens for scenarios."""
+    rng = random.Random(config.seed)
+    async with SessionLocal() as db:
+        marker = (await db.execute(select(Category).filter(Category.slug == SEED_MARKER_SLUG))).scalars().first()
+        if not marker:
+            await _seed_rows(db, config, rng)
+
+        result = SeedResult()
+        result.variant_ids = list((await db.execute(select(ProductVariant.id).order_by(ProductVariant.id))).scalars())
+        result.product_slugs = list((await db.execute(select(Product.slug).order_by(Product.id))).scalars())
+        user_ids = (
+            await db.execute(select(User.id).filter(User.email.like("bench_user_%")).order_by(User.id))
+        ).scalars()
+        result.user_tokens = [create_access_token(subject=uid) for uid in user_ids]
+        result.admin_token = create_access_token(subject=await _ensure_admin(db))
+        return result
+
+
+async def _ensure_admin(db) -> int:
+    """Superuser for admin-only scenarios (created lazily so older bench databases still work)."""
+    admin_id = (await db.execute(select(User.id).filter(User.email == BENCH_ADMIN_EMAIL))).scalar()
+    if admin_id is None:
+        admin = User(
+            email=BENCH_ADMIN_EMAIL,
+            hashed_password=get_password_hash(BENCH_PASSWORD),
+            full_name="Bench Admin",
+            is_active=True,
+            is_verified=True,
+            is_superuser=True,
+        )
+        db.add(admin)
+        await db.commit()
+        admin_id = admin.id
+    return admin_id
+
+
+async def _seed_rows(db, config: SeedConfig, rng: random.Random) -> None:
+    marker = Category(name="Bench Seed", slug=SEED_MARKER_SLUG)
+    categories = [Category(name=f"Bench Category {i}", slug=f"bench-category-{i}") for i in range(10)]
+    db.add(marker)
+    db.add_all(categories)
+    await db.flush()
+
+    variants: List[ProductVariant] = []
+    for p in range(config.products):
+        product = Product(
+            name=f"Bench Product {p}",
+            slug=f"bench-product-{p}",
+            description=f"Benchmark product number {p} with a reasonably long description for search.",
+            is_active=True,
+            category_id=categories[p % len(categories)].id,
+            is_flash_deal=(p % 10 == 0),
+            is_trending=(p % 7 == 0),
+            view_count=rng.randint(0, 10_000),
+        )
+        db.add(product)
+        await db.flush()
+        db.add(ProductImage(product_id=product.id, url=f"uploads/products/{product.id}/bench.jpg", is_main=True))
+        for v in range(config.variants_per_product):
+            variant = ProductVariant(
+                product_id=product.id,
+                sku=f"BENCH-{p}-{v}",
+                price=Decimal(rng.randint(100, 50_000)) / 100,
+                stock_quantity=1_000_000,
+                attributes={"size": ["S", "M", "L", "XL"][v % 4]},
+            )
+            db.add(variant)
+            variants.append(variant)
+    await db.flush()
+
+    # Every benchmark user shares one hash: argon2 is deliberately slow
+    hashed = get_password_hash(BENCH_PASSWORD)
+    users = [
+        User(email=f"bench_user_{u}@example.com", hashed_password=hashed, full_name=f"Bench User {u}", is_active=True, is_verified=True)
+        for u in range(config.users)
+    ]
+    db.add_all(users)
+    await db.flush()
+
+    for user in users:
+        cart = Cart(user_id=user.id)
+        db.add(cart)
+        await db.flush()
+        for variant in rng.sample(variants, min(config.cart_items_per_user, len(variants))):
+            db.add(CartItem(cart_id=cart.id, product_variant_id=variant.id, quantity=rng.randint(1, 3)))
+
+    statuses = ["pending", "paid", "shipped", "delivered", "cancelled"]
+    for o in range(config.orders):
+        variant = rng.choice(variants)
+        quantity = rng.randint(1, 3)
+        order = Order(
+            user_id=rng.choice(users).id,
+            order_number=f"B{o:07d}",
+            status=rng.choice(statuses),
+            total_amount=variant.price * quantity,
+            shipping_address={"full_name": "Bench", "street": "1 Bench St", "city": "Kathmandu", "country": "Nepal"},
+            payment_method="cod",
+        )
+        order.items = [OrderItem(product_variant_id=variant.id, quantity=quantity, price_at_purchase=variant.price)]
+        db.add(order)
+    await db.commit()
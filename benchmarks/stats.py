@@ -0,0 +1,47 @@
+"""Latency summaries and baseline comparison (no app imports, safe to unit test)."""
+import math
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> Dict[str, float]:
+    """Summarize latencies (seconds) into the milliseconds/throughput record stored in baselines."""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round((sum(values) / count) * 1000, 3) if count else 0.0,
+        "throughput_rps": round(count / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+    }
+
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Return human-readable regressions of `current` against `baseline` (scenario -> summary).
+    Latency percentiles may grow and throughput may drop by at most `threshold` (0.25 = 25%).
+    Scenarios missing from either side are ignored.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        cur = current.get(name)
+        if not cur:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if base.get(key) and cur[key] > base[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {cur[key]:.2f} > {base[key]:.2f} (+{threshold:.0%} allowed)")
+        if base.get("throughput_rps") and cur["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput_rps {cur['throughput_rps']:.1f} < {base['throughput_rps']:.1f} (-{threshold:.0%} allowed)"
+            )
+    return regressions
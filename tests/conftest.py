@@ -1,6 +1,12 @@
 import pytest
+import pytest_asyncio
 import asyncio
 import sys
+from contextlib import contextmanager
+from decimal import Decimal
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 # Windows-specific event loop policy to avoid "Event loop is closed" errors
 if sys.platform == "win32":
@@ -17,3 +23,77 @@ def event_loop():
         loop = asyncio.new_event_loop()
     yield loop
     loop.close()
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits(monkeypatch):
+    """Tests log in and post forms far faster than any client should; tests/test_rate_limit.py turns this back on."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    """Force the guest cart store's in-process fallback so tests do not depend on a Redis server."""
+    from app.core import guest_cart_store
+
+    monkeypatch.setattr(guest_cart_store, "_get_redis", lambda: None)
+    monkeypatch.setattr(guest_cart_store, "_in_memory_store", {})
+
+
+@pytest_asyncio.fixture
+async def cart_db(tmp_path, memory_store):
+    """
+    Throwaway SQLite database with one category, product "tee" (variants 1 and 2) and one user.
+    """
+    import app.models  # noqa: F401 - register every model on Base.metadata
+    from app.models.base import Base
+    from app.models.product import Category, Product, ProductVariant
+    from app.models.user import User
+    from app.services.cart_service import variant_read_model
+    from app.services.pricing_service import quote_cache
+    from app.services.promo_service import promo_rules, promo_users
+
+    variant_read_model.clear()
+    quote_cache.clear()
+    promo_rules.clear()
+    promo_users.clear()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cart.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as db:
+        category = Category(name="Tees", slug="tees")
+        db.add(category)
+        await db.flush()
+        product = Product(name="Tee", slug="tee", category_id=category.id)
+        db.add(product)
+        await db.flush()
+        db.add_all([
+            ProductVariant(product_id=product.id, sku="TEE-S", price=Decimal("10.00"), stock_quantity=5),
+            ProductVariant(product_id=product.id, sku="TEE-M", price=Decimal("12.00"), stock_quantity=5),
+            User(email="shopper@example.com", hashed_password="x"),
+        ])
+        await db.commit()
+        yield db
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements():
+    """statements(db): context manager collecting the first keyword of every SQL statement sent on db's engine."""
+    @contextmanager
+    def collect(db):
+        seen = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            seen.append(statement.split(None, 1)[0].upper())
+
+        engine = db.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield seen
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return collect
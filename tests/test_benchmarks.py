@@ -0,0 +1,19 @@
+from benchmarks.stats import compare, percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    values = sorted(float(v) for v in range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0.0
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    baseline = {"catalog_list": summarize([0.010] * 100, 0, 1.0)}
+    same = {"catalog_list": summarize([0.011] * 100, 0, 1.05)}
+    assert compare(baseline, same, threshold=0.25) == []
+
+    slower = {"catalog_list": summarize([0.020] * 100, 0, 2.0)}
+    regressions = compare(baseline, slower, threshold=0.25)
+    assert any("p99_ms" in r for r in regressions)
+    assert any("throughput_rps" in r for r in regressions)
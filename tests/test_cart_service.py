@@ -0,0 +1,105 @@
+import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.cache import TTLCache
+from app.models.cart import Cart, CartItem
+from app.models.user import User
+from app.services.cart_service import cart_service, variant_read_model
+
+
+def test_ttl_cache_expires_bounds_and_invalidates():
+    cache = TTLCache("test", ttl_seconds=60, max_entries=2)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) == "a"  # 1 is now the most recently used
+    cache.set(3, "c")
+    assert cache.get_many([1, 2, 3]) == {1: "a", 3: "c"}
+
+    cache.invalidate_where(lambda value: value == "c")
+    assert cache.get(3) is None
+
+    cache.ttl_seconds = 0
+    cache.set(4, "d")
+    time.sleep(0.001)
+    assert cache.get(4) is None
+
+
+@pytest.mark.asyncio
+async def test_mutations_are_single_statements(cart_db, statements):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    cart = await cart_service.add_item(cart_db, variant_id=1, quantity=1, user_id=user_id)
+    assert [(i.product_variant_id, i.quantity) for i in cart.items] == [(1, 1)]
+
+    with statements(cart_db) as seen:
+        cart = await cart_service.add_item(cart_db, variant_id=1, quantity=2, user_id=user_id)
+    assert seen == ["INSERT", "SELECT"]  # the upsert, then the cart's lines; variants come from the read model
+    assert cart.items[0].quantity == 3 and cart.items[0].variant.product.slug == "tee"
+
+    item_id = cart.items[0].id
+    with statements(cart_db) as seen:
+        cart = await cart_service.update_item_quantity(cart_db, item_id=item_id, quantity=5, user_id=user_id)
+    assert seen == ["UPDATE", "SELECT"] and cart.items[0].quantity == 5
+
+    cart = await cart_service.add_item(cart_db, variant_id=2, quantity=1, user_id=user_id)
+    assert [(i.product_variant_id, i.quantity) for i in cart.items] == [(1, 5), (2, 1)]
+
+    with statements(cart_db) as seen:
+        cart = await cart_service.remove_item(cart_db, item_id=item_id, user_id=user_id)
+    assert seen == ["DELETE", "SELECT"] and [i.product_variant_id for i in cart.items] == [2]
+
+
+@pytest.mark.asyncio
+async def test_items_of_other_carts_are_not_found(cart_db):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    cart = await cart_service.add_item(cart_db, variant_id=1, quantity=1, user_id=user_id)
+    item_id = cart.items[0].id
+
+    assert await cart_service.update_item_quantity(cart_db, item_id=item_id, quantity=2, user_id=user_id + 1) is None
+    assert await cart_service.remove_item(cart_db, item_id=item_id, user_id=user_id + 1) is None
+    empty = await cart_service.get_user_cart(cart_db, user_id + 1)
+    assert (empty.id, empty.items) == (0, [])
+
+
+@pytest.mark.asyncio
+async def test_invalidation_drops_cached_variants(cart_db):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    await cart_service.add_item(cart_db, variant_id=1, quantity=1, user_id=user_id)
+    cart = await cart_service.add_item(cart_db, variant_id=2, quantity=1, user_id=user_id)
+    assert len(variant_read_model) == 2
+
+    cart_service.invalidate_variants(1)
+    assert len(variant_read_model) == 1
+    cart_service.invalidate_product(cart.items[0].variant.product_id)
+    assert len(variant_read_model) == 0
+
+
+@pytest.mark.asyncio
+async def test_merge_of_session_cart_is_one_upsert(cart_db, statements):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    await cart_service.add_item(cart_db, variant_id=1, quantity=1, user_id=user_id)
+    session_cart = Cart(session_id="legacy-session")
+    cart_db.add(session_cart)
+    await cart_db.flush()
+    cart_db.add_all([
+        CartItem(cart_id=session_cart.id, product_variant_id=1, quantity=2),
+        CartItem(cart_id=session_cart.id, product_variant_id=2, quantity=4),
+    ])
+    await cart_db.commit()
+
+    with statements(cart_db) as seen:
+        cart = await cart_service.merge_carts(cart_db, session_id="legacy-session", user_id=user_id)
+    assert seen.count("INSERT") == 1
+    assert [(i.product_variant_id, i.quantity) for i in cart.items] == [(1, 3), (2, 4)]
+    assert (await cart_db.execute(select(Cart.id).filter(Cart.session_id == "legacy-session"))).first() is None
+
+
+@pytest.mark.asyncio
+async def test_cart_lines_are_unique_per_variant(cart_db):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    cart = await cart_service.add_item(cart_db, variant_id=2, quantity=1, user_id=user_id)
+    cart_db.add(CartItem(cart_id=cart.id, product_variant_id=2, quantity=1))
+    with pytest.raises(IntegrityError):
+        await cart_db.commit()
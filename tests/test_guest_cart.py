@@ -0,0 +1,58 @@
+import time
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core import guest_cart_store
+from app.models.cart import Cart, CartItem
+from app.models.user import User
+from app.services.cart_service import cart_service
+
+
+@pytest.mark.asyncio
+async def test_store_slides_expiry_and_drops_expired_carts(memory_store):
+    session_id = f"guest_{uuid.uuid4().hex}"
+    assert await guest_cart_store.add_item(session_id, 7, 2) == {7: 2}
+    assert await guest_cart_store.add_item(session_id, 7, 1) == {7: 3}
+    assert await guest_cart_store.set_quantity(session_id, 8, 1) == {7: 3, 8: 1}
+    assert await guest_cart_store.set_quantity(session_id, 7, 0) == {8: 1}
+
+    items, expiry = guest_cart_store._in_memory_store[session_id]
+    assert expiry > time.time() + 6 * 24 * 3600  # slid forward by GUEST_CART_TTL_DAYS
+    guest_cart_store._in_memory_store[session_id] = (items, time.time() - 1)
+    assert await guest_cart_store.get_items(session_id) == {}
+
+
+@pytest.mark.asyncio
+async def test_guest_cart_has_sql_cart_shape_without_rows(cart_db):
+    session_id = f"guest_{uuid.uuid4().hex}"
+    await cart_service.add_guest_item(cart_db, session_id, variant_id=1, quantity=2)
+    cart = await cart_service.add_guest_item(cart_db, session_id, variant_id=1, quantity=1)
+
+    assert (cart.id, cart.user_id, cart.session_id) == (0, None, session_id)
+    assert [(i.id, i.product_variant_id, i.quantity) for i in cart.items] == [(1, 1, 3)]
+    assert cart.items[0].variant.sku == "TEE-S" and cart.items[0].variant.product.slug == "tee"
+    assert await cart_service.add_guest_item(cart_db, session_id, variant_id=999, quantity=1) is None
+    assert (await cart_db.execute(select(func.count()).select_from(Cart))).scalar_one() == 0
+
+    cart = await cart_service.update_guest_item(cart_db, session_id, variant_id=1, quantity=5)
+    assert cart.items[0].quantity == 5
+    assert await cart_service.update_guest_item(cart_db, session_id, variant_id=2, quantity=1) is None
+    assert (await cart_service.remove_guest_item(cart_db, session_id, variant_id=1)).items == []
+
+
+@pytest.mark.asyncio
+async def test_merge_materializes_guest_cart_into_user_cart(cart_db):
+    session_id = f"guest_{uuid.uuid4().hex}"
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    await cart_service.add_item(cart_db, variant_id=1, quantity=1, user_id=user_id)
+    await cart_service.add_guest_item(cart_db, session_id, variant_id=1, quantity=2)
+    await cart_service.add_guest_item(cart_db, session_id, variant_id=2, quantity=1)
+
+    cart = await cart_service.merge_carts(cart_db, session_id=session_id, user_id=user_id)
+
+    assert sorted((i.product_variant_id, i.quantity) for i in cart.items) == [(1, 3), (2, 1)]
+    assert await guest_cart_store.get_items(session_id) == {}
+    assert (await cart_db.execute(select(func.count()).select_from(CartItem))).scalar_one() == 2
+    assert not await cart_service.materialize_guest_cart(cart_db, session_id, user_id)
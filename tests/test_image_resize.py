@@ -0,0 +1,117 @@
+import asyncio
+import io
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from PIL import Image
+from starlette.datastructures import Headers
+from fastapi import UploadFile
+
+from app.core import image_cache, storage
+from app.core.image_cache import ImageCache, normalize_source, render_resized
+from app.main import app
+
+
+def _make_image(path: Path, size=(1200, 800)) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, (30, 90, 200)).save(path)
+    return path.as_posix()
+
+
+@pytest.fixture
+def upload_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "_dirs_ready", False)
+    monkeypatch.setattr(image_cache, "_cache", ImageCache("cache/images", 10 * 1024 * 1024))
+    return tmp_path
+
+
+def test_render_resized_crops_or_keeps_aspect_ratio(tmp_path):
+    source = _make_image(tmp_path / "src.png")
+
+    render_resized(source, str(tmp_path / "crop.webp"), 320, 320, "webp")
+    with Image.open(tmp_path / "crop.webp") as img:
+        assert (img.format, img.size) == ("WEBP", (320, 320))
+
+    render_resized(source, str(tmp_path / "wide.jpg"), 480, 0, "jpeg")
+    with Image.open(tmp_path / "wide.jpg") as img:
+        assert (img.format, img.size) == ("JPEG", (480, 320))
+
+    render_resized(source, str(tmp_path / "big.png"), 1920, 600, "png")
+    with Image.open(tmp_path / "big.png") as img:
+        assert img.size == (1200, 375)  # crop box scaled down instead of upscaling
+
+
+def test_normalize_source_rejects_paths_outside_uploads_and_static():
+    assert normalize_source("/uploads/blobs/ab/x.jpg") == "uploads/blobs/ab/x.jpg"
+    assert normalize_source("static/logo/logo.png") == "static/logo/logo.png"
+    assert normalize_source("uploads/../app/core/config.py") is None
+    assert normalize_source("../etc/passwd") is None
+    assert normalize_source("uploads/tmp/upload-123.part") is None
+    assert normalize_source(".env") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_render_once(upload_root, monkeypatch):
+    source = _make_image(upload_root / "uploads/products/1/a.png")
+    cache = image_cache.get_image_cache()
+    renders = []
+    render = cache._render
+
+    async def counting_render(*args):
+        renders.append(args)
+        await render(*args)
+
+    monkeypatch.setattr(cache, "_render", counting_render)
+    paths = await asyncio.gather(*(cache.get(source, 480, 0, "webp") for _ in range(8)))
+
+    assert len(renders) == 1
+    assert len(set(paths)) == 1 and paths[0].exists()
+    assert await cache.get(source, 480, 0, "webp") == paths[0]
+    assert len(renders) == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used(upload_root):
+    source = _make_image(upload_root / "uploads/products/1/a.png")
+    cache = ImageCache("cache/images", max_bytes=10 * 1024 * 1024)
+
+    first = await cache.get(source, 160, 160, "png")
+    second = await cache.get(source, 240, 0, "png")
+    await cache.get(source, 160, 160, "png")  # first is now the most recently used
+    cache.max_bytes = first.stat().st_size + second.stat().st_size
+    third = await cache.get(source, 64, 64, "png")
+
+    assert first.exists() and third.exists()
+    assert not second.exists()
+    assert cache.size_bytes <= cache.max_bytes
+
+    # A restarted worker rebuilds the LRU order from the files on disk
+    restarted = ImageCache("cache/images", max_bytes=cache.max_bytes)
+    assert await restarted.get(source, 64, 64, "png") == third
+    assert restarted.size_bytes == cache.size_bytes
+
+
+@pytest.mark.asyncio
+async def test_img_endpoint_serves_allowed_sizes(upload_root):
+    data = io.BytesIO()
+    Image.new("RGB", (800, 600), (200, 10, 10)).save(data, "JPEG")
+    upload = UploadFile(file=io.BytesIO(data.getvalue()), filename="x.jpg", headers=Headers({"content-type": "image/jpeg"}))
+    key = await storage.save_product_image(upload, product_id=1)
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get(f"/img/480x0/{key}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert "immutable" in response.headers["cache-control"]
+        with Image.open(io.BytesIO(response.content)) as img:
+            assert img.size == (480, 360)
+
+        response = await ac.get(f"/img/160x160/{key}", params={"fmt": "jpeg"})
+        assert response.headers["content-type"] == "image/jpeg"
+
+        assert (await ac.get(f"/img/333x333/{key}")).status_code == 400
+        assert (await ac.get(f"/img/480x0/{key}", params={"fmt": "gif"})).status_code == 400
+        assert (await ac.get("/img/480x0/uploads/blobs/00/missing.jpg")).status_code == 404
+        assert (await ac.get("/img/480x0/app/core/config.py")).status_code == 404
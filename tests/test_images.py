@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.core.images import build_srcset, delete_derivatives, generate_derivatives, render_derivatives
+
+
+def _make_image(tmp_path: Path, size=(1200, 800), mode="RGB", name="orig.png") -> str:
+    path = tmp_path / name
+    Image.new(mode, size, (200, 30, 30) if mode == "RGB" else (200, 30, 30, 128)).save(path)
+    return path.as_posix()
+
+
+def test_render_derivatives_writes_each_width_and_format(tmp_path):
+    derivatives = render_derivatives(_make_image(tmp_path))
+    assert set(derivatives) == {"webp", "jpeg"}
+    assert set(derivatives["webp"]) == {"160", "480", "1024"}
+    with Image.open(derivatives["jpeg"]["480"]) as img:
+        assert img.format == "JPEG"
+        assert img.size == (480, 320)
+    with Image.open(derivatives["webp"]["1024"]) as img:
+        assert img.format == "WEBP"
+
+
+@pytest.mark.asyncio
+async def test_small_transparent_original_is_not_upscaled(tmp_path):
+    derivatives = render_derivatives(_make_image(tmp_path, size=(300, 300), mode="RGBA"))
+    assert set(derivatives["jpeg"]) == {"160", "300"}
+    with Image.open(derivatives["webp"]["300"]) as img:
+        assert img.mode == "RGBA"
+
+    await delete_derivatives(derivatives)
+    assert not any(Path(p).exists() for r in derivatives.values() for p in r.values())
+
+
+def test_build_srcset_orders_by_width():
+    srcset = build_srcset({"webp": {"480": "a_480.webp", "160": "a_160.webp"}})
+    assert srcset == {"webp": "a_160.webp 160w, a_480.webp 480w"}
+    assert build_srcset(None) == {}
+
+
+@pytest.mark.asyncio
+async def test_generate_derivatives_runs_in_process_pool(tmp_path):
+    derivatives = await generate_derivatives(_make_image(tmp_path))
+    assert derivatives and Path(derivatives["webp"]["160"]).exists()
+    assert await generate_derivatives((tmp_path / "missing.png").as_posix()) is None
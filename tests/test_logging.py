@@ -0,0 +1,64 @@
+import json
+import logging
+import queue
+
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.core.logging_config import (
+    ContextQueueHandler,
+    JsonFormatter,
+    LOG_RECORDS_DROPPED,
+    SamplingFilter,
+    parse_sampling,
+    request_id_var,
+)
+
+
+def _record(name: str, level: int = logging.DEBUG, msg: str = "hello %s", args=("world",)) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_parse_sampling_clamps_and_skips_garbage():
+    assert parse_sampling("app.services=0.1, app.api=2,bad,x=y") == {"app.services": 0.1, "app.api": 1.0}
+    assert parse_sampling("") == {}
+
+
+def test_sampling_filter_uses_longest_prefix_and_keeps_warnings():
+    f = SamplingFilter({"app": 1.0, "app.services.product_service": 0.0})
+    assert not f.filter(_record("app.services.product_service"))
+    assert not f.filter(_record("app.services.product_service.sub"))
+    assert f.filter(_record("app.services.order_service"))
+    assert f.filter(_record("app.services.product_service", level=logging.WARNING))
+    # "app.servicesX" is not a child of "app.services"
+    assert SamplingFilter({"app.services": 0.0}).filter(_record("app.servicesX"))
+
+
+def test_queue_handler_stamps_request_id_and_drops_when_full():
+    q: queue.Queue = queue.Queue(maxsize=1)
+    handler = ContextQueueHandler(q)
+    token = request_id_var.set("abc123")
+    try:
+        handler.handle(_record("app.test"))
+    finally:
+        request_id_var.reset(token)
+
+    queued = q.get_nowait()
+    payload = json.loads(JsonFormatter().format(queued))
+    assert payload["msg"] == "hello world"
+    assert payload["request_id"] == "abc123"
+
+    before = LOG_RECORDS_DROPPED.value()
+    handler.handle(_record("app.test"))
+    handler.handle(_record("app.test"))
+    assert LOG_RECORDS_DROPPED.value() == before + 1
+
+
+@pytest.mark.asyncio
+async def test_request_id_header_is_echoed_or_minted():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/health", headers={"X-Request-ID": "req-42"})
+        assert res.headers["x-request-id"] == "req-42"
+
+        res = await ac.get("/health")
+        assert len(res.headers["x-request-id"]) == 32
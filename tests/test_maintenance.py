@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.blacklisted_token import BlacklistedToken
+from app.models.cart import Cart, CartItem
+from app.models.user import User
+from app.models.verification_otp import VerificationOtp
+from app.services.cart_service import cart_service
+from app.services.maintenance_service import maintenance_service
+from app.worker.tasks import task_lock
+
+NOW = datetime.now(timezone.utc)
+OLD = NOW - timedelta(days=30)
+
+
+async def _count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_purge_removes_only_expired_rows_in_batches(cart_db):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    abandoned = [Cart(session_id=f"old-{n}", updated_at=OLD) for n in range(3)]
+    recent_item = Cart(session_id="old-but-active", updated_at=OLD)
+    kept = [Cart(session_id="fresh", updated_at=NOW), Cart(user_id=user_id, updated_at=OLD), recent_item]
+    cart_db.add_all(abandoned + kept)
+    await cart_db.flush()
+    cart_db.add_all([CartItem(cart_id=cart.id, product_variant_id=1, quantity=1, updated_at=OLD) for cart in abandoned])
+    cart_db.add(CartItem(cart_id=recent_item.id, product_variant_id=1, quantity=1, updated_at=NOW))
+    cart_db.add_all([VerificationOtp(email=f"{n}@example.com", otp="123456", expires_at=OLD) for n in range(5)])
+    cart_db.add(VerificationOtp(email="live@example.com", otp="654321", expires_at=NOW + timedelta(minutes=5)))
+    cart_db.add_all([
+        BlacklistedToken(token="expired", token_type="access", expires_at=OLD),
+        BlacklistedToken(token="live", token_type="refresh", expires_at=NOW + timedelta(days=1)),
+    ])
+    await cart_db.commit()
+
+    report = await maintenance_service.purge_expired(cart_db, batch_size=2, now=NOW)
+
+    assert report.removed == {"cart": 3, "cartitem": 3, "verification_otp": 5, "blacklisted_token": 1}
+    assert not report.skipped
+    remaining = (await cart_db.execute(select(Cart.session_id).order_by(Cart.id))).scalars().all()
+    assert remaining == ["fresh", None, "old-but-active"]
+    assert (await _count(cart_db, CartItem), await _count(cart_db, VerificationOtp), await _count(cart_db, BlacklistedToken)) == (1, 1, 1)
+
+    again = await maintenance_service.purge_expired(cart_db, batch_size=2, now=NOW)
+    assert set(again.removed.values()) == {0}
+
+
+@pytest.mark.asyncio
+async def test_quantity_bumps_count_as_cart_activity(cart_db):
+    cart = Cart(session_id="returning", updated_at=OLD)
+    cart_db.add(cart)
+    await cart_db.flush()
+    cart_db.add(CartItem(cart_id=cart.id, product_variant_id=1, quantity=1, updated_at=OLD))
+    await cart_db.commit()
+
+    # The upsert that adds onto an existing line must bump its updated_at like an ORM update would
+    await cart_service._execute_write(cart_db, cart_service._upsert_lines(
+        cart_db, [{"cart_id": cart.id, "product_variant_id": 1, "quantity": 2}]
+    ))
+    await cart_db.commit()
+
+    report = await maintenance_service.purge_expired(cart_db, batch_size=10, now=NOW)
+    assert report.removed["cart"] == 0
+    assert (await cart_db.execute(select(CartItem.quantity))).scalar_one() == 3
+
+
+@pytest.mark.asyncio
+async def test_task_lock_runs_unlocked_without_redis(monkeypatch):
+    monkeypatch.setattr("app.worker.tasks.settings.REDIS_URL", "redis://127.0.0.1:1/0")
+    async with task_lock("test", timeout=5) as acquired:
+        assert acquired
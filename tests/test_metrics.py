@@ -0,0 +1,40 @@
+import pytest
+from httpx import AsyncClient
+from app.main import app
+from app.core.metrics import Counter, Histogram, HTTP_REQUESTS
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("test_latency_seconds", "Test histogram.", ("route",), buckets=(0.1, 1.0))
+    h.observe(0.05, ("/a",))
+    h.observe(0.5, ("/a",))
+    h.observe(5, ("/a",))
+    text = "\n".join(h.render())
+    assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{route="/a"} 3' in text
+    assert h.count(("/a",)) == 3
+
+
+def test_counter_escapes_label_values():
+    c = Counter("test_total", "Test counter.", ("path",))
+    c.inc(('say "hi"',), 2)
+    assert 'test_total{path="say \\"hi\\""} 2' in c.render()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_records_route_template():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        before = HTTP_REQUESTS.value(("GET", "/health", "200"))
+        res = await ac.get("/health")
+        assert res.status_code == 200
+        assert HTTP_REQUESTS.value(("GET", "/health", "200")) == before + 1
+
+        metrics_res = await ac.get("/metrics")
+        assert metrics_res.status_code == 200
+        assert metrics_res.headers["content-type"].startswith("text/plain")
+        body = metrics_res.text
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+        assert 'db_pool_connections{state="checked_out"}' in body
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models.product import Product, ProductVariant
+from app.models.promo import PromoCode
+from app.models.user import User
+from app.services.cart_service import cart_service
+from app.services.pricing_service import PricedLine, cart_version, pricing_service, quote_cache
+
+NOW = datetime.now(timezone.utc)
+
+
+def test_effective_price_prefers_active_flash_deal():
+    line = PricedLine(1, 2, Decimal("100.00"), discount_percentage=Decimal("15"))
+    assert line.effective_price(NOW) == Decimal("85.00")
+
+    deal = PricedLine(
+        1, 2, Decimal("100.00"), is_flash_deal=True, flash_deal_price=Decimal("70.00"),
+        flash_deal_end=NOW + timedelta(hours=1), discount_percentage=Decimal("15"),
+    )
+    assert deal.effective_price(NOW) == Decimal("70.00")
+    assert deal.effective_price(NOW + timedelta(hours=2)) == Decimal("85.00")  # deal over
+    assert PricedLine(1, 1, Decimal("5.00"), discount_amount=Decimal("9")).effective_price(NOW) == Decimal("0.00")
+
+
+def test_version_tracks_quantities_and_prices_not_order():
+    a, b = PricedLine(1, 1, Decimal("10.00")), PricedLine(2, 3, Decimal("12.00"))
+    assert cart_version([a, b]) == cart_version([b, a])
+    assert cart_version([a, b]) != cart_version([a, PricedLine(2, 4, Decimal("12.00"))])
+    assert cart_version([a, b]) != cart_version([a, PricedLine(2, 3, Decimal("11.00"))])
+
+
+@pytest.mark.asyncio
+async def test_cart_quote_is_cached_per_version(cart_db):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    cart_db.add(PromoCode(
+        code="TENOFF", discount_type="fixed", discount_value=Decimal("10.00"),
+        valid_from=NOW - timedelta(days=1), valid_until=NOW + timedelta(days=1),
+    ))
+    await cart_db.execute(update(Product).values(discount_percentage=Decimal("10")))
+    await cart_db.commit()
+    await cart_service.add_item(cart_db, variant_id=1, quantity=2, user_id=user_id)
+    await cart_service.add_item(cart_db, variant_id=2, quantity=1, user_id=user_id)
+
+    cart = await cart_service.get_user_cart(cart_db, user_id, promo_code="tenoff")
+    quote = cart.quote
+    assert [(l.product_variant_id, l.effective_price, l.line_total) for l in quote.lines] == [
+        (1, Decimal("9.00"), Decimal("18.00")),
+        (2, Decimal("10.80"), Decimal("10.80")),
+    ]
+    assert (quote.subtotal, quote.item_discount) == (Decimal("32.00"), Decimal("3.20"))
+    assert (quote.promo_code, quote.promo_discount, quote.total) == ("TENOFF", Decimal("10.00"), Decimal("18.80"))
+    assert "promo_code_id" not in cart.model_dump()["quote"]
+
+    # Checkout prices the same lines and gets the cached quote back
+    priced = await pricing_service.priced_cart(cart_db, cart.id)
+    assert await pricing_service.quote(cart_db, priced, owner=f"user:{user_id}", promo_code="TENOFF") is quote
+
+    await cart_db.execute(update(ProductVariant).filter(ProductVariant.id == 2).values(price=Decimal("20.00")))
+    await cart_db.commit()
+    repriced = (await cart_service.get_user_cart(cart_db, user_id, promo_code="TENOFF")).quote
+    assert repriced.version != quote.version and repriced.total == Decimal("26.00")
+    assert len(quote_cache) == 4  # two adds, then one per promo-quoted version
+
+
+@pytest.mark.asyncio
+async def test_guest_cart_quote_reports_invalid_promo(cart_db):
+    await cart_service.add_guest_item(cart_db, "guest_quote", variant_id=2, quantity=2)
+    quote = (await cart_service.get_guest_cart(cart_db, "guest_quote", promo_code="NOPE")).quote
+    assert quote.total == Decimal("24.00") and quote.promo_discount == Decimal("0.00")
+    assert quote.promo_message == "Promo code not found or expired"
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.core import live_stats, promo_counter
+from app.models.order import Order
+from app.models.promo import PromoCode, PromoCodeUsage
+from app.models.user import User
+from app.schemas.order import OrderCreate
+from app.schemas.promo import PromoCodeCreate, PromoCodeUpdate
+from app.services.cart_service import cart_service
+from app.services.order_service import order_service
+from app.services.promo_service import promo_code_service
+
+NOW = datetime.now(timezone.utc)
+
+
+async def _promo(db, code: str = "FLASH", **fields) -> int:
+    promo = PromoCode(
+        code=code, discount_type="fixed", discount_value=Decimal("5.00"),
+        valid_from=NOW - timedelta(days=1), valid_until=NOW + timedelta(days=1), **fields,
+    )
+    db.add(promo)
+    await db.commit()
+    return promo.id
+
+
+async def _used(db, promo_id: int) -> int:
+    return (await db.execute(select(PromoCode.used_count).filter(PromoCode.id == promo_id))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_redeem_never_exceeds_usage_limit(cart_db, monkeypatch):
+    monkeypatch.setattr(promo_counter, "_get_redis", lambda: None)  # the UPDATE alone enforces the limit
+    promo_id = await _promo(cart_db, usage_limit=2, used_count=0)
+
+    results = []
+    for _ in range(3):
+        results.append(await promo_code_service.redeem(cart_db, promo_id))
+        await cart_db.commit()
+    assert results == [True, True, False]
+    assert await _used(cart_db, promo_id) == 2
+
+    unlimited = await _promo(cart_db, code="ALWAYS", usage_limit=None, used_count=0)
+    assert await promo_code_service.redeem(cart_db, unlimited)
+
+
+@pytest.mark.asyncio
+async def test_usage_limit_has_one_meaning(cart_db, monkeypatch):
+    monkeypatch.setattr(promo_counter, "_get_redis", lambda: None)
+    fields = dict(code="ZERO", discount_value=Decimal("5"), valid_from=NOW, valid_until=NOW + timedelta(days=1))
+    with pytest.raises(ValidationError):
+        PromoCodeCreate(usage_limit=0, **fields)
+    with pytest.raises(ValidationError):
+        PromoCodeUpdate(usage_limit=0)
+    assert PromoCodeCreate(usage_limit=None, **fields).usage_limit is None  # no limit
+
+    await _promo(cart_db, code="USEDUP", usage_limit=1, used_count=1)
+    result = await promo_code_service.validate_promo_code(cart_db, "USEDUP", Decimal("50"))
+    assert (result.valid, result.message) == (False, "Promo code usage limit reached")
+
+
+@pytest.mark.asyncio
+async def test_pre_counter_gates_and_gets_uses_back(cart_db, monkeypatch, statements):
+    promo_id = await _promo(cart_db, usage_limit=1, used_count=1)  # the counter has not caught up yet
+    released = []
+
+    async def take(promo_code_id, load_remaining):
+        return await load_remaining() > 0 if promo_code_id == promo_id else None
+
+    async def release(promo_code_id):
+        released.append(promo_code_id)
+
+    monkeypatch.setattr(promo_counter, "take", take)
+    monkeypatch.setattr(promo_counter, "release", release)
+
+    with statements(cart_db) as seen:
+        assert not await promo_code_service.redeem(cart_db, promo_id)
+    assert seen == ["SELECT"]  # seeding the counter; the UPDATE is never tried
+
+    async def take_one(promo_code_id, load_remaining):
+        return True
+
+    monkeypatch.setattr(promo_counter, "take", take_one)
+    assert not await promo_code_service.redeem(cart_db, promo_id)  # counter allowed it, the UPDATE did not
+    assert released == [promo_id] and await _used(cart_db, promo_id) == 1
+
+
+@pytest.mark.asyncio
+async def test_validation_is_served_from_the_rule_cache(cart_db, monkeypatch, statements):
+    monkeypatch.setattr(promo_counter, "_get_redis", lambda: None)
+    await _promo(cart_db, min_purchase_amount=Decimal("20.00"))
+
+    await promo_code_service.validate_promo_code(cart_db, code="flash", total_amount=Decimal("50"))
+    assert not (await promo_code_service.validate_promo_code(cart_db, code="FLAS", total_amount=Decimal("50"))).valid
+    with statements(cart_db) as seen:
+        ok = await promo_code_service.validate_promo_code(cart_db, code=" Flash ", total_amount=Decimal("50"))
+        too_small = await promo_code_service.validate_promo_code(cart_db, code="FLASH", total_amount=Decimal("10"))
+        unknown = await promo_code_service.validate_promo_code(cart_db, code="FLAS", total_amount=Decimal("50"))
+    assert seen == []
+    assert (ok.valid, ok.discount_amount, too_small.valid, unknown.valid) == (True, Decimal("5.00"), False, False)
+
+    await _promo(cart_db, code="FLAS")
+    promo_code_service.invalidate_rules()  # as the admin create route does
+    assert (await promo_code_service.validate_promo_code(cart_db, code="FLAS", total_amount=Decimal("50"))).valid
+
+
+@pytest.mark.asyncio
+async def test_once_per_user_codes(cart_db, monkeypatch):
+    monkeypatch.setattr(promo_counter, "_get_redis", lambda: None)
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    promo_id = await _promo(cart_db, once_per_user=True)
+    order = Order(user_id=user_id, order_number="PROMO001", total_amount=Decimal("10.00"), shipping_address={})
+    cart_db.add(order)
+    await cart_db.commit()
+
+    assert (await promo_code_service.validate_promo_code(cart_db, "FLASH", Decimal("50"), user_id=user_id)).valid
+    assert await promo_code_service.redeem(cart_db, promo_id, user_id=user_id)
+    promo_code_service.record_usage(
+        cart_db, promo_code_id=promo_id, order_id=order.id, discount_amount=Decimal("5.00"), user_id=user_id
+    )
+    await cart_db.commit()
+    promo_code_service.remember_user(promo_id, user_id)
+
+    again = await promo_code_service.validate_promo_code(cart_db, "FLASH", Decimal("50"), user_id=user_id)
+    assert (again.valid, again.message) == (False, "You have already used this promo code")
+    assert (await promo_code_service.validate_promo_code(cart_db, "FLASH", Decimal("50"), user_id=user_id + 1)).valid
+    assert not await promo_code_service.redeem(cart_db, promo_id, user_id=user_id)
+    assert await promo_code_service.redeem(cart_db, promo_id, user_id=user_id + 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("returning", [True, False], ids=["returning", "no-returning"])
+async def test_checkout_records_the_use_with_the_order(cart_db, monkeypatch, returning):
+    # MySQL has no INSERT ... RETURNING: server defaults stay unloaded after the flush
+    monkeypatch.setattr(cart_db.get_bind().dialect, "insert_returning", returning)
+    monkeypatch.setattr(promo_counter, "_get_redis", lambda: None)
+    monkeypatch.setattr(live_stats, "_get_redis", lambda: None)
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    promo_id = await _promo(cart_db, once_per_user=True)
+
+    await cart_service.add_item(cart_db, variant_id=1, quantity=2, user_id=user_id)
+    order = await order_service.create_order(
+        cart_db, user_id, OrderCreate(shipping_address={"city": "Kathmandu"}, promo_code="FLASH")
+    )
+    usage = (await cart_db.execute(select(PromoCodeUsage))).scalar_one()
+    assert (usage.order_id, usage.user_id, order.discount_amount) == (order.id, user_id, Decimal("5.00"))
+
+    assert await promo_code_service.redeem(cart_db, promo_id, user_id=user_id + 1)
+    await cart_db.commit()
+
+    # A redemption whose UPDATE was queued behind a committed one by the same user counts nothing
+    async def used_by(db, promo_code_id, user_id):
+        return True
+
+    monkeypatch.setattr(promo_code_service, "_used_by", used_by)
+    assert not await promo_code_service.redeem(cart_db, promo_id, user_id=user_id + 2)
+    await cart_db.commit()
+    assert await _used(cart_db, promo_id) == 2
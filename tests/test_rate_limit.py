@@ -0,0 +1,88 @@
+import logging
+
+import pytest
+from httpx import AsyncClient
+
+from app.core import rate_limit, security
+from app.core.config import settings
+from app.core.metrics import RATE_LIMITED
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "_get_redis", lambda: None)
+    monkeypatch.setattr(rate_limit, "_in_memory_store", {})
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_sliding_window_weighs_the_previous_window():
+    state = [-1, 0, 0]
+    assert [rate_limit._sliding_window(state, 3, 60, 10) for _ in range(4)] == [0, 0, 0, 50]
+    # 15s into the next window, 3 * 45/60 of the previous window still counts: 2.25 + 1 > 3
+    assert rate_limit._sliding_window(state, 3, 60, 75) == pytest.approx(5)
+    assert rate_limit._sliding_window(state, 3, 60, 80) == 0
+    assert state == [1, 1, 3]
+
+
+def test_token_bucket_refills_at_limit_per_window():
+    state = [2.0, 0.0]
+    assert [rate_limit._token_bucket(state, 2, 0.5, 0) for _ in range(3)] == [0, 0, 2]
+    assert rate_limit._token_bucket(state, 2, 0.5, 1) == pytest.approx(1)
+    assert rate_limit._token_bucket(state, 2, 0.5, 2) == 0
+
+
+def test_policies_match_routes():
+    api = settings.API_V1_STR
+    assert rate_limit.match_policy("POST", f"{api}/contact/").name == "contact"
+    verify_otp = rate_limit.match_policy("POST", f"{api}/auth/verify-otp")
+    assert (verify_otp.name, verify_otp.key, verify_otp.algorithm) == ("verify_otp", "ip", rate_limit.SLIDING_WINDOW)
+    assert rate_limit.match_policy("POST", f"{api}/auth/password-recovery/a@b.c").name == "password_recovery"
+    assert rate_limit.match_policy("GET", f"{api}/catalog/products", b"search=tee").name == "search"
+    assert rate_limit.match_policy("GET", f"{api}/catalog/products", b"limit=10") is None
+    assert rate_limit.match_policy("GET", f"{api}/auth/login") is None
+
+
+@pytest.mark.asyncio
+async def test_throttled_requests_get_429_before_the_route(limits):
+    app = rate_limit.RateLimitMiddleware(_ok)
+    before = RATE_LIMITED.value(("newsletter",))
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        url = f"{settings.API_V1_STR}/newsletter/subscribe"
+        statuses = [(await ac.post(url)).status_code for _ in range(6)]
+        assert statuses == [200] * 5 + [429]
+        res = await ac.post(url)
+        assert res.status_code == 429 and 1 <= int(res.headers["retry-after"]) <= 3600
+        assert res.json()["detail"]
+        assert (await ac.get(f"{settings.API_V1_STR}/catalog/products")).status_code == 200  # no policy
+    assert RATE_LIMITED.value(("newsletter",)) == before + 2
+
+
+@pytest.mark.asyncio
+async def test_signed_in_users_have_their_own_budget(limits, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMITS", "promo_validate=1/60")
+    monkeypatch.setattr(rate_limit, "_exact_policies", rate_limit._build_policies()[0])
+    app = rate_limit.RateLimitMiddleware(_ok)
+    url = f"{settings.API_V1_STR}/promo/promo-codes/validate"
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        assert (await ac.post(url)).status_code == 200
+        assert (await ac.post(url)).status_code == 429  # anonymous: by IP
+        for user_id in (1, 2):
+            headers = {"Authorization": f"Bearer {security.create_access_token(user_id)}"}
+            assert (await ac.post(url, headers=headers)).status_code == 200
+        assert (await ac.post(url, headers=headers)).status_code == 429
+
+
+def test_client_ip_trusts_only_the_configured_proxies(monkeypatch, caplog):
+    monkeypatch.setattr(rate_limit, "_forwarded_for_warned", False)
+    scope = {"client": ("10.0.0.2", 1234), "headers": [(b"x-forwarded-for", b"6.6.6.6, 1.2.3.4")]}
+    with caplog.at_level(logging.WARNING, logger="app.core.rate_limit"):
+        assert rate_limit.client_ip(scope) == "10.0.0.2"
+        assert rate_limit.client_ip(scope) == "10.0.0.2"
+    assert len(caplog.records) == 1 and "RATE_LIMIT_PROXY_HOPS" in caplog.text  # misconfigured proxy, once
+    monkeypatch.setattr(settings, "RATE_LIMIT_PROXY_HOPS", 1)
+    assert rate_limit.client_ip(scope) == "1.2.3.4"  # the spoofable first entry is ignored
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.api.v1.routers.admin import approve_review, delete_review
+from app.api.v1.routers.reviews import create_review
+from app.models.product import Category, Product
+from app.models.user import User
+from app.schemas.product import Product as ProductSchema
+from app.schemas.review import ReviewCreate
+from app.services.product_service import product_service
+from app.services.review_service import review_service
+
+
+async def _summary(db, slug="tee"):
+    product = (
+        await db.execute(select(Product).filter(Product.slug == slug).execution_options(populate_existing=True))
+    ).scalar_one()
+    schema = ProductSchema.model_validate(product)
+    return Decimal(schema.rating_avg), schema.rating_count, schema.rating_histogram
+
+
+@pytest.mark.asyncio
+async def test_rating_summary_follows_review_changes(cart_db):
+    user = (await cart_db.execute(select(User))).scalar_one()
+    five = await create_review("tee", ReviewCreate(rating=5), user, cart_db)
+    three = await create_review("tee", ReviewCreate(rating=3, comment="ok"), user, cart_db)
+    await create_review("tee", ReviewCreate(rating=4), user, cart_db)
+    assert await _summary(cart_db) == (Decimal("4.00"), 3, {"1": 0, "2": 0, "3": 1, "4": 1, "5": 1})
+
+    await approve_review(five.id, False, cart_db, user)
+    await approve_review(five.id, False, cart_db, user)  # unchanged: no second adjustment
+    assert (await _summary(cart_db))[:2] == (Decimal("3.50"), 2)
+
+    await delete_review(five.id, cart_db, user)  # unapproved: nothing to remove
+    await delete_review(three.id, cart_db, user)
+    assert await _summary(cart_db) == (Decimal("4.00"), 1, {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0})
+    assert "ratings_4" not in ProductSchema.model_validate(
+        (await cart_db.execute(select(Product))).scalar_one()
+    ).model_dump()
+
+
+@pytest.mark.asyncio
+async def test_sort_by_rating(cart_db):
+    user = (await cart_db.execute(select(User))).scalar_one()
+    category_id = (await cart_db.execute(select(Category.id))).scalar_one()
+    cart_db.add_all([
+        Product(name=name, slug=name, category_id=category_id) for name in ("mug", "cap", "bag")
+    ])
+    await cart_db.commit()
+    for slug, ratings in {"mug": [5, 4], "cap": [5], "tee": [2]}.items():
+        for rating in ratings:
+            await create_review(slug, ReviewCreate(rating=rating), user, cart_db)
+
+    products = await product_service.get_multi_with_filtering(cart_db, sort="rating")
+    assert [product.slug for product in products] == ["cap", "mug", "tee", "bag"]
+
+
+@pytest.mark.asyncio
+async def test_review_pages_follow_the_cursor(cart_db, statements):
+    user = (await cart_db.execute(select(User))).scalar_one()
+    user.full_name = "Sita"
+    await cart_db.commit()
+    product_id = (await cart_db.execute(select(Product.id))).scalar_one()
+    ratings = [4, 2, 5, 4, 1]
+    created = [await create_review("tee", ReviewCreate(rating=rating), user, cart_db) for rating in ratings]
+    await approve_review(created[1].id, False, cart_db, user)
+
+    async def pages(**filters):
+        seen, cursor = [], None
+        while True:
+            page = await review_service.list_reviews(cart_db, product_id, limit=2, cursor=cursor, **filters)
+            seen.append([review.rating for review in page.items])
+            if not page.next_cursor:
+                return seen
+            cursor = page.next_cursor
+
+    assert await pages() == [[1, 4], [5, 4]]  # newest first; the unapproved 2 is hidden
+    assert await pages(sort="rating") == [[5, 4], [4, 1]]
+    assert await pages(sort="rating", min_rating=4) == [[5, 4], [4]]
+    assert await pages(rating=4) == [[4, 4]]
+
+    with statements(cart_db) as seen:
+        page = await review_service.list_reviews(cart_db, product_id, limit=10)
+    assert seen == ["SELECT"]  # one query, author name joined in
+    assert page.items[0].author_name == "Sita" and "email" not in page.items[0].model_dump()
+
+    with pytest.raises(ValueError):
+        await review_service.list_reviews(cart_db, product_id, limit=2, cursor="not-a-cursor")
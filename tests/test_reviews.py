@@ -78,6 +78,6 @@ async def test_review_flow():
         # 4. List Reviews
         list_res = await ac.get(f"/api/v1/products/{product_id}/reviews")
         assert list_res.status_code == 200
-        reviews = list_res.json()
+        reviews = list_res.json()["items"]
         assert len(reviews) >= 1
         assert reviews[0]["comment"] == "Great product!"
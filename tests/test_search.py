@@ -0,0 +1,46 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, postgresql
+
+from app.crud.search import as_id, contains
+from app.models.order import Order
+from app.models.user import User
+from app.services.order_service import order_service
+
+
+def _session_on(dialect):
+    return SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=dialect))
+
+
+def test_contains_uses_the_dialects_indexed_form():
+    on_mysql = contains(_session_on(mysql.dialect()), " jo ", User.email, User.full_name)
+    assert str(on_mysql.compile(dialect=mysql.dialect())) == 'MATCH (user.email, user.full_name) AGAINST (%s IN BOOLEAN MODE)'
+    assert on_mysql.compile(dialect=mysql.dialect()).params == {"param_1": '"jo"'}
+
+    on_postgres = contains(_session_on(postgresql.dialect()), "50%", User.email)
+    compiled = on_postgres.compile(dialect=postgresql.dialect())
+    assert "ILIKE" in str(compiled) and list(compiled.params.values()) == ["%50\\%%"]
+
+    assert (as_id(" 42 "), as_id("A1B2"), as_id("-1")) == (42, None, None)
+
+
+@pytest.mark.asyncio
+async def test_order_search_fast_paths(cart_db):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    cart_db.add_all([
+        Order(user_id=user_id, order_number=number, total_amount=Decimal("1.00"), shipping_address={})
+        for number in ("AB12CD34", "ZZ990011", "12345678")
+    ])
+    await cart_db.commit()
+
+    async def found(term):
+        return sorted(order.order_number for order in await order_service.get_all_orders(cart_db, search=term))
+
+    assert await found("ab12cd34") == ["AB12CD34"]  # order number, any case
+    assert await found("2") == ["ZZ990011"]  # primary key, not every number containing a 2
+    assert await found("12345678") == ["12345678"]
+    assert await found("cd3") == ["AB12CD34"]  # substring
+    assert await found("%") == []  # wildcards are literal
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app.core import security
+from app.core.metrics import REGISTRY
+from app.models.user import User
+from app.services.user_service import user_service
+
+
+@pytest.mark.asyncio
+async def test_hashing_leaves_the_event_loop_free():
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    hashed = await security.hash_password("s3cret")
+    ticker.cancel()
+    assert ticks >= 2  # the loop kept running while argon2 worked
+    assert await security.check_password("s3cret", hashed)
+    assert not await security.check_password("wrong", hashed)
+    assert "password_hash_queue_depth 0" in REGISTRY.render()
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_with_current_parameters(cart_db):
+    old = CryptContext(schemes=["argon2"], argon2__rounds=1, argon2__memory_cost=8192, argon2__parallelism=1)
+    user = (await cart_db.execute(select(User))).scalar_one()
+    user.hashed_password = old.hash("s3cret")
+    await cart_db.commit()
+
+    assert await user_service.authenticate(cart_db, user.email, "wrong") is None
+    assert security.pwd_context.needs_update(user.hashed_password)  # a failed login changes nothing
+
+    assert await user_service.authenticate(cart_db, user.email, "s3cret") is user
+    upgraded = user.hashed_password
+    assert not security.pwd_context.needs_update(upgraded)
+    assert f"m={security.settings.ARGON2_MEMORY_COST},t={security.settings.ARGON2_TIME_COST}" in upgraded
+
+    await user_service.authenticate(cart_db, user.email, "s3cret")
+    assert user.hashed_password == upgraded  # current hashes are left alone
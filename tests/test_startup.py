@@ -0,0 +1,34 @@
+import os
+import sys
+
+from app.core.lazy import lazy_import
+from benchmarks.import_profile import parse_importtime, profile
+
+# Cumulative import time allowed for app.main (measured under -X importtime, which adds overhead)
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "2000"))
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    sys.modules.pop("colorsys", None)
+    loaded = []
+    colorsys = lazy_import("colorsys", on_load=lambda m: loaded.append(m.__name__))
+    assert "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1)
+    colorsys.hsv_to_rgb(0, 0, 0)
+    assert loaded == ["colorsys"]
+
+
+def test_parse_importtime_skips_header():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        150 |   app.core.lazy\n"
+        "import time:       200 |        500 | app.main\n"
+    )
+    rows = parse_importtime(stderr)
+    assert [(r.module, r.depth, r.cumulative_us) for r in rows] == [("app.core.lazy", 1, 150), ("app.main", 0, 500)]
+
+
+def test_app_import_defers_heavy_modules_and_fits_budget():
+    report = profile("app.main")
+    assert report.loaded_deferred == []
+    assert report.total_ms <= STARTUP_BUDGET_MS, [f"{r.module} {r.cumulative_us / 1000:.1f}ms" for r in report.top(10)]
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.routers.payments import stripe_webhook
+from app.core import live_stats
+from app.models.order import Order
+from app.models.stats import DailySalesRollup
+from app.models.user import User
+from app.schemas.order import OrderCreate
+from app.services.cart_service import cart_service
+from app.services.order_service import order_service
+from app.services.payment_service import payment_service
+from app.services.stats_service import _utc_date, stats_service, utc_day
+
+TODAY = utc_day()
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    """Live stats without Redis: totals from the database, events fanned out in-process."""
+    monkeypatch.setattr(live_stats, "_get_redis", lambda: None)
+
+
+async def _rollups(db):
+    rows = await stats_service.daily(db, TODAY - timedelta(days=90), TODAY)
+    return {row.day: (row.order_count, Decimal(row.revenue)) for row in rows}
+
+
+@pytest.mark.asyncio
+async def test_order_writes_keep_the_dashboard_figures_current(cart_db, statements):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    await cart_service.add_item(cart_db, variant_id=1, quantity=2, user_id=user_id)
+    order = await order_service.create_order(cart_db, user_id, OrderCreate(shipping_address={"city": "Kathmandu"}))
+
+    totals = await stats_service.totals(cart_db)
+    assert (totals["orders"], totals["revenue"]) == (1, 0)  # pending orders are not revenue yet
+    assert await _rollups(cart_db) == {TODAY: (1, Decimal("0"))}
+
+    await order_service.update_status(cart_db, order.id, "paid")
+    await order_service.update_status(cart_db, order.id, "shipped")  # still revenue: no change
+    assert (await stats_service.totals(cart_db))["revenue"] == Decimal("20.00")
+    assert await _rollups(cart_db) == {TODAY: (1, Decimal("20.00"))}
+
+    await order_service.update_status(cart_db, order.id, "cancelled")
+    assert await _rollups(cart_db) == {TODAY: (1, Decimal("0"))}
+
+    with statements(cart_db) as seen:
+        totals = await stats_service.totals(cart_db)
+        await stats_service.daily(cart_db, TODAY - timedelta(days=90), TODAY)
+    assert seen == ["SELECT", "SELECT"]  # no aggregate over order or user
+
+    await order_service.delete_order(cart_db, order.id)
+    assert await _rollups(cart_db) == {TODAY: (0, Decimal("0"))}
+    assert (await stats_service.totals(cart_db))["orders"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_rebuilds_counters_and_recent_rollups(cart_db):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    noon = datetime.combine(TODAY, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=12)
+    orders = [
+        ("paid", "10.00", noon),
+        ("pending", "5.00", noon),
+        ("delivered", "7.50", noon - timedelta(days=2)),
+        ("completed", "100.00", noon - timedelta(days=200)),  # counted in totals, outside the window
+    ]
+    cart_db.add_all([
+        Order(user_id=user_id, order_number=f"STAT{n:04d}", status=status, total_amount=Decimal(total),
+              shipping_address={}, created_at=created_at)
+        for n, (status, total, created_at) in enumerate(orders)
+    ])
+    stale_day = TODAY - timedelta(days=5)
+    cart_db.add(DailySalesRollup(day=stale_day, order_count=3, revenue=Decimal("9.00")))
+    await cart_db.commit()
+
+    report = await stats_service.reconcile(cart_db, days=90, today=TODAY)
+
+    assert report == {"users": 1, "orders": 4, "revenue": 117.5, "days": 2}
+    totals = await stats_service.totals(cart_db)
+    assert (totals["users"], totals["orders"], totals["revenue"]) == (1, 4, Decimal("117.50"))
+    assert await _rollups(cart_db) == {
+        TODAY - timedelta(days=2): (1, Decimal("7.50")),
+        TODAY: (2, Decimal("10.00")),
+    }
+    assert isinstance(next(iter(await _rollups(cart_db))), date)
+
+
+@pytest.mark.asyncio
+async def test_card_payments_count_as_revenue(cart_db, monkeypatch):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    await cart_service.add_item(cart_db, variant_id=1, quantity=1, user_id=user_id)
+    order = await order_service.create_order(cart_db, user_id, OrderCreate(shipping_address={"city": "Lalitpur"}))
+    order.stripe_payment_id = "pi_123"
+    await cart_db.commit()
+
+    event = {"type": "payment_intent.succeeded", "data": {"object": {"id": "pi_123"}}}
+    monkeypatch.setattr(payment_service, "construct_event", lambda payload, signature: event)
+
+    class StripeRequest:
+        async def body(self) -> bytes:
+            return b"{}"
+
+    assert await stripe_webhook(StripeRequest(), "sig", cart_db) == {"status": "success"}
+    assert (await cart_db.get(Order, order.id, populate_existing=True)).status == "paid"
+    assert (await stats_service.totals(cart_db))["revenue"] == Decimal("10.00")
+    assert await _rollups(cart_db) == {TODAY: (1, Decimal("10.00"))}
+
+
+def test_reconcile_groups_by_the_utc_day_on_postgresql():
+    # DATE() of a timestamptz would use the session's TimeZone, unlike utc_day()
+    on_postgres = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=postgresql.dialect()))
+    compiled = _utc_date(on_postgres, Order.created_at).compile(dialect=postgresql.dialect())
+    assert str(compiled) == 'date(timezone(%(timezone_1)s, "order".created_at))'
+    assert compiled.params == {"timezone_1": "UTC"}
+
+
+def _event(chunk: str) -> tuple:
+    kind, data = chunk.strip().split("\n")
+    return kind.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_committed_changes(cart_db):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    await cart_service.add_item(cart_db, variant_id=2, quantity=1, user_id=user_id)
+
+    async def disconnected() -> bool:
+        return False
+
+    totals = await live_stats.totals(lambda: stats_service.totals(cart_db))
+    events = live_stats.stream(totals, disconnected)
+    assert _event(await events.__anext__()) == ("totals", {"type": "totals", "users": 0, "orders": 0, "revenue": 0.0})
+
+    order = await order_service.create_order(cart_db, user_id, OrderCreate(shipping_address={"city": "Pokhara"}))
+    kind, delta = _event(await events.__anext__())
+    assert (kind, delta["orders"], delta["revenue"], delta["day"]) == ("delta", 1, 0.0, TODAY.isoformat())
+
+    await order_service.update_status(cart_db, order.id, "delivered")
+    assert _event(await events.__anext__())[1]["revenue"] == 12.0
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stalled_streams_are_told_to_resync():
+    broadcaster = live_stats._Broadcaster()
+    async with broadcaster.subscribe() as queue:
+        for n in range(live_stats.SUBSCRIBER_QUEUE_SIZE + 1):
+            broadcaster.deliver({"type": "delta", "orders": n})
+        assert queue.qsize() == 1 and queue.get_nowait() == {"type": "resync"}
+    await asyncio.sleep(0)
+    assert broadcaster._listener is None
+
+
+@pytest.mark.asyncio
+async def test_a_redis_outage_is_logged_once(monkeypatch, caplog):
+    class DownRedis:
+        async def eval(self, *args):
+            raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(live_stats, "_get_redis", lambda: DownRedis())
+    monkeypatch.setattr(live_stats, "_redis_failing", False)
+    with caplog.at_level(logging.WARNING, logger="app.core.live_stats"):
+        for _ in range(3):
+            await live_stats.publish_delta(orders=1)
+    assert len(caplog.records) == 1 and "connection refused" in caplog.text
@@ -0,0 +1,104 @@
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from httpx import AsyncClient
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.core import storage
+from app.main import app
+
+
+def _png(color=(10, 20, 30), size=(64, 64)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _upload(data: bytes, content_type: str = "image/png") -> UploadFile:
+    # size=None mimics a chunked request body, so the limit must be enforced while streaming
+    return UploadFile(file=io.BytesIO(data), filename="x.png", headers=Headers({"content-type": content_type}))
+
+
+@pytest.fixture
+def upload_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "_dirs_ready", False)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_identical_uploads_share_one_blob(upload_root):
+    data = _png()
+    first = await storage.save_product_image(_upload(data), product_id=1)
+    second = await storage.save_product_image(_upload(data), product_id=2, variant_id=5)
+    other = await storage.save_content_image(_upload(_png((200, 0, 0))))
+
+    assert first == second
+    assert first != other
+    assert storage.is_blob_path(first) and first.endswith(".png")
+    assert (upload_root / first).read_bytes() == data
+    assert not any((upload_root / "uploads" / "tmp").iterdir())
+
+
+@pytest.mark.asyncio
+async def test_size_limit_is_enforced_while_streaming(upload_root, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_CHUNK_SIZE", 1024)
+    with pytest.raises(HTTPException) as exc:
+        await storage.save_category_image(_upload(b"\0" * (storage.MAX_FILE_SIZE + 1)), category_id=1)
+    assert exc.value.status_code == 400
+    assert not any((upload_root / "uploads" / "tmp").iterdir())
+    assert not any((upload_root / "uploads" / "blobs").iterdir())
+
+
+@pytest.mark.asyncio
+async def test_invalid_image_is_rejected(upload_root):
+    with pytest.raises(HTTPException) as exc:
+        await storage.save_content_image(_upload(b"not an image"))
+    assert "Invalid image file" in exc.value.detail
+
+
+@pytest.mark.asyncio
+async def test_blobs_are_served_with_immutable_cache_headers(upload_root):
+    (upload_root / "static").mkdir()
+    path = await storage.save_product_image(_upload(_png()), product_id=1)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get(f"/{path}")
+    assert res.status_code == 200
+    assert res.headers["cache-control"] == storage.ImmutableStaticFiles.CACHE_CONTROL
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_is_bounded_and_keeps_order(monkeypatch):
+    import asyncio
+    from app.api.v1.routers import product_images
+
+    active = peak = 0
+
+    async def fake_save(file, product_id, variant_id=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if file.filename == "bad.png":
+            raise ValueError("boom")
+        return f"uploads/blobs/{file.filename}"
+
+    async def fake_derivatives(url):
+        return None
+
+    monkeypatch.setattr(product_images, "save_product_image", fake_save)
+    monkeypatch.setattr(product_images, "generate_derivatives", fake_derivatives)
+    monkeypatch.setattr(product_images.settings, "UPLOAD_CONCURRENCY", 3)
+
+    files = [UploadFile(file=io.BytesIO(b""), filename=f"{n}.png") for n in range(8)]
+    stored = await product_images._store_images(files, product_id=1)
+    assert [url for url, _ in stored] == [f"uploads/blobs/{n}.png" for n in range(8)]
+    assert peak == 3
+
+    files.insert(2, UploadFile(file=io.BytesIO(b""), filename="bad.png"))
+    with pytest.raises(HTTPException) as exc:
+        await product_images._store_images(files, product_id=1)
+    assert exc.value.detail == "Error uploading bad.png: boom"
@@ -0,0 +1,87 @@
+import io
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.core import storage
+from app.core.images import generate_derivatives
+from app.core.storage_backend import LocalStorage, S3Storage, set_storage
+
+
+def _jpeg() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (800, 600), (90, 140, 30)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def _upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="x.jpg", headers=Headers({"content-type": "image/jpeg"}))
+
+
+async def _read_all(backend, key: str) -> bytes:
+    return b"".join([chunk async for chunk in backend.open(key)])
+
+
+@pytest.fixture
+def upload_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "_dirs_ready", False)
+    yield tmp_path
+    set_storage(None)
+
+
+@pytest.mark.asyncio
+async def test_local_backend_roundtrip(tmp_path):
+    backend = LocalStorage(root=str(tmp_path), public_url="https://cdn.example.com/")
+    source = tmp_path / "src.bin"
+    source.write_bytes(b"hello")
+
+    await backend.put("uploads/blobs/aa/key.bin", source)
+    assert await backend.exists("uploads/blobs/aa/key.bin")
+    assert await _read_all(backend, "uploads/blobs/aa/key.bin") == b"hello"
+    assert backend.get_url("uploads/blobs/aa/key.bin") == "https://cdn.example.com/uploads/blobs/aa/key.bin"
+
+    await backend.delete("uploads/blobs/aa/key.bin")
+    await backend.delete("uploads/blobs/aa/key.bin")  # missing keys are ignored
+    assert not await backend.exists("uploads/blobs/aa/key.bin")
+
+
+def test_resolve_url_only_rewrites_blob_keys(upload_root):
+    set_storage(LocalStorage(public_url="https://cdn.example.com"))
+    assert storage.resolve_url("uploads/blobs/ab/x.jpg") == "https://cdn.example.com/uploads/blobs/ab/x.jpg"
+    assert storage.resolve_url("/uploads/blobs/ab/x.jpg") == "https://cdn.example.com/uploads/blobs/ab/x.jpg"
+    assert storage.resolve_url("uploads/products/1/legacy.jpg") == "uploads/products/1/legacy.jpg"
+    assert storage.resolve_url("https://elsewhere/x.jpg") == "https://elsewhere/x.jpg"
+    assert storage.resolve_url(None) is None
+
+    set_storage(LocalStorage())
+    assert storage.resolve_url("uploads/blobs/ab/x.jpg") == "uploads/blobs/ab/x.jpg"
+
+
+@pytest.mark.asyncio
+async def test_s3_backend_stores_blobs_and_derivatives(upload_root):
+    from moto import mock_aws  # in requirements.txt: a missing package fails the test rather than skipping it
+
+    with mock_aws():
+        backend = S3Storage(bucket="media", region="us-east-1", access_key_id="test", secret_access_key="test")
+        backend.client.create_bucket(Bucket="media")
+        set_storage(backend)
+
+        data = _jpeg()
+        key = await storage.save_product_image(_upload(data), product_id=1)
+        assert await storage.save_product_image(_upload(data), product_id=2) == key
+        assert await _read_all(backend, key) == data
+        assert not (upload_root / key).exists()  # nothing left on the app server's disk
+        head = backend.client.head_object(Bucket="media", Key=key)
+        assert head["CacheControl"] == "public, max-age=31536000, immutable"
+        assert storage.resolve_url(key) == f"https://media.s3.amazonaws.com/{key}"
+
+        derivatives = await generate_derivatives(key)
+        assert await backend.exists(derivatives["webp"]["480"])
+
+        await storage.delete_product_image(key)
+        assert not await backend.exists(key)
+        with pytest.raises(FileNotFoundError):
+            await _read_all(backend, key)
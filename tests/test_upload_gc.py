@@ -0,0 +1,111 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 - register every model on Base.metadata
+from app.models.base import Base
+from app.models.page import Page
+from app.models.product import Category, Product, ProductImage
+from app.models.site_config import SiteConfig
+from app.models.user import User
+from app.services.upload_gc_service import QUARANTINE_DIR, QUARANTINE_RUN_FORMAT, upload_gc_service
+
+DAY = 24 * 3600
+
+
+def _file(path: str, age: float = 2 * DAY, size: int = 100) -> Path:
+    file = Path(path)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_bytes(b"x" * size)
+    stamp = time.time() - age
+    os.utime(file, (stamp, stamp))
+    return file
+
+
+@pytest_asyncio.fixture
+async def gc_db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'gc.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as db:
+        category = Category(name="Shoes", slug="shoes", image_url="/uploads/blobs/cc/category.png")
+        db.add(category)
+        await db.flush()
+        live = Product(name="Live", slug="live", category_id=category.id)
+        gone = Product(name="Gone", slug="gone", category_id=category.id, is_deleted=True)
+        db.add_all([live, gone])
+        await db.flush()
+        db.add_all([
+            ProductImage(
+                product_id=live.id,
+                url="uploads/blobs/aa/live.jpg",
+                derivatives={"webp": {"160": "uploads/blobs/aa/live_160.webp"}},
+            ),
+            ProductImage(product_id=gone.id, url="uploads/blobs/bb/gone.jpg"),
+            SiteConfig(logo_url="uploads/blobs/dd/logo.png"),
+            User(email="a@example.com", hashed_password="x", profile_image="/uploads/profiles/me.jpg"),
+            Page(title="About", slug="about", content='<p><img src="http://api.test/uploads/pages/team.jpg"></p>'),
+        ])
+        await db.commit()
+        yield db
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_referenced_paths_cover_every_column(gc_db):
+    referenced = await upload_gc_service.referenced_paths(gc_db)
+    assert referenced == {
+        "uploads/blobs/aa/live.jpg",
+        "uploads/blobs/aa/live_160.webp",
+        "uploads/blobs/cc/category.png",
+        "uploads/blobs/dd/logo.png",
+        "uploads/profiles/me.jpg",
+        "uploads/pages/team.jpg",
+    }
+
+
+@pytest.mark.asyncio
+async def test_collect_quarantines_old_orphans_only(gc_db):
+    kept = [
+        _file("uploads/blobs/aa/live.jpg"),
+        _file("uploads/blobs/aa/live_160.webp"),
+        _file("uploads/pages/team.jpg"),
+        _file("uploads/profiles/me.jpg"),
+        _file("uploads/products/9/just-uploaded.jpg", age=60),  # row not committed yet
+        _file("uploads/.gitkeep"),
+    ]
+    orphans = [
+        _file("uploads/blobs/bb/gone.jpg", size=300),  # soft-deleted product
+        _file("uploads/site/old-logo.png", size=200),
+    ]
+    stale_tmp = _file("uploads/tmp/upload-abc.part")
+    expired_run = QUARANTINE_DIR / (datetime.now(timezone.utc) - timedelta(days=30)).strftime(QUARANTINE_RUN_FORMAT)
+    _file(str(expired_run / "products/1/ancient.jpg"))
+
+    dry = await upload_gc_service.collect(gc_db, dry_run=True)
+    assert dry.orphaned == 2 and dry.reclaimed_bytes == 500
+    assert all(f.exists() for f in orphans)
+
+    report = await upload_gc_service.collect(gc_db, grace_hours=24, quarantine_days=7)
+    assert sorted(report.orphans) == ["uploads/blobs/bb/gone.jpg", "uploads/site/old-logo.png"]
+    assert report.reclaimed_bytes == 500
+    assert report.skipped_recent == 1
+    assert (report.tmp_removed, report.quarantine_purged) == (1, 1)
+    assert all(f.exists() for f in kept)
+    assert not any(f.exists() for f in orphans) and not stale_tmp.exists()
+    assert not expired_run.exists()
+    assert len(list(QUARANTINE_DIR.glob("*/blobs/bb/gone.jpg"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_collect_without_quarantine_deletes(gc_db):
+    orphan = _file("uploads/site/old-favicon.ico")
+    report = await upload_gc_service.collect(gc_db, quarantine_days=0)
+    assert report.orphans == ["uploads/site/old-favicon.ico"]
+    assert not orphan.exists() and not QUARANTINE_DIR.exists()
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.models.user import User
+from app.models.wishlist import Wishlist, WishlistItem
+from app.services import wishlist_service as wishlist_module
+from app.services.wishlist_service import wishlist_service
+
+
+@pytest.fixture
+def local_ids(monkeypatch):
+    """Wishlist id cache without Redis (the per-worker fallback)."""
+    monkeypatch.setattr(wishlist_module, "_get_redis", lambda: None)
+    wishlist_module._local_ids.clear()
+
+
+async def _count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_reads_never_create_a_wishlist(cart_db, local_ids):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    wishlist = await wishlist_service.get_wishlist(cart_db, user_id)
+    assert (wishlist.id, wishlist.user_id, wishlist.items) == (0, user_id, [])
+    assert await wishlist_service.variant_ids(cart_db, user_id) == set()
+    assert await _count(cart_db, Wishlist) == 0
+
+
+@pytest.mark.asyncio
+async def test_add_is_idempotent_and_remove_is_one_delete(cart_db, local_ids, statements):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    await wishlist_service.add_item(cart_db, user_id, variant_id=1)
+    with statements(cart_db) as seen:
+        wishlist = await wishlist_service.add_item(cart_db, user_id, variant_id=2)
+    assert seen[0] == "INSERT" and "INSERT" not in seen[1:]  # the wishlist exists: no create-and-retry
+    assert sorted(item.variant.id for item in wishlist.items) == [1, 2]
+
+    wishlist = await wishlist_service.add_item(cart_db, user_id, variant_id=1)
+    assert len(wishlist.items) == 2 and await _count(cart_db, WishlistItem) == 2
+
+    with statements(cart_db) as seen:
+        wishlist = await wishlist_service.remove_item(cart_db, user_id, variant_id=1)
+    assert seen[0] == "DELETE" and [item.product_variant_id for item in wishlist.items] == [2]
+
+
+@pytest.mark.asyncio
+async def test_variant_ids_are_cached_until_a_write(cart_db, local_ids, statements):
+    user_id = (await cart_db.execute(select(User.id))).scalar_one()
+    await wishlist_service.add_item(cart_db, user_id, variant_id=2)
+    assert await wishlist_service.variant_ids(cart_db, user_id) == {2}
+    with statements(cart_db) as seen:
+        assert await wishlist_service.variant_ids(cart_db, user_id) == {2}
+    assert seen == []
+
+    await wishlist_service.add_item(cart_db, user_id, variant_id=1)
+    assert await wishlist_service.variant_ids(cart_db, user_id) == {1, 2}